@@ -0,0 +1,109 @@
+"""Cost-weighted admission control with a fast lane for small requests
+
+Each request gets a cost estimate before any work starts: pages to extract
+plus chunks to summarize, times the weight of the model tier that will run
+it. The sum, not the product: a request's memory and extraction time grow
+linearly with its size, while pages x chunks grows with its square (chunks
+are about two per page) and would make a 64-page PDF cost 60 times more per
+page than a short one. Admitted requests hold their cost until they finish. A request that
+would push its lane past capacity is rejected at once, with a Retry-After
+based on how fast admitted work has been draining, instead of queueing
+behind everything else.
+
+Requests up to ``small_cost`` first try a separate fast lane with its own
+capacity, so a burst of huge documents cannot starve them; they use the
+main lane when the fast lane is full. A request bigger than a whole lane is
+still admitted when that lane is idle, so it is never rejected forever.
+"""
+import math
+import threading
+import time
+
+# Relative cost of one unit of work per model tier
+TIER_WEIGHTS = {"large": 1.0, "stub": 1.0, "distil": 0.5, "t5": 0.5}
+
+CHARS_PER_PAGE = 3000
+CHARS_PER_CHUNK = 1500
+
+
+def estimate_cost(pages=None, chars=None, tier="large"):
+    """Work units of a request: pages + chunks, times the tier's weight
+
+    Linear in the document's size, like the peak memory of preparing it.
+    ``chars`` is estimated from ``pages`` (and the other way round) when only
+    one is known.
+    """
+    if chars is None:
+        chars = (pages or 1) * CHARS_PER_PAGE
+    if pages is None:
+        pages = math.ceil(chars / CHARS_PER_PAGE)
+    chunks = math.ceil(chars / CHARS_PER_CHUNK)
+    return TIER_WEIGHTS.get(tier, 1.0) * (max(1, pages) + max(1, chunks))
+
+
+class Rejected(Exception):
+    def __init__(self, retry_after_s, lane):
+        super().__init__(f"Server busy ({lane} lane full), retry in {retry_after_s}s")
+        self.retry_after_s = retry_after_s
+        self.lane = lane
+
+
+class _Lane:
+    def __init__(self, name, capacity):
+        self.name = name
+        self.capacity = capacity
+        self.used = 0.0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def fits(self, cost):
+        return self.in_flight == 0 or self.used + cost <= self.capacity
+
+
+class AdmissionController:
+    def __init__(self, capacity=60.0, fast_lane_capacity=12.0, small_cost=3.0):
+        self.small_cost = small_cost
+        self.main = _Lane("main", capacity)
+        self.fast = _Lane("fast", fast_lane_capacity)
+        # Seconds one unit of cost takes to finish (running average)
+        self.seconds_per_unit = None
+        self._lock = threading.Lock()
+
+    def admit(self, cost):
+        """Reserve ``cost`` and return a ticket for release(); raises Rejected when full"""
+        with self._lock:
+            lanes = [self.fast, self.main] if cost <= self.small_cost else [self.main]
+            for lane in lanes:
+                if lane.fits(cost):
+                    lane.used += cost
+                    lane.in_flight += 1
+                    lane.admitted += 1
+                    return {"lane": lane, "cost": cost, "started": time.perf_counter()}
+            lane = lanes[-1]
+            lane.rejected += 1
+            raise Rejected(self._retry_after(lane, cost), lane.name)
+
+    def release(self, ticket):
+        seconds = time.perf_counter() - ticket["started"]
+        with self._lock:
+            lane = ticket["lane"]
+            lane.used = max(0.0, lane.used - ticket["cost"])
+            lane.in_flight -= 1
+            per_unit = seconds / ticket["cost"] if ticket["cost"] else 0.0
+            self.seconds_per_unit = per_unit if self.seconds_per_unit is None else \
+                self.seconds_per_unit + 0.2 * (per_unit - self.seconds_per_unit)
+
+    def _retry_after(self, lane, cost):
+        """Whole seconds until enough of the lane's work should have drained"""
+        excess = lane.used + cost - lane.capacity
+        per_unit = self.seconds_per_unit or 1.0
+        # Admitted requests run concurrently, so their work drains in parallel
+        return max(1, math.ceil(excess * per_unit / max(1, lane.in_flight)))
+
+    def snapshot(self):
+        with self._lock:
+            return {lane.name: {"capacity": lane.capacity, "used": round(lane.used, 2),
+                                "in_flight": lane.in_flight, "admitted": lane.admitted,
+                                "rejected": lane.rejected}
+                    for lane in (self.fast, self.main)}
@@ -4,6 +4,13 @@ import tempfile
 import time
 import re
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+from chunker import build_chunks
+from doc_scanner import scan_document
+from quick_questions import quick_questions_for
+from sentence_index import SentenceIndex
+from text_normalize import clean_text, normalize_text
 
 # Page configuration
 st.set_page_config(
@@ -19,36 +26,11 @@ st.markdown("### Upload a PDF or enter text to get intelligent summaries and ask
 
 def advanced_text_preprocessing(text):
     """Enhanced text preprocessing"""
-    text = re.sub(r'\s+', ' ', text.strip())
-    text = re.sub(r'[^\w\s\.\,\!\?\;\:\-\(\)]', ' ', text)
-    text = re.sub(r'(\w+)([A-Z])', r'\1. \2', text)
-    text = re.sub(r'\b\d+\s*$', '', text, flags=re.MULTILINE)
-    return text.strip()
+    return normalize_text(text, ocr_fixes=False)
 
 def intelligent_chunking(text, max_size=1500):
     """Smart text chunking with context preservation"""
-    text = advanced_text_preprocessing(text)
-    paragraphs = [p.strip() for p in text.split('\n\n') if len(p.strip()) > 20]
-    
-    chunks = []
-    current_chunk = ""
-    
-    for paragraph in paragraphs:
-        if len(current_chunk) + len(paragraph) > max_size and current_chunk:
-            chunks.append(current_chunk.strip())
-            sentences = current_chunk.split('.')
-            if len(sentences) > 2:
-                overlap = '. '.join(sentences[-2:]) + '. '
-                current_chunk = overlap + paragraph
-            else:
-                current_chunk = paragraph
-        else:
-            current_chunk = current_chunk + "\n\n" + paragraph if current_chunk else paragraph
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks if chunks else [text]
+    return build_chunks(advanced_text_preprocessing(text), max_size)
 
 def extract_text_from_pdf(pdf_file):
     """Extract text from uploaded PDF"""
@@ -88,12 +70,7 @@ def extract_text_from_pdf(pdf_file):
 
 def clean_resume_text(text):
     """Clean resume-specific text artifacts"""
-    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
-    text = re.sub(r'\s+', ' ', text.strip())
-    text = re.sub(r'(\w+)\s*[Ó•·]\s*(\d)', r'\1 \2', text)
-    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
-    text = re.sub(r'(\w)@(\w)', r'\1@\2', text)
-    return text.strip()
+    return clean_text(text, resume_fixes=False)
 
 def format_resume_summary(text, summary):
     """Format resume summary with structured information"""
@@ -114,13 +91,24 @@ def format_resume_summary(text, summary):
     
     return "\n".join(structured_summary)
 
-def create_comprehensive_summary(text, is_resume=False):
+# Keep the indexes of the most recently used documents only, so a long-running
+# server does not hold one per document ever uploaded
+@st.cache_resource(show_spinner=False, max_entries=8)
+def build_sentence_index(text):
+    """Build (once per document) the sentence index shared by summary and Q&A"""
+    return SentenceIndex(text)
+
+def create_comprehensive_summary(text, is_resume=False, scan=None, index=None):
     """Create comprehensive summary using advanced text processing"""
-    sentences = [s.strip() for s in text.split('.') if len(s.strip()) > 15]
+    if scan is None:
+        scan = scan_document(text)
+    if index is None:
+        index = build_sentence_index(text)
+    sentences = index.sentence_ids(min_length=15)
     
     # Create detailed summary
     if len(sentences) <= 8:
-        summary = '. '.join(sentences) + '.'
+        key_sentences = sentences
     else:
         # Take key sentences strategically
         key_sentences = []
@@ -133,28 +121,30 @@ def create_comprehensive_summary(text, is_resume=False):
         key_sentences.extend(middle_sentences[:3])  # Key middle content
         
         key_sentences.extend(sentences[-2:])  # Last 2 (conclusion)
-        summary = '. '.join(key_sentences) + '.'
+    summary = '. '.join(index.sentence(i) for i in key_sentences) + '.'
     
     # Add comprehensive analysis
-    word_count = len(text.split())
-    char_count = len(text)
+    word_count = scan.word_count
+    char_count = scan.char_count
     
     # Extract key information
     key_info = []
     
     # Find years/dates
-    years = re.findall(r'\b(19|20)\d{2}\b', text)
+    # (the timeline has always shown the century group captured by the
+    # original r'\b(19|20)\d{2}\b' regex)
+    years = [year[:2] for year in scan.years]
     if years:
         key_info.append(f"📅 Timeline: {min(years)} - {max(years)}")
     
     # Find percentages and numbers
-    percentages = re.findall(r'\b\d+\.?\d*%\b', text)
+    percentages = scan.percentages
     if percentages:
         key_info.append(f"📊 Key metrics: {', '.join(percentages[:3])}")
     
     # Find technologies (for resumes/tech docs)
     tech_keywords = ['Python', 'Java', 'JavaScript', 'React', 'Node.js', 'SQL', 'Machine Learning', 'AI', 'Data Science', 'HTML', 'CSS']
-    found_tech = [tech for tech in tech_keywords if tech.lower() in text.lower()]
+    found_tech = [tech for tech in tech_keywords if scan.contains(tech)]
     if found_tech:
         key_info.append(f"💻 Technologies: {', '.join(found_tech[:5])}")
     
@@ -168,15 +158,15 @@ def create_comprehensive_summary(text, is_resume=False):
     if is_resume:
         # Resume-specific analysis
         analysis += f"\n🎯 **Resume Analysis:**\n"
-        if 'email' in text.lower() or '@' in text:
+        if scan.contains('email') or scan.has_at_sign:
             analysis += "• ✅ Contains contact information\n"
-        if any(word in text.lower() for word in ['experience', 'work', 'job', 'company']):
+        if scan.contains_any(['experience', 'work', 'job', 'company']):
             analysis += "• ✅ Contains work experience\n"
-        if any(word in text.lower() for word in ['education', 'degree', 'university', 'college']):
+        if scan.contains_any(['education', 'degree', 'university', 'college']):
             analysis += "• ✅ Contains educational background\n"
-        if any(word in text.lower() for word in ['skill', 'technology', 'programming', 'software']):
+        if scan.contains_any(['skill', 'technology', 'programming', 'software']):
             analysis += "• ✅ Contains technical skills\n"
-        if any(word in text.lower() for word in ['project', 'developed', 'built', 'created']):
+        if scan.contains_any(['project', 'developed', 'built', 'created']):
             analysis += "• ✅ Contains project experience\n"
     
     # Add key information
@@ -185,24 +175,16 @@ def create_comprehensive_summary(text, is_resume=False):
     
     return summary + analysis
 
-def smart_text_qa(question, text):
+def smart_text_qa(question, text, index=None):
     """Advanced Q&A using intelligent text matching"""
     question_words = [word.lower() for word in question.split() if len(word) > 2]
-    sentences = [s.strip() for s in text.split('.') if len(s.strip()) > 10]
+    if index is None:
+        index = build_sentence_index(text)
     
-    # Score sentences based on relevance
-    scored_sentences = []
-    for sentence in sentences:
-        sentence_lower = sentence.lower()
-        
-        # Calculate relevance score
-        exact_matches = sum(2 for word in question_words if word in sentence_lower)
-        partial_matches = sum(1 for word in question_words if any(word in w for w in sentence_lower.split()))
-        
-        total_score = exact_matches + partial_matches
-        
-        if total_score > 0:
-            scored_sentences.append((sentence, total_score))
+    # Score sentences based on relevance: a question word found inside a
+    # sentence token counts as an exact (2) and a partial (1) match
+    scored_sentences = [(index.sentence(sid), score)
+                        for sid, score in index.score_sentences(question_words, min_length=10, weight=3)]
     
     if not scored_sentences:
         return "❌ I couldn't find specific information related to your question in the document. Try rephrasing your question or asking about different topics covered in the text."
@@ -226,16 +208,30 @@ def smart_text_qa(question, text):
     
     return answer
 
+@st.cache_resource(show_spinner=False)
+def quick_answer_pool():
+    """Background threads that answer the Quick Questions of processed documents"""
+    return ThreadPoolExecutor(max_workers=2)
+
+def answer_quick_questions(text, index, is_resume):
+    """Answers to every Quick Question of the document type, from the document's one index"""
+    return {question: smart_text_qa(question, text, index)
+            for _, question in quick_questions_for(is_resume)}
+
 def process_document(text, question=None):
     """Process document with comprehensive text analysis"""
-    is_resume = any(keyword in text.upper() for keyword in 
-                   ['EDUCATION', 'EXPERIENCE', 'SKILLS', 'PROJECTS', 'RESUME', 'CV'])
+    scan = scan_document(text)
+    is_resume = scan.contains_any_upper(['EDUCATION', 'EXPERIENCE', 'SKILLS', 'PROJECTS', 'RESUME', 'CV'])
     
     if is_resume:
         text = clean_resume_text(text)
+        scan = scan_document(text)
+    
+    # Sentence index shared by the summary and Q&A stages
+    index = build_sentence_index(text)
     
     # Create comprehensive summary
-    summary = create_comprehensive_summary(text, is_resume)
+    summary = create_comprehensive_summary(text, is_resume, scan, index)
     
     if is_resume:
         summary = format_resume_summary(text, summary)
@@ -244,12 +240,15 @@ def process_document(text, question=None):
     result = {
         "summary": summary,
         "chunks": len(intelligent_chunking(text)),
-        "doc_type": "Resume/CV" if is_resume else "General Document"
+        "doc_type": "Resume/CV" if is_resume else "General Document",
+        "is_resume": is_resume,
+        # Finishes in the background while the summary is displayed
+        "quick_answers": quick_answer_pool().submit(answer_quick_questions, text, index, is_resume),
     }
     
     # Handle Q&A if question provided
     if question and question.strip():
-        answer = smart_text_qa(question, text)
+        answer = smart_text_qa(question, text, index)
         result["answer"] = answer
         result["confidence"] = 0.85  # High confidence for advanced text matching
     
@@ -274,14 +273,14 @@ with col1:
 
 with col2:
     st.subheader("🚀 Quick Questions")
-    if st.button("📚 What are the main skills?"):
-        question_input = "What are the main skills mentioned?"
-    if st.button("💼 Work experience?"):
-        question_input = "What work experience is mentioned?"
-    if st.button("🎓 Educational background?"):
-        question_input = "What is the educational background?"
-    if st.button("🔧 Technical projects?"):
-        question_input = "What technical projects are described?"
+    processed = st.session_state.get("result")
+    # Before the first document, show the resume questions (the original buttons)
+    for i, (label, question) in enumerate(quick_questions_for(processed["is_resume"] if processed else True)):
+        if st.button(label, key=f"quick-{i}"):
+            if processed:
+                st.session_state["quick_question"] = question
+            else:
+                question_input = question
 
 # Process button
 if st.button("🔄 Process Document", type="primary"):
@@ -297,27 +296,41 @@ if st.button("🔄 Process Document", type="primary"):
                 
                 # Process the document
                 result = process_document(document_text, question_input if question_input.strip() else None)
-                
-                # Display results
-                st.subheader("📋 Comprehensive Summary")
-                st.markdown(result["summary"])
-                
-                if "answer" in result:
-                    st.subheader("❓ Q&A Answer")
-                    st.markdown(result["answer"])
-                
-                # Stats
-                with st.expander("📊 Processing Statistics"):
-                    st.write(f"**Document Type:** {result['doc_type']}")
-                    st.write(f"**Text Chunks:** {result['chunks']}")
-                    st.write(f"**Text Length:** {len(document_text)} characters")
-                    st.write(f"**Processing Method:** Advanced Text Analysis")
+                result["text_length"] = len(document_text)
+                # Kept across reruns so the Quick Question buttons can answer from it
+                st.session_state["result"] = result
+                st.session_state.pop("quick_question", None)
                 
             except Exception as e:
                 st.error(f"❌ Error processing document: {str(e)}")
     else:
         st.warning("⚠️ Please upload a PDF file or enter some text!")
 
+if st.session_state.get("result"):
+    result = st.session_state["result"]
+    
+    # Display results
+    st.subheader("📋 Comprehensive Summary")
+    st.markdown(result["summary"])
+    
+    if "answer" in result:
+        st.subheader("❓ Q&A Answer")
+        st.markdown(result["answer"])
+    
+    quick_question = st.session_state.get("quick_question")
+    if quick_question:
+        st.subheader(f"⚡ {quick_question}")
+        with st.spinner("Finishing the precomputed answers..."):
+            quick_answers = result["quick_answers"].result()
+        st.markdown(quick_answers.get(quick_question, "❌ No precomputed answer for this question."))
+    
+    # Stats
+    with st.expander("📊 Processing Statistics"):
+        st.write(f"**Document Type:** {result['doc_type']}")
+        st.write(f"**Text Chunks:** {result['chunks']}")
+        st.write(f"**Text Length:** {result['text_length']} characters")
+        st.write(f"**Processing Method:** Advanced Text Analysis")
+
 # Footer
 st.markdown("---")
 st.markdown("### 🚀 Cloud-Optimized Text Processing")
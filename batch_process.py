@@ -0,0 +1,311 @@
+"""Offline bulk summarization of a directory or JSONL manifest of documents
+
+Runs working_flask_app's pipeline without the web UI:
+
+    extract (process pool) -> clean/chunk/index -> batched summarization -> Q&A
+
+The stages run as a pipeline (staged_executor.py) connected by bounded
+queues: PDF and text files are read by a pool of worker processes while
+the main process, which holds the models, prepares finished documents and
+sends single-chunk documents to the summarizer in batches, so document N+1
+is parsed while document N is summarized. Results are appended to a JSONL
+file, one line per document, and a stage utilization table at the end
+shows which stage needs more (or fewer) workers.
+
+The output file doubles as the checkpoint: documents whose content hash
+already has an "ok" line are skipped, so an interrupted run can simply be
+started again.
+
+Manifest format (one JSON object per line; paths relative to the manifest):
+    {"id": "doc-1", "path": "reports/q3.pdf", "questions": ["What are the main findings?"]}
+    {"id": "doc-2", "text": "Pasted text...", "question": "Who is the author?"}
+
+Usage:
+    python batch_process.py documents/ --output results.jsonl
+    python batch_process.py manifest.jsonl --workers 4 --batch-size 8
+    python batch_process.py documents/ --question "What skills does the candidate have?"
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from deadline import CallEstimates, Deadline
+from decoding import DECODING_PROFILES, fits_summary
+from pdf_text import extract_pdf_text
+from staged_executor import Stage, StagedExecutor, StageError, print_utilization
+
+DOCUMENT_EXTENSIONS = ('.pdf', '.txt')
+
+
+def content_hash(data):
+    """Hash of a document's bytes, used to skip documents that are already done"""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def load_jobs(source, questions=()):
+    """Jobs from a directory (every PDF/TXT file below it) or a JSONL manifest"""
+    jobs = []
+    if os.path.isdir(source):
+        for directory, _, filenames in sorted(os.walk(source)):
+            for filename in sorted(filenames):
+                if filename.lower().endswith(DOCUMENT_EXTENSIONS):
+                    path = os.path.join(directory, filename)
+                    jobs.append({"id": os.path.relpath(path, source), "path": path, "questions": list(questions)})
+        return jobs
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            job_questions = entry.get("questions") or ([entry["question"]] if entry.get("question") else [])
+            job = {"id": str(entry.get("id", line_number)), "questions": job_questions + list(questions)}
+            if "text" in entry:
+                job["text"] = entry["text"]
+            else:
+                job["path"] = os.path.join(base, entry["path"])
+            jobs.append(job)
+    return jobs
+
+
+def job_hash(job):
+    if "text" in job:
+        return content_hash(job["text"].encode('utf-8'))
+    with open(job["path"], 'rb') as f:
+        return content_hash(f.read())
+
+
+def extract_job(job):
+    """Worker process: raw text of one document (no models are loaded here)"""
+    start = time.perf_counter()
+    stats = {"pages": None}
+    try:
+        if "text" in job:
+            raw_text = job["text"]
+        elif job["path"].lower().endswith('.pdf'):
+            raw_text = extract_pdf_text(job["path"], stats)
+        else:
+            with open(job["path"], encoding='utf-8', errors='replace') as f:
+                raw_text = f.read()
+        error = None
+    except Exception as e:
+        raw_text, error = "", f"{type(e).__name__}: {e}"
+    return job, raw_text, stats["pages"], time.perf_counter() - start, error
+
+
+def completed_hashes(output):
+    """Hashes of the documents that already have a successful result line"""
+    done = set()
+    if os.path.exists(output):
+        with open(output, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("status") == "ok":
+                    done.add(record.get("doc_hash"))
+    return done
+
+
+class BatchSummarizer:
+    """Prepares extracted documents and summarizes them in batches with the app's models"""
+
+    def __init__(self, app, decoding_profile=None):
+        self.app = app
+        self.decoding_profile = decoding_profile
+        # No latency budget offline, and batch timings stay out of the web app's call estimates
+        self.deadline = Deadline(estimates=CallEstimates())
+        # Lowest priority when the app's inference scheduler is shared
+        self.models = app.scheduled_models(app.active_models(), batch=True, deadline=self.deadline)
+
+    def prepare(self, extracted):
+        """Pipeline stage: clean, chunk and index one extracted document"""
+        job, raw_text, pages, extract_time, error = extracted
+        start = time.perf_counter()
+        prepared = self.app.prepare_document(raw_text)
+        return {"job": job, "prepared": prepared, "pages": pages, "error": error,
+                "timings": {"extract": extract_time, "prepare": time.perf_counter() - start}}
+
+    def summarize(self, items):
+        """Pipeline stage: summarize (and answer questions for) a batch of documents; returns one record each"""
+        ready = [item for item in items if item["prepared"]["chunks"]]
+        model_summaries = self._batched_summaries(ready)
+
+        records = []
+        for item in items:
+            prepared = item["prepared"]
+            if not prepared["chunks"]:
+                records.append(self._record(item, status="error",
+                                            error=item["error"] or "No text could be extracted"))
+                continue
+            start = time.perf_counter()
+            summary = self.app.summarize_document(prepared, model_summaries.get(id(item)), self.deadline,
+                                                  models=self.models, decoding_profile=self.decoding_profile)
+            # The batched model call is shared by the batch, so split it evenly
+            item["timings"]["summarize"] = time.perf_counter() - start + item.pop("batch_share", 0.0)
+
+            start = time.perf_counter()
+            answers = []
+            for question in item["job"]["questions"]:
+                fields = self.app.answer_question(question, summary, prepared["text"], prepared["is_resume"],
+                                                  self.deadline, self.models)
+                answers.append({"question": question, "answer": fields["QnA Answer"],
+                                "confidence": fields["Confidence Score"]})
+            item["timings"]["qa"] = time.perf_counter() - start
+            records.append(self._record(item, status="ok", summary=summary, answers=answers))
+        return records
+
+    def _batched_summaries(self, items):
+        """One summarizer call per group of single-chunk documents with the same generation arguments
+        
+        Length limits follow the input's token count in coarse steps (see
+        decoding.py), so documents of similar size share a call. Documents
+        short enough to be their own summary are left to summarize_document(),
+        which skips the model for them.
+        """
+        profile = self.decoding_profile or self.app.DECODING_PROFILE
+        groups = {}
+        for item in items:
+            prepared = item["prepared"]
+            if len(prepared["chunks"]) != 1:
+                continue
+            text = prepared["chunks"][0].text()
+            input_tokens = self.app.count_input_tokens(text)
+            # summarize_document() reuses the count, as for warmed-up uploads
+            prepared["token_counts"] = [input_tokens]
+            if fits_summary(input_tokens, "single", prepared["is_resume"], profile):
+                continue
+            kwargs = self.app.summary_kwargs(text, "single", prepared["is_resume"], profile, input_tokens)
+            groups.setdefault(tuple(sorted(kwargs.items())), []).append(item)
+        
+        summaries = {}
+        for key, group in groups.items():
+            start = time.perf_counter()
+            try:
+                outputs = self.models["summarizer"]([item["prepared"]["chunks"][0].text() for item in group],
+                                                    **dict(key))
+            except Exception as e:
+                # summarize_document() retries these one by one, with its own fallback
+                print(f"Batch summarization error: {e}")
+                continue
+            share = (time.perf_counter() - start) / len(group)
+            for item, output in zip(group, outputs):
+                summaries[id(item)] = output['summary_text']
+                item["batch_share"] = share
+        return summaries
+
+    def _record(self, item, status, **fields):
+        prepared = item["prepared"]
+        record = {
+            "id": item["job"]["id"],
+            "source": item["job"].get("path", "inline"),
+            "doc_hash": item["job"]["doc_hash"],
+            "status": status,
+            "document_type": "resume" if prepared["is_resume"] else "general",
+            "pages": item["pages"],
+            "chars": len(prepared["text"]),
+            "chunks": len(prepared["chunks"]),
+            "timings": {stage: round(seconds, 4) for stage, seconds in item["timings"].items()},
+        }
+        record.update(fields)
+        return record
+
+
+def failure_record(failure):
+    """Result line for a document whose pipeline stage raised"""
+    job = {"extract": lambda item: item, "prepare": lambda item: item[0],
+           "summarize": lambda item: item["job"]}[failure.stage](failure.item)
+    return {"id": job["id"], "source": job.get("path", "inline"), "doc_hash": job["doc_hash"],
+            "status": "error", "error": f"{failure.stage}: {type(failure.error).__name__}: {failure.error}"}
+
+
+class Progress:
+    def __init__(self, total, every=5.0):
+        self.total = total
+        self.every = every
+        self.done = self.errors = self.pages = 0
+        self.started = self._last_print = time.perf_counter()
+
+    def update(self, records, force=False):
+        for record in records:
+            self.done += 1
+            self.errors += record["status"] != "ok"
+            self.pages += record["pages"] or 0
+        now = time.perf_counter()
+        if force or now - self._last_print >= self.every:
+            self._last_print = now
+            elapsed = now - self.started
+            rate = self.done / elapsed if elapsed else 0.0
+            eta = (self.total - self.done) / rate if rate else float('inf')
+            print(f"📄 {self.done}/{self.total} documents ({self.errors} errors) | "
+                  f"{rate:.2f} docs/s | {self.pages / elapsed if elapsed else 0:.1f} pages/s | ETA {eta:.0f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', help="directory of PDF/TXT files or a JSONL manifest")
+    parser.add_argument('--output', default='batch_results.jsonl', help="JSONL results (and checkpoint)")
+    parser.add_argument('--question', action='append', default=[], help="ask every document this (repeatable)")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="extraction processes")
+    parser.add_argument('--batch-size', type=int, default=8, help="documents per summarizer call")
+    parser.add_argument('--queue-size', type=int,
+                        help="documents waiting between two stages (default: twice --workers)")
+    parser.add_argument('--decoding', choices=list(DECODING_PROFILES),
+                        help="summarizer decoding profile (default: DECODING_PROFILE or model)")
+    parser.add_argument('--backend', help="MODEL_BACKEND for the models (default: the environment's)")
+    parser.add_argument('--progress-every', type=float, default=5.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.source, args.question)
+    done = completed_hashes(args.output)
+    todo = []
+    for job in jobs:
+        job["doc_hash"] = job_hash(job)
+        if job["doc_hash"] not in done:
+            todo.append(job)
+    print(f"🗂️ {len(jobs)} documents, {len(jobs) - len(todo)} already done, {len(todo)} to process")
+    if not todo:
+        return 0
+
+    if args.backend:
+        os.environ['MODEL_BACKEND'] = args.backend
+    import working_flask_app as app
+    if not app.models_loaded:
+        print("❌ Models failed to load")
+        return 1
+
+    batcher = BatchSummarizer(app, args.decoding)
+    progress = Progress(len(todo), args.progress_every)
+    queue_size = args.queue_size or args.workers * 2
+    with open(args.output, 'a', encoding='utf-8') as output, \
+            ProcessPoolExecutor(max_workers=args.workers) as pool:
+        def write(record):
+            if isinstance(record, StageError):
+                record = failure_record(record)
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+            progress.update([record])
+
+        # Bounded queues between the stages keep at most queue_size documents
+        # waiting anywhere, so memory stays flat however big the input is
+        executor = StagedExecutor([
+            Stage("extract", extract_job, workers=args.workers, queue_size=queue_size, pool=pool),
+            Stage("prepare", batcher.prepare, queue_size=queue_size),
+            Stage("summarize", batcher.summarize, queue_size=max(queue_size, args.batch_size),
+                  batch_size=args.batch_size),
+        ])
+        report = executor.run(todo, write)
+    progress.update([], force=True)
+    print_utilization(report, executor.wall_time)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""Compare two benchmark result files and fail on regressions
+
+Works on the JSON written by bench_pipeline.py (stage micro-benchmarks of
+the Flask and cloud pipeline functions) and by load_test.py (HTTP load
+tests). For every metric it prints the relative change from the baseline
+with a bootstrap confidence interval, and exits with status 1 if any metric
+got worse by more than its threshold *and* the interval excludes zero. In
+load tests a latency also has to grow by at least --min-delta-ms (default
+10 ms), since a few milliseconds of end-to-end time can be a large
+percentage and still be noise. Stage micro-benchmarks have no such floor
+by default: most stages take under 10 ms, and their repeated timings are
+what catches a slower stage.
+
+Usage:
+    python bench_compare.py bench_results/base.json bench_results/new.json
+    python bench_compare.py base.json new.json --threshold p99=0.25 --threshold error_rate=0.02
+    python bench_compare.py base.json new.json --min-delta-ms 25
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+
+from perf_metrics import percentile
+
+# Relative slowdown allowed before a metric counts as a regression; for
+# error_rate it is the allowed absolute increase
+DEFAULT_THRESHOLDS = {
+    "median_s": 0.10,
+    "p50": 0.10,
+    "p90": 0.15,
+    "p99": 0.25,
+    "throughput_rps": 0.10,
+    "error_rate": 0.01,
+}
+
+# Metrics where a bigger number is better
+HIGHER_IS_BETTER = {"throughput_rps"}
+
+# Latency metrics (seconds), and per report kind the absolute increase
+# they need before a relative slowdown counts
+TIME_METRICS = {"median_s", "p50", "p90", "p99"}
+MIN_DELTA_S = {"stage-benchmark": 0.0, "load-test": 0.010}
+
+
+def bootstrap_change(baseline, current, statistic, resamples=1000, confidence=0.95, seed=0):
+    """Relative change of ``statistic`` from baseline to current samples, with a bootstrap CI"""
+    base_value, current_value = statistic(baseline), statistic(current)
+    if not base_value:
+        return None, (None, None)
+    change = current_value / base_value - 1
+    rng = random.Random(seed)
+    changes = []
+    for _ in range(resamples):
+        base_sample = statistic(rng.choices(baseline, k=len(baseline)))
+        current_sample = statistic(rng.choices(current, k=len(current)))
+        if base_sample:
+            changes.append(current_sample / base_sample - 1)
+    tail = (1 - confidence) / 2 * 100
+    return change, (percentile(changes, tail), percentile(changes, 100 - tail))
+
+
+def _stage_metrics(report):
+    """(group, name, metric) -> samples for a bench_pipeline.py report"""
+    metrics = {}
+    for result in report["results"]:
+        group = result["stage"].split('.')[0]
+        name = f"{result['stage']} @ {result['pages']}p"
+        metrics[(group, name, "median_s")] = result["samples"]
+    return metrics
+
+
+def _load_metrics(report):
+    """(group, name, metric) -> samples, or a number for point metrics, for a load_test.py report"""
+    ok = [r for r in report["requests"] if not r["error"]]
+    latencies = [r["latency"] for r in ok]
+    metrics = {
+        ("load", "requests", "throughput_rps"): report["summary"]["throughput_rps"],
+        ("load", "requests", "error_rate"): report["summary"]["error_rate"],
+    }
+    for metric in ("p50", "p90", "p99"):
+        metrics[("load", "latency", metric)] = latencies
+    stages = dict.fromkeys(stage for r in ok for stage in r["stages"])
+    for stage in stages:
+        samples = [r["stages"][stage] for r in ok if stage in r["stages"]]
+        for metric in ("p50", "p90"):
+            metrics[("load", f"stage {stage}", metric)] = samples
+    return metrics
+
+
+def extract_metrics(report):
+    kind = report.get("kind")
+    if kind == "stage-benchmark":
+        return _stage_metrics(report)
+    if kind == "load-test":
+        return _load_metrics(report)
+    raise ValueError(f"Unknown benchmark file kind: {kind!r}")
+
+
+def _statistic(metric):
+    if metric == "median_s":
+        return statistics.median
+    pct = int(metric[1:])
+    return lambda values: percentile(values, pct)
+
+
+def compare(baseline, current, thresholds, resamples=1000, confidence=0.95, min_delta_s=None):
+    """One row per metric present in both reports
+
+    A latency metric is only a regression if it also grew by at least
+    ``min_delta_s`` seconds (default: MIN_DELTA_S for the report kind).
+    """
+    if min_delta_s is None:
+        min_delta_s = MIN_DELTA_S.get(baseline.get("kind"), 0.0)
+    base_metrics, current_metrics = extract_metrics(baseline), extract_metrics(current)
+    rows = []
+    for key in base_metrics:
+        if key not in current_metrics:
+            continue
+        group, name, metric = key
+        base, new = base_metrics[key], current_metrics[key]
+        threshold = thresholds.get(metric, DEFAULT_THRESHOLDS.get(metric, 0.10))
+        row = {"group": group, "name": name, "metric": metric, "threshold": threshold}
+
+        if metric == "error_rate":
+            # Absolute change: a rate going from 0 to anything has no ratio
+            row.update(baseline=base, current=new, change=new - base, ci=(None, None),
+                       regression=new - base > threshold)
+        elif isinstance(base, list):
+            if not base or not new:
+                continue
+            statistic = _statistic(metric)
+            change, ci = bootstrap_change(base, new, statistic, resamples, confidence)
+            base_value, new_value = statistic(base), statistic(new)
+            big_enough = metric not in TIME_METRICS or new_value - base_value >= min_delta_s
+            row.update(baseline=base_value, current=new_value, change=change, ci=ci,
+                       regression=change is not None and change > threshold
+                       and ci[0] is not None and ci[0] > 0 and big_enough)
+        else:
+            change = new / base - 1 if base else None
+            worse = change is not None and (-change if metric in HIGHER_IS_BETTER else change) > threshold
+            row.update(baseline=base, current=new, change=change, ci=(None, None), regression=worse)
+        rows.append(row)
+    return rows
+
+
+def comparison_warnings(baseline, current):
+    """Things that make the two reports not directly comparable
+
+    Stage benchmarks should cover both pipelines (flask and cloud); load
+    tests should have been run with the same workload settings.
+    """
+    warnings = []
+    if baseline.get("kind") == "stage-benchmark":
+        for label, report in (("baseline", baseline), ("current", current)):
+            groups = {result["stage"].split('.')[0] for result in report["results"]}
+            for group in ("flask", "cloud"):
+                if group not in groups:
+                    warnings.append(f"{label} has no {group} pipeline stages")
+    else:
+        for key in ("concurrency", "rate", "mix", "pages", "questions", "backend"):
+            before, after = baseline["config"].get(key), current["config"].get(key)
+            if before != after:
+                warnings.append(f"load test {key} differs: {before} -> {after}")
+    return warnings
+
+
+def _format_change(row):
+    if row["change"] is None:
+        return "n/a"
+    if row["metric"] == "error_rate":
+        return f"{row['change'] * 100:+.2f}pp"
+    low, high = row["ci"]
+    interval = f" [{low * 100:+.1f}%, {high * 100:+.1f}%]" if low is not None else ""
+    return f"{row['change'] * 100:+.1f}%{interval}"
+
+
+def print_rows(rows):
+    """Print the rows under one header per group, groups in order of first appearance"""
+    groups = list(dict.fromkeys(row["group"] for row in rows))
+    current_group = None
+    for row in sorted(rows, key=lambda row: groups.index(row["group"])):
+        if row["group"] != current_group:
+            current_group = row["group"]
+            print(f"\n== {current_group} ==")
+        status = "❌ REGRESSION" if row["regression"] else "✅"
+        print(f"{row['name']:<48} {row['metric']:<15} {row['baseline']:>10.4f} -> {row['current']:>10.4f}"
+              f"  {_format_change(row):<28} {status}")
+
+
+def parse_threshold(value):
+    metric, _, limit = value.partition('=')
+    try:
+        return metric, float(limit)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected METRIC=VALUE, got {value!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline', help="benchmark JSON to compare against")
+    parser.add_argument('current', help="benchmark JSON of the change under test")
+    parser.add_argument('--threshold', type=parse_threshold, action='append', default=[],
+                        help="allowed relative change per metric, e.g. p99=0.25 (repeatable)")
+    parser.add_argument('--min-delta-ms', type=float,
+                        help="smallest latency increase (ms) that can count as a regression "
+                             "(default: 10 for load tests, 0 for stage benchmarks)")
+    parser.add_argument('--resamples', type=int, default=1000, help="bootstrap resamples")
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--output', help="also write the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+    if baseline.get("kind") != current.get("kind"):
+        parser.error(f"cannot compare a {baseline.get('kind')} file with a {current.get('kind')} file")
+
+    min_delta_s = args.min_delta_ms / 1000 if args.min_delta_ms is not None else None
+    rows = compare(baseline, current, dict(args.threshold), args.resamples, args.confidence, min_delta_s)
+    print_rows(rows)
+    for warning in comparison_warnings(baseline, current):
+        print(f"⚠️ {warning}")
+
+    regressions = [row for row in rows if row["regression"]]
+    print(f"\n{len(rows)} metrics compared, {len(regressions)} regressions")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"baseline": args.baseline, "current": args.current, "rows": rows}, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Decode steps and latency of the summarizer per decoding profile and input size
+
+Summarizes synthetic documents cut to a range of token counts with each
+profile in decoding.py, plus the fixed limits every input used to get
+("fixed": max_length=400, min_length=200, the model's own search
+settings). Reports the decode steps (summary tokens), the decoder passes
+(steps x beams) and the call latency.
+
+Usage:
+    python bench_decoding.py                              # large tier, fp32
+    python bench_decoding.py --tier distil --tokens 128 512 --repeat 5
+    python bench_decoding.py --backend stub               # check the harness offline
+"""
+import argparse
+import json
+import os
+import time
+
+from decoding import DECODING_PROFILES, count_tokens, generation_kwargs
+from model_tiers import BACKENDS, MODEL_TIERS, load_pipeline
+from perf_metrics import latency_summary
+from synthetic_docs import make_text
+
+# What process_input() passed for a single-chunk general document before decoding profiles
+FIXED_KWARGS = {"max_length": 400, "min_length": 200, "do_sample": False}
+
+
+def token_counter(summarizer):
+    tokenizer = getattr(summarizer, 'tokenizer', None)
+    if tokenizer is None:
+        return count_tokens
+    return lambda text: len(tokenizer(text, truncation=False)["input_ids"])
+
+
+def default_beams(summarizer):
+    """num_beams the model searches with when none is passed (1 for the stub models)"""
+    config = getattr(getattr(summarizer, 'model', None), 'config', None)
+    return getattr(config, 'num_beams', None) or 1
+
+
+def make_input(tokens, count, seed=0):
+    """Synthetic document text of about ``tokens`` tokens"""
+    words = make_text(max(1, tokens // 300 + 1), seed).split()
+    size = tokens
+    # Word and token counts differ; shrink until the tokenizer agrees
+    while size > 1 and count(' '.join(words[:size])) > tokens:
+        size = int(size * 0.9)
+    return ' '.join(words[:size])
+
+
+def bench(summarizer, profile, text, input_tokens, count, repeat):
+    kwargs = dict(FIXED_KWARGS) if profile == "fixed" else generation_kwargs(input_tokens, "single", False, profile)
+    beams = kwargs.get("num_beams") or default_beams(summarizer)
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        summary = summarizer(text, **kwargs)[0]['summary_text']
+        latencies.append(time.perf_counter() - start)
+    steps = count(summary)
+    return {
+        "profile": profile,
+        "input_tokens": input_tokens,
+        "max_length": kwargs["max_length"],
+        "min_length": kwargs["min_length"],
+        "num_beams": beams,
+        "decode_steps": steps,
+        "decoder_passes": steps * beams,
+        "latency_s": latency_summary(latencies),
+    }
+
+
+def print_table(results):
+    print(f"\n{'Profile':<10} {'Input':>6} {'Max':>5} {'Min':>5} {'Beams':>5} {'Steps':>6} {'Passes':>7} "
+          f"{'p50':>9} {'max':>9}")
+    for result in results:
+        latency = result["latency_s"]
+        print(f"{result['profile']:<10} {result['input_tokens']:>6} {result['max_length']:>5} "
+              f"{result['min_length']:>5} {result['num_beams']:>5} {result['decode_steps']:>6} "
+              f"{result['decoder_passes']:>7} {latency['p50']:>8.3f}s {latency['max']:>8.3f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tier', default='large', choices=list(MODEL_TIERS))
+    parser.add_argument('--backend', default='fp32', choices=BACKENDS)
+    parser.add_argument('--profiles', nargs='+', default=['fixed'] + list(DECODING_PROFILES),
+                        choices=['fixed'] + list(DECODING_PROFILES))
+    parser.add_argument('--tokens', nargs='+', type=int, default=[64, 256, 512, 1024],
+                        help="input sizes in summarizer tokens")
+    parser.add_argument('--repeat', type=int, default=3, help="calls per profile and size")
+    parser.add_argument('--output', default=os.path.join(
+        'bench_results', f"decoding_{time.strftime('%Y%m%d-%H%M%S')}.json"))
+    args = parser.parse_args(argv)
+
+    print(f"🔬 Loading the {args.tier} summarizer ({args.backend})...")
+    summarizer = load_pipeline("summarization", args.tier, args.backend)
+    count = token_counter(summarizer)
+
+    results = []
+    for tokens in args.tokens:
+        text = make_input(tokens, count)
+        input_tokens = count(text)
+        # Warm-up call, so the first profile does not pay for lazy initialization
+        summarizer(text, **generation_kwargs(input_tokens, "single", False, "fast"))
+        for profile in args.profiles:
+            results.append(bench(summarizer, profile, text, input_tokens, count, args.repeat))
+    print_table(results)
+
+    report = {
+        "kind": "decoding-bench",
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "tier": args.tier,
+        "backend": args.backend,
+        "results": results,
+    }
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""Stage-level micro-benchmarks for the document processing pipeline
+
+Times each text/PDF stage of the Flask (model-backed) and Streamlit (cloud)
+apps on deterministic synthetic documents of increasing size, and saves the
+raw samples to JSON so runs can be compared with bench_compare.py.
+
+The stage functions are loaded straight from the app scripts without running
+their module-level code, so no models are downloaded and no UI is started.
+
+Usage:
+    python bench_pipeline.py                          # 1, 10, 100, 1000 pages
+    python bench_pipeline.py --pages 1 10 --stages cloud.smart_text_qa
+    python bench_pipeline.py --output bench_results/baseline.json
+"""
+import argparse
+import ast
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic_docs import make_pdf, make_text
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose import starts a UI, loads models or is only needed by routes
+SKIPPED_MODULES = {'streamlit', 'transformers', 'flask', 'werkzeug'}
+
+QUESTION = "What machine learning projects did the team build?"
+
+
+def _read_source(path):
+    data = open(path, 'rb').read()
+    # flask_app.py is saved as UTF-16
+    if data.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return data.decode('utf-16')
+    return data.decode('utf-8')
+
+
+def _imported_modules(node):
+    if isinstance(node, ast.Import):
+        return [alias.name for alias in node.names]
+    return [node.module or '']
+
+
+def _is_route(decorator):
+    target = decorator.func if isinstance(decorator, ast.Call) else decorator
+    while isinstance(target, ast.Attribute):
+        target = target.value
+    return isinstance(target, ast.Name) and target.id == 'app'
+
+
+def load_app_functions(filename):
+    """Return the functions defined in an app script, without running the script
+
+    Keeps the script's imports (except UI/model/web modules), its literal
+    constants and its function definitions. Decorators such as
+    st.cache_resource are dropped and Flask routes are skipped.
+    """
+    path = os.path.join(ROOT, filename)
+    tree = ast.parse(_read_source(path), filename=path)
+    body = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            if not any(module.split('.')[0] in SKIPPED_MODULES for module in _imported_modules(node)):
+                body.append(node)
+        elif isinstance(node, ast.Assign) and all(isinstance(target, ast.Name) for target in node.targets):
+            try:
+                ast.literal_eval(node.value)
+            except ValueError:
+                continue
+            body.append(node)
+        elif isinstance(node, ast.FunctionDef):
+            if any(_is_route(decorator) for decorator in node.decorator_list):
+                continue
+            node.decorator_list = []
+            body.append(node)
+
+    namespace = {'__name__': f"bench_{os.path.splitext(filename)[0]}", '__file__': path}
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, 'exec'), namespace)
+    return namespace
+
+
+class Document:
+    """One synthetic document and the inputs each stage needs, prepared up front"""
+
+    def __init__(self, pages, resume=True, seed=0):
+        self.pages = pages
+        self.raw_text = make_text(pages, seed=seed, resume=resume)
+        self.pdf_bytes = make_pdf(pages, seed=seed, resume=resume)
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+            tmp_file.write(self.pdf_bytes)
+            self.pdf_path = tmp_file.name
+
+    def close(self):
+        if os.path.exists(self.pdf_path):
+            os.unlink(self.pdf_path)
+
+
+def build_stages(flask, cloud, legacy):
+    """Map stage name -> (setup(doc) -> input, run(input), input size in bytes)
+
+    ``flask`` is working_flask_app.py, ``cloud`` is app.py and ``legacy`` is
+    flask_app.py, which is where find_best_context() lives.
+    """
+    def text_of(fns):
+        return lambda doc: fns['clean_resume_text'](doc.raw_text)
+
+    return {
+        'flask.extract_text_from_pdf': (
+            lambda doc: doc.pdf_path,
+            flask['extract_text_from_pdf'],
+            lambda doc: len(doc.pdf_bytes)),
+        'cloud.extract_text_from_pdf': (
+            lambda doc: doc.pdf_bytes,
+            lambda data: cloud['extract_text_from_pdf'](io.BytesIO(data)),
+            lambda doc: len(doc.pdf_bytes)),
+        'flask.clean_resume_text': (
+            lambda doc: doc.raw_text,
+            flask['clean_resume_text'],
+            lambda doc: len(doc.raw_text.encode('utf-8'))),
+        'cloud.clean_resume_text': (
+            lambda doc: doc.raw_text,
+            cloud['clean_resume_text'],
+            lambda doc: len(doc.raw_text.encode('utf-8'))),
+        'flask.advanced_text_preprocessing': (
+            text_of(flask),
+            flask['advanced_text_preprocessing'],
+            lambda doc: len(doc.raw_text.encode('utf-8'))),
+        'cloud.advanced_text_preprocessing': (
+            text_of(cloud),
+            cloud['advanced_text_preprocessing'],
+            lambda doc: len(doc.raw_text.encode('utf-8'))),
+        'flask.intelligent_chunking': (
+            text_of(flask),
+            flask['intelligent_chunking'],
+            lambda doc: len(doc.raw_text.encode('utf-8'))),
+        'cloud.intelligent_chunking': (
+            text_of(cloud),
+            cloud['intelligent_chunking'],
+            lambda doc: len(doc.raw_text.encode('utf-8'))),
+        'flask.find_best_context': (
+            lambda doc: legacy['intelligent_chunking'](legacy['clean_resume_text'](doc.raw_text)),
+            lambda chunks: legacy['find_best_context'](chunks, QUESTION, max_context_length=3000),
+            lambda doc: len(doc.raw_text.encode('utf-8'))),
+        'cloud.smart_text_qa': (
+            text_of(cloud),
+            lambda text: cloud['smart_text_qa'](QUESTION, text),
+            lambda doc: len(doc.raw_text.encode('utf-8'))),
+        'cloud.create_comprehensive_summary': (
+            text_of(cloud),
+            lambda text: cloud['create_comprehensive_summary'](text, True),
+            lambda doc: len(doc.raw_text.encode('utf-8'))),
+    }
+
+
+def time_stage(run, stage_input, min_repeat=3, max_repeat=50, min_time=0.5):
+    """Run a stage until it has ``min_repeat`` samples and ``min_time`` seconds of them"""
+    samples = []
+    while len(samples) < max_repeat and (len(samples) < min_repeat or sum(samples) < min_time):
+        start = time.perf_counter()
+        run(stage_input)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(page_counts, stage_names=None, min_repeat=3, min_time=0.5):
+    flask = load_app_functions('working_flask_app.py')
+    cloud = load_app_functions('app.py')
+    legacy = load_app_functions('flask_app.py')
+    stages = build_stages(flask, cloud, legacy)
+    if stage_names:
+        unknown = set(stage_names) - set(stages)
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+        stages = {name: stages[name] for name in stage_names}
+
+    results = []
+    print(f"{'Stage':<36} {'Pages':>6} {'Median (s)':>11} {'Pages/s':>10} {'MB/s':>8}")
+    for pages in page_counts:
+        doc = Document(pages)
+        try:
+            for name, (setup, run, size) in stages.items():
+                samples = time_stage(run, setup(doc), min_repeat=min_repeat, min_time=min_time)
+                median = statistics.median(samples)
+                input_bytes = size(doc)
+                result = {
+                    "stage": name,
+                    "pages": pages,
+                    "input_bytes": input_bytes,
+                    "samples": samples,
+                    "median_s": median,
+                    "min_s": min(samples),
+                    "pages_per_s": pages / median if median else None,
+                    "mb_per_s": input_bytes / 1e6 / median if median else None,
+                }
+                results.append(result)
+                print(f"{name:<36} {pages:>6} {median:>11.4f} {result['pages_per_s']:>10.1f} {result['mb_per_s']:>8.2f}")
+        finally:
+            doc.close()
+
+    return {
+        "kind": "stage-benchmark",
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def save_results(report, output):
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help="document sizes to benchmark, in pages")
+    parser.add_argument('--stages', nargs='+', help="only run these stages (e.g. cloud.smart_text_qa)")
+    parser.add_argument('--repeat', type=int, default=3, help="minimum samples per stage and size")
+    parser.add_argument('--min-time', type=float, default=0.5,
+                        help="keep sampling a stage until this many seconds were measured")
+    parser.add_argument('--output', default=os.path.join(
+        'bench_results', f"stages_{time.strftime('%Y%m%d-%H%M%S')}.json"))
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.pages, args.stages, min_repeat=args.repeat, min_time=args.min_time)
+    save_results(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Cooperative cancellation of requests whose client has gone away
+
+A CancelToken is cancelled explicitly (``cancel()``, e.g. from the /cancel
+endpoint through the registry below) or notices by itself that the
+client's connection was closed. The pipeline checks it between stages and
+between chunk summaries, where ``check()`` raises Cancelled. It also hands
+``stopping_criteria()`` to the summarizer, so a generation that is under
+way stops at the next decoding step instead of running to max_length.
+
+Request ids come from issue(), never from the client, so one client cannot
+guess another's id and cancel its request. Each id registers one request:
+register() refuses ids that were not issued, have expired or are in use.
+"""
+import select
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Totals over all cancelled requests, for /metrics
+CANCEL_STATS = {"cancelled": 0, "reclaimed_s": 0.0}
+
+# Issued ids not yet registered expire after ISSUED_TTL_S; at most
+# MAX_ISSUED are kept (oldest dropped first)
+ISSUED_TTL_S = 600.0
+MAX_ISSUED = 10000
+
+_issued = OrderedDict()
+_tokens = {}
+_lock = threading.Lock()
+
+
+class Cancelled(Exception):
+    pass
+
+
+def peer_closed(sock):
+    """Probe that is true once the client has closed ``sock`` (None without a socket)
+
+    The request body has been read by the time it is used, so a readable
+    socket that yields no bytes means the peer hung up.
+    """
+    if sock is None:
+        return None
+
+    def closed():
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b''
+        except (OSError, ValueError):
+            return True
+    return closed
+
+
+class CancelToken:
+    def __init__(self, disconnected=None, poll_interval=0.25):
+        self.reason = None
+        self._disconnected = disconnected
+        self._poll_interval = poll_interval
+        self._polled = 0.0
+
+    def cancel(self, reason="cancelled by the client"):
+        if self.reason is None:
+            self.reason = reason
+
+    def cancelled(self):
+        if self.reason is None and self._disconnected is not None:
+            now = time.perf_counter()
+            if now - self._polled >= self._poll_interval:
+                self._polled = now
+                if self._disconnected():
+                    self.cancel("client disconnected")
+        return self.reason is not None
+
+    def check(self):
+        """Raise Cancelled if the request has been cancelled"""
+        if self.cancelled():
+            raise Cancelled(self.reason)
+
+    def stopping_criteria(self):
+        """Stopping criteria for generate() that end decoding once cancelled"""
+        token = self
+
+        def should_stop(input_ids, scores, **kwargs):
+            return token.cancelled()
+        try:
+            from transformers import StoppingCriteria, StoppingCriteriaList
+        except ImportError:
+            # The stub models take plain callables
+            return [should_stop]
+
+        class _CancelCriteria(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return should_stop(input_ids, scores)
+        return StoppingCriteriaList([_CancelCriteria()])
+
+
+def issue():
+    """A new request id for register(), valid for one request"""
+    request_id = uuid.uuid4().hex
+    now = time.perf_counter()
+    with _lock:
+        _issued[request_id] = now
+        while _issued and (len(_issued) > MAX_ISSUED or now - next(iter(_issued.values())) > ISSUED_TTL_S):
+            _issued.popitem(last=False)
+    return request_id
+
+
+def register(request_id, token):
+    """Make ``token`` cancellable by ``request_id``; False if the id was not issued, expired or is in use"""
+    with _lock:
+        issued = _issued.pop(request_id, None)
+        if issued is None or time.perf_counter() - issued > ISSUED_TTL_S:
+            return False
+        _tokens[request_id] = token
+        return True
+
+
+def unregister(request_id, token):
+    """Drop the registration of ``token`` (and nothing registered by another request)"""
+    with _lock:
+        if _tokens.get(request_id) is token:
+            del _tokens[request_id]
+
+
+def cancel(request_id, reason="cancelled by the client"):
+    """Cancel the running request with this id; False if there is none"""
+    with _lock:
+        token = _tokens.get(request_id)
+    if token is None:
+        return False
+    token.cancel(reason)
+    return True
+
+
+def record_cancellation(reclaimed_s):
+    with _lock:
+        CANCEL_STATS["cancelled"] += 1
+        CANCEL_STATS["reclaimed_s"] = round(CANCEL_STATS["reclaimed_s"] + reclaimed_s, 4)
@@ -0,0 +1,146 @@
+class Chunk:
+    """A chunk of a text buffer, kept as offsets until its text is needed.
+
+    ``pieces`` are ``(start, end)`` slices of the shared buffer, plus the
+    short separators ('\\n\\n' between paragraphs, '. ' in the overlap) that
+    the chunk text puts between them. ``length`` is the length the chunk had
+    while being built, which is what the size limit is checked against.
+    """
+
+    __slots__ = ('buffer', 'pieces', 'length')
+
+    def __init__(self, buffer, pieces, length):
+        self.buffer = buffer
+        self.pieces = pieces
+        self.length = length
+
+    def text(self, limit=None):
+        """Materialize the chunk text, or only its first ``limit`` characters"""
+        parts = []
+        remaining = limit
+        for piece in self.pieces:
+            part = piece if isinstance(piece, str) else self.buffer[piece[0]:piece[1]]
+            if remaining is not None:
+                if remaining <= len(part):
+                    parts.append(part[:remaining])
+                    break
+                remaining -= len(part)
+            parts.append(part)
+        return ''.join(parts)
+
+    def __repr__(self):
+        return f"Chunk({self.pieces!r})"
+
+
+def _piece_length(piece):
+    return len(piece) if isinstance(piece, str) else piece[1] - piece[0]
+
+
+def _paragraph_spans(text, min_length=20):
+    """Stripped spans of the '\\n\\n'-separated paragraphs longer than ``min_length``"""
+    spans = []
+    pos = 0
+    while True:
+        end = text.find('\n\n', pos)
+        if end == -1:
+            end = len(text)
+        start, stop = pos, end
+        while start < stop and text[start].isspace():
+            start += 1
+        while stop > start and text[stop - 1].isspace():
+            stop -= 1
+        if stop - start > min_length:
+            spans.append((start, stop))
+        if end == len(text):
+            return spans
+        pos = end + 2
+
+
+def _last_two_sentences(buffer, pieces):
+    """Pieces of the last two '.'-separated segments of a chunk, if it has 2+ dots
+
+    Walks the chunk backwards, so only its tail is looked at.
+    """
+    segments = ([], [])
+    current = 0
+    for piece in reversed(pieces):
+        literal = isinstance(piece, str)
+        source = piece if literal else buffer
+        start, end = (0, len(piece)) if literal else piece
+        while True:
+            dot = source.rfind('.', start, end)
+            cut = start if dot == -1 else dot + 1
+            if cut < end:
+                segments[current].append(piece[cut:end] if literal else (cut, end))
+            if dot == -1:
+                break
+            if current == 1:
+                return segments[1][::-1], segments[0][::-1]
+            current = 1
+            end = dot
+    return None
+
+
+def _lstrip_pieces(buffer, pieces):
+    stripped = list(pieces)
+    while stripped:
+        piece = stripped[0]
+        if isinstance(piece, str):
+            piece = piece.lstrip()
+            if piece:
+                stripped[0] = piece
+                break
+        else:
+            start, end = piece
+            while start < end and buffer[start].isspace():
+                start += 1
+            if start < end:
+                stripped[0] = (start, end)
+                break
+        stripped.pop(0)
+    return stripped
+
+
+def build_chunks(text, max_size=1500):
+    """Split ``text`` into context-preserving chunks without copying it
+
+    Produces the same chunks as the string-building loop of
+    intelligent_chunking(): paragraphs are packed up to ``max_size``, and each
+    new chunk starts with the last two sentences of the previous one. The
+    paragraphs are found in one pass over the buffer and the chunks hold
+    offsets into it; call ``Chunk.text()`` to get a chunk's text.
+    """
+    chunks = []
+    pieces = []
+    length = 0
+
+    for paragraph in _paragraph_spans(text):
+        paragraph_length = paragraph[1] - paragraph[0]
+        if length + paragraph_length > max_size and pieces:
+            chunks.append(Chunk(text, _lstrip_pieces(text, pieces), length))
+
+            overlap = _last_two_sentences(text, pieces)
+            if overlap:
+                previous, last = overlap
+                pieces = previous + ['. '] + last + ['. ', paragraph]
+                length = sum(_piece_length(piece) for piece in pieces)
+            else:
+                pieces = [paragraph]
+                length = paragraph_length
+        elif pieces:
+            last = pieces[-1]
+            if not isinstance(last, str) and last[1] + 2 == paragraph[0]:
+                # Only the '\n\n' separator lies between the two paragraphs,
+                # so the chunk text is one contiguous slice of the buffer
+                pieces[-1] = (last[0], paragraph[1])
+            else:
+                pieces += ['\n\n', paragraph]
+            length += 2 + paragraph_length
+        else:
+            pieces = [paragraph]
+            length = paragraph_length
+
+    if pieces:
+        chunks.append(Chunk(text, _lstrip_pieces(text, pieces), length))
+
+    return chunks if chunks else [Chunk(text, [(0, len(text))], len(text))]
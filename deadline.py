@@ -0,0 +1,187 @@
+"""Per-request latency budgets
+
+A Deadline is created when a request arrives and handed down the
+pipeline. Before each expensive step (a summarizer or Q&A call) the
+pipeline asks ``deadline.allows(operation)``. That is true when the time
+left, minus a reserve for building the response, covers what that
+operation has recently taken. When it is false, the step switches to its
+extractive fallback and is recorded with ``deadline.degrade(stage)``, so
+the response still arrives within the budget and says what was cut short.
+
+How long each operation takes is learned from the calls themselves
+(``with deadline.timed(operation): ...``). The estimate is an
+exponentially weighted average shared by all requests in the process,
+scaled by the input's token count when the call site passes one. Time
+spent waiting for an inference slot (see inference_scheduler.py) is not
+counted as model time. One slow call must not rule an operation out for
+good, since a skipped call is never measured: estimates expire when they
+have not been refreshed for a while, and an operation whose estimate does
+not fit is still let through now and then as a probe, whose timing then
+replaces the estimate.
+
+A deadline can also carry the request's CancelToken (see cancellation.py):
+``check_cancelled()`` stops the pipeline between steps, and
+``generation_kwargs()`` lets a running summarizer call stop early.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class CallEstimates:
+    """Running (EWMA) estimate of how long each kind of model call takes
+
+    Estimates older than ``max_age_s`` are forgotten; ``probe()`` allows one
+    call per ``probe_interval_s`` and operation regardless of its estimate.
+    """
+
+    def __init__(self, alpha=0.3, max_age_s=300.0, probe_interval_s=30.0):
+        self.alpha = alpha
+        self.max_age_s = max_age_s
+        self.probe_interval_s = probe_interval_s
+        # operation -> (seconds, input tokens or None, when last observed)
+        self._seconds = {}
+        self._probed = {}
+        self._lock = threading.Lock()
+
+    def _current(self, operation, now):
+        entry = self._seconds.get(operation)
+        if entry is not None and now - entry[2] > self.max_age_s:
+            del self._seconds[operation]
+            return None
+        return entry
+
+    def observe(self, operation, seconds, tokens=None, replace=False):
+        """Record one call; ``replace`` (a probe) overwrites the estimate instead of averaging"""
+        with self._lock:
+            now = time.monotonic()
+            previous = self._current(operation, now)
+            if previous is None or replace:
+                self._seconds[operation] = (seconds, tokens, now)
+                return
+            previous_s, previous_tokens, _ = previous
+            if tokens is not None and previous_tokens is not None:
+                tokens = previous_tokens + self.alpha * (tokens - previous_tokens)
+            self._seconds[operation] = (previous_s + self.alpha * (seconds - previous_s), tokens, now)
+
+    def estimate(self, operation, tokens=None):
+        """Expected seconds for ``operation`` on ``tokens`` input tokens (0.0 while unknown)"""
+        with self._lock:
+            entry = self._current(operation, time.monotonic())
+        if entry is None:
+            return 0.0
+        seconds, average_tokens, _ = entry
+        if tokens is not None and average_tokens:
+            return seconds * tokens / average_tokens
+        return seconds
+
+    def probe(self, operation):
+        """Whether a call of ``operation`` may run despite its estimate (once per probe interval)"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._probed.get(operation, float('-inf')) < self.probe_interval_s:
+                return False
+            self._probed[operation] = now
+            return True
+
+
+CALL_ESTIMATES = CallEstimates()
+
+
+class Deadline:
+    """Time budget of one request; ``budget_s=None`` means no limit (estimates are still learned)"""
+
+    def __init__(self, budget_s=None, reserve_s=0.5, estimates=CALL_ESTIMATES, cancel_token=None):
+        self.budget_s = budget_s
+        self.reserve_s = reserve_s
+        self.estimates = estimates
+        self.cancel_token = cancel_token
+        self.started = time.perf_counter()
+        self.degraded = []
+        # Seconds spent in timed model calls so far, and waiting for a slot in them
+        self.model_s = 0.0
+        self.queued_s = 0.0
+        self._probes = set()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def remaining(self):
+        """Seconds left (infinite without a budget)"""
+        if self.budget_s is None:
+            return float('inf')
+        return self.budget_s - self.elapsed()
+
+    def timeout(self):
+        """Seconds a blocking wait may take (None without a budget)"""
+        if self.budget_s is None:
+            return None
+        return max(0.0, self.remaining() - self.reserve_s)
+
+    def allows(self, operation, count=1, tokens=None):
+        """Whether ``count`` runs of ``operation`` on ``tokens`` input tokens each are expected to
+        finish with the reserve still left
+
+        While any time is left, an operation that does not fit is sometimes
+        allowed anyway (see CallEstimates.probe()) to re-measure it.
+        """
+        available = self.remaining() - self.reserve_s
+        if available >= self.estimates.estimate(operation, tokens) * count:
+            return True
+        if available > 0 and self.estimates.probe(operation):
+            self._probes.add(operation)
+            return True
+        return False
+
+    def add_queued(self, seconds):
+        """Record time a model call spent waiting for an inference slot"""
+        self.queued_s += seconds
+
+    @contextmanager
+    def timed(self, operation, count=1, tokens=None):
+        """Time the block as ``count`` runs of ``operation`` (e.g. one batched call)
+
+        Slot waits reported through ``add_queued()`` during the block are
+        left out.
+        """
+        start = time.perf_counter()
+        queued = self.queued_s
+        try:
+            yield
+        except BaseException:
+            self._probes.discard(operation)
+            raise
+        seconds = max(0.0, time.perf_counter() - start - (self.queued_s - queued))
+        self.model_s += seconds
+        probe = operation in self._probes
+        self._probes.discard(operation)
+        if self.cancel_token is None or not self.cancel_token.cancelled():
+            # A call stopped by cancellation is no sample of the full call
+            self.estimates.observe(operation, seconds / count, tokens, replace=probe)
+
+    def check_cancelled(self):
+        """Raise Cancelled if the request's client has gone away"""
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+
+    def generation_kwargs(self):
+        """Extra summarizer arguments that stop generation once the request is cancelled"""
+        if self.cancel_token is None:
+            return {}
+        return {"stopping_criteria": self.cancel_token.stopping_criteria()}
+
+    def planned_s(self, operations):
+        """Expected seconds of ``operations``, a list of (operation, count), at their average input size"""
+        return sum(self.estimates.estimate(operation) * count for operation, count in operations)
+
+    def degrade(self, stage):
+        """Record that ``stage`` fell back to its cheap version to stay within the budget"""
+        if stage not in self.degraded:
+            self.degraded.append(stage)
+
+    def as_dict(self, digits=4):
+        return {
+            "Budget s": self.budget_s,
+            "Remaining s": round(self.remaining(), digits) if self.budget_s is not None else None,
+            "Degraded Stages": list(self.degraded),
+        }
@@ -0,0 +1,96 @@
+"""Decoding profiles and input-proportional summary lengths
+
+A profile says how the summarizer decodes:
+
+    model     the model's own search settings (the default)
+    fast      greedy search and short summaries
+    balanced  2 beams
+    quality   4 beams, as the BART/DistilBART checkpoints' own configs do
+
+Only ``model`` leaves num_beams to the checkpoint's generation config; the
+others override it and are used when asked for.
+
+Summary length limits follow the input: ``max_length`` and ``min_length``
+are fractions of the input's token count, capped at the fixed limits every
+input used to get for that stage. A short chunk is no longer forced to
+decode 100+ tokens. Token counts are rounded up to LENGTH_STEP first, so
+similar inputs get identical arguments and can share one batched call.
+
+Inputs that are already no longer than the summary that would be
+generated for them (``fits_summary()``: at most its ``max_length``) skip
+the model call altogether; SKIPPED_CALLS counts those per stage.
+"""
+import math
+import re
+import threading
+from collections import Counter
+
+LENGTH_STEP = 64
+# Inputs are truncated to this many tokens by the summarization models
+MODEL_MAX_TOKENS = 1024
+# No summary limit goes below this many tokens. At LENGTH_STEP * the largest
+# max_ratio, it also makes every profile skip the same short inputs.
+MIN_MAX_LENGTH = 32
+# Text longer than MODEL_MAX_TOKENS * MAX_CHARS_PER_TOKEN has more tokens than
+# the models read, so only that much of an input needs to be tokenized
+MAX_CHARS_PER_TOKEN = 8
+
+# Words and punctuation marks: close to a subword tokenizer's count for English text
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+SKIPPED_CALLS = Counter()
+_skipped_lock = threading.Lock()
+
+# (max_length, min_length) caps per stage, for resumes (True) and other documents
+STAGE_LIMITS = {
+    "single": {True: (500, 250), False: (400, 200)},
+    "chunk": {True: (300, 150), False: (250, 100)},
+    "combine": {True: (600, 300), False: (500, 250)},
+}
+
+# num_beams None: the model's own generation config decides
+DECODING_PROFILES = {
+    "model": {"num_beams": None, "max_ratio": 0.4, "min_ratio": 0.15, "cap_scale": 1.0},
+    "fast": {"num_beams": 1, "max_ratio": 0.25, "min_ratio": 0.08, "cap_scale": 0.5},
+    "balanced": {"num_beams": 2, "max_ratio": 0.4, "min_ratio": 0.15, "cap_scale": 1.0},
+    "quality": {"num_beams": 4, "max_ratio": 0.5, "min_ratio": 0.2, "cap_scale": 1.0},
+}
+
+
+def count_tokens(text):
+    """Rough subword count, for summarizers without a tokenizer (e.g. the stub models)"""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def summary_lengths(input_tokens, stage="single", is_resume=False, profile="model"):
+    """max_length/min_length for summarizing ``input_tokens`` tokens at ``stage``"""
+    settings = DECODING_PROFILES[profile]
+    cap_max, cap_min = STAGE_LIMITS[stage][is_resume]
+    tokens = min(MODEL_MAX_TOKENS, max(1, math.ceil(input_tokens / LENGTH_STEP)) * LENGTH_STEP)
+    max_length = max(MIN_MAX_LENGTH, min(round(cap_max * settings["cap_scale"]),
+                                         round(tokens * settings["max_ratio"])))
+    min_length = min(round(cap_min * settings["cap_scale"]), round(tokens * settings["min_ratio"]),
+                     max_length // 2)
+    return {"max_length": max_length, "min_length": min_length}
+
+
+def generation_kwargs(input_tokens, stage="single", is_resume=False, profile="model"):
+    """Summarizer keyword arguments: length limits plus the profile's search settings"""
+    kwargs = summary_lengths(input_tokens, stage, is_resume, profile)
+    kwargs["do_sample"] = False
+    num_beams = DECODING_PROFILES[profile]["num_beams"]
+    if num_beams is not None:
+        kwargs["num_beams"] = num_beams
+        if num_beams > 1:
+            kwargs["early_stopping"] = True
+    return kwargs
+
+
+def fits_summary(input_tokens, stage="single", is_resume=False, profile="model"):
+    """Whether an input is at or below the target length of its own summary (nothing to shorten)"""
+    return input_tokens <= summary_lengths(input_tokens, stage, is_resume, profile)["max_length"]
+
+
+def record_skipped(stage):
+    with _skipped_lock:
+        SKIPPED_CALLS[stage] += 1
@@ -0,0 +1,118 @@
+import re
+
+# Years are matched without the leading \b so the regex engine can jump
+# straight to a "19"/"20" prefix; the boundary is checked on each hit instead.
+YEAR_PATTERN = re.compile(r'(?:19|20)\d\d\b')
+
+# Maps ASCII whitespace (as str.split() sees it) to b' ' and everything else
+# to b'x', so words can be counted as b' x' transitions without splitting
+_WORD_MASK = bytes(32 if chr(i).isspace() else 120 for i in range(128)) + b'x' * 128
+
+
+def count_words(text):
+    """Same as len(text.split()), without building the list of words"""
+    if not text.isascii():
+        return len(text.split())
+    mask = text.encode('ascii').translate(_WORD_MASK)
+    return mask.count(b' x') + mask.startswith(b'x')
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+def find_years(text):
+    """Same matches as re.findall(r'\\b(?:19|20)\\d{2}\\b', text), as full years"""
+    years = []
+    for match in YEAR_PATTERN.finditer(text):
+        start = match.start()
+        if start == 0 or not _is_word_char(text[start - 1]):
+            years.append(match.group())
+    return years
+
+
+def find_percentages(text):
+    """Same matches as re.findall(r'\\b\\d+\\.?\\d*%\\b', text)
+
+    Percent signs are rare, so instead of trying the regex at every position
+    we jump from one '%' to the next and walk back over the number before it.
+    """
+    percentages = []
+    end = len(text)
+    pos = text.find('%')
+    while pos != -1:
+        if pos + 1 < end and _is_word_char(text[pos + 1]):
+            start = _number_start(text, pos)
+            if start is not None:
+                percentages.append(text[start:pos + 1])
+        pos = text.find('%', pos + 1)
+    return percentages
+
+
+def _number_start(text, pos):
+    """Leftmost start of a \\b\\d+\\.?\\d* run ending right before ``pos``"""
+    i = pos
+    while i > 0 and text[i - 1].isdecimal():
+        i -= 1
+    tail_start = i
+
+    # "12.5%" can start before the dot, provided there are digits before it
+    if i > 0 and text[i - 1] == '.':
+        j = i - 1
+        while j > 0 and text[j - 1].isdecimal():
+            j -= 1
+        if j < i - 1 and (j == 0 or not _is_word_char(text[j - 1])):
+            return j
+
+    if tail_start < pos and (tail_start == 0 or not _is_word_char(text[tail_start - 1])):
+        return tail_start
+    return None
+
+
+class DocumentScan:
+    """Document statistics and keyword lookups for one text, computed once.
+
+    The text is lowercased once; keyword checks are substring searches on that
+    shared copy instead of a fresh ``text.lower()`` / ``text.upper()`` per
+    keyword. Years and percentages are collected up front.
+    """
+
+    def __init__(self, text):
+        self.char_count = len(text)
+        self.word_count = count_words(text)
+        self.years = find_years(text)
+        self.percentages = find_percentages(text)
+        self.has_at_sign = '@' in text
+        self._text = text
+        self._lowered = text.lower()
+        self._upper = None
+        self._hits = {}
+
+    def contains(self, keyword):
+        """Case-insensitive check, same as ``keyword.lower() in text.lower()``"""
+        keyword = keyword.lower()
+        hit = self._hits.get(keyword)
+        if hit is None:
+            hit = self._hits[keyword] = keyword in self._lowered
+        return hit
+
+    def contains_any(self, keywords):
+        return any(self.contains(keyword) for keyword in keywords)
+
+    def contains_upper(self, keyword):
+        """Same as ``keyword in text.upper()``"""
+        if self._text.isascii() and keyword.isascii():
+            # On ASCII text this is the lowercase search for keywords that
+            # have no lowercase letters, so no uppercased copy is needed
+            return keyword == keyword.upper() and self.contains(keyword)
+        if self._upper is None:
+            self._upper = self._text.upper()
+        return keyword in self._upper
+
+    def contains_any_upper(self, keywords):
+        return any(self.contains_upper(keyword) for keyword in keywords)
+
+
+def scan_document(text):
+    """Scan ``text`` once for the features used by summaries and document typing"""
+    return DocumentScan(text)
@@ -0,0 +1,135 @@
+"""Uploaded documents prepared in the background, looked up by id
+
+An upload is registered with submit(), which starts the expensive
+preparation (extraction, chunking, sentence index, tokenization) on a
+worker thread and returns an id at once. Requests about that document call
+WarmDocument.wait(): they get the prepared document if it is ready, or
+block on the build already in progress instead of starting another one.
+
+The store keeps the most recent ``max_documents`` uploads (oldest evicted
+first), so memory stays bounded; an evicted upload whose build has not
+started yet is cancelled. At most ``max_pending`` builds may be queued or
+running at once: submit() raises StoreFull beyond that instead of growing
+the worker queue without limit.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+class StoreFull(Exception):
+    """Too many builds queued or running; retry once some have finished"""
+
+
+class WarmDocument:
+    """One upload: its build future plus results shared by later requests (e.g. its summary)"""
+
+    def __init__(self, future):
+        self.future = future
+        self.uploaded = time.perf_counter()
+        self.first_answer_s = None
+        self.results = {}
+        self.lock = threading.Lock()
+        # One lock per shared result, so computing one key never blocks another
+        self._key_locks = {}
+
+    def wait(self, timeout=None):
+        """The prepared document, waiting for the build if it is still running"""
+        return self.future.result(timeout)
+
+    def shared(self, key, compute, timeout=None, check=None, poll_s=0.25):
+        """``compute()``, run once per document and key and reused by later requests: (value, reused)
+        
+        While another request computes ``key``, waits up to ``timeout``
+        seconds (None: no limit) and then raises TimeoutError. ``check()`` is
+        called while waiting and may raise to give up (e.g. on cancellation).
+        """
+        with self.lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        give_up = None if timeout is None else time.perf_counter() + timeout
+        while not key_lock.acquire(timeout=poll_s if give_up is None else
+                                   max(0.0, min(poll_s, give_up - time.perf_counter()))):
+            if give_up is not None and time.perf_counter() >= give_up:
+                raise FutureTimeoutError(f"{key} is still being computed")
+            if check is not None:
+                check()
+        try:
+            if key in self.results:
+                return self.results[key], True
+            value = self.results[key] = compute()
+            return value, False
+        finally:
+            key_lock.release()
+
+    def ready(self):
+        """Whether the build finished successfully (not still running, failed or cancelled)"""
+        return self.future.done() and not self.future.cancelled() and self.future.exception() is None
+
+    def forget(self, key):
+        """Drop a shared result so the next request computes it again"""
+        with self.lock:
+            self.results.pop(key, None)
+
+    def answered(self):
+        """Seconds from upload to this document's first answer (fixed at the first call)"""
+        with self.lock:
+            if self.first_answer_s is None:
+                self.first_answer_s = time.perf_counter() - self.uploaded
+            return self.first_answer_s
+
+    def status(self):
+        if not self.future.done():
+            return {"status": "warming", "age_s": round(time.perf_counter() - self.uploaded, 4)}
+        if self.future.cancelled():
+            return {"status": "cancelled"}
+        error = self.future.exception()
+        if error is not None:
+            return {"status": "error", "error": str(error)}
+        return {"status": "ready", "time_to_first_answer_s": self.first_answer_s}
+
+
+class DocumentStore:
+    def __init__(self, max_documents=32, workers=2, max_pending=8):
+        self.max_documents = max_documents
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="warmup")
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, build, *args, **kwargs):
+        """Start ``build(*args, **kwargs)`` in the background; returns the new document's id
+        
+        Raises StoreFull when ``max_pending`` builds are already queued or running.
+        """
+        document_id = uuid.uuid4().hex
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise StoreFull(f"{self.pending} documents are already being prepared")
+            self.pending += 1
+            document = WarmDocument(self._executor.submit(build, *args, **kwargs))
+            self._documents[document_id] = document
+            evicted = []
+            while len(self._documents) > self.max_documents:
+                evicted.append(self._documents.popitem(last=False)[1])
+        # Outside the lock: done callbacks (ours included) run in the calling
+        # thread when a build is cancelled or has already finished
+        document.future.add_done_callback(self._finished)
+        for old in evicted:
+            # Only succeeds while the build is still queued
+            old.future.cancel()
+        return document_id
+
+    def _finished(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    def get(self, document_id):
+        """The WarmDocument with this id, or None if unknown or evicted"""
+        with self._lock:
+            document = self._documents.get(document_id)
+            if document is not None:
+                self._documents.move_to_end(document_id)
+            return document
@@ -0,0 +1,250 @@
+"""Quality-vs-latency evaluation of the model tiers and backends
+
+Runs a local corpus of documents with reference summaries and Q&A pairs
+through working_flask_app's pipeline for each model tier (see
+model_tiers.py) and backend (fp32, int8, onnx, stub), and reports summary
+ROUGE and answer exact match/F1 next to latency, throughput and peak RSS.
+
+Each tier/backend runs in its own subprocess, so peak RSS and load time are
+measured for that configuration alone.
+
+Corpus format (one JSON object per line, in a .jsonl file or a directory
+of them):
+    {"id": "...", "text": "..." or "pdf": "relative/path.pdf",
+     "summary": "reference summary",
+     "qa": [{"question": "...", "answers": ["accepted answer", ...]}]}
+
+Usage:
+    python eval_models.py                               # all tiers, fp32, eval_corpus/
+    python eval_models.py --tiers large distil --backends fp32 int8 onnx
+    python eval_models.py --backends stub               # check the harness offline
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import statistics
+import string
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from model_tiers import BACKENDS, MODEL_TIERS
+from perf_metrics import latency_summary
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_corpus(path):
+    files = [path] if os.path.isfile(path) else sorted(
+        os.path.join(path, name) for name in os.listdir(path) if name.endswith('.jsonl'))
+    documents = []
+    for file_path in files:
+        with open(file_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    document = json.loads(line)
+                    if 'pdf' in document:
+                        document['pdf'] = os.path.join(os.path.dirname(file_path), document['pdf'])
+                    documents.append(document)
+    return documents
+
+
+# --- Metrics ---
+
+def normalize_answer(text):
+    """SQuAD answer normalization: lowercase, no punctuation, articles or extra spaces"""
+    text = ''.join(ch for ch in text.lower() if ch not in set(string.punctuation))
+    text = re.sub(r'\b(a|an|the)\b', ' ', text)
+    return ' '.join(text.split())
+
+
+def exact_match(prediction, answers):
+    return float(any(normalize_answer(prediction) == normalize_answer(answer) for answer in answers))
+
+
+def token_f1(prediction, answers):
+    """Best SQuAD token F1 of ``prediction`` against any accepted answer"""
+    best = 0.0
+    prediction_tokens = normalize_answer(prediction).split()
+    for answer in answers:
+        answer_tokens = normalize_answer(answer).split()
+        common = sum((Counter(prediction_tokens) & Counter(answer_tokens)).values())
+        if common:
+            precision, recall = common / len(prediction_tokens), common / len(answer_tokens)
+            best = max(best, 2 * precision * recall / (precision + recall))
+    return best
+
+
+def _rouge_tokens(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def _f_measure(overlap, predicted, reference):
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / predicted, overlap / reference
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(prediction, reference, n):
+    """ROUGE-N F1 over lowercase word n-grams"""
+    def ngrams(tokens):
+        return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+    predicted, expected = ngrams(_rouge_tokens(prediction)), ngrams(_rouge_tokens(reference))
+    overlap = sum((predicted & expected).values())
+    return _f_measure(overlap, sum(predicted.values()), sum(expected.values()))
+
+
+def rouge_l(prediction, reference):
+    """ROUGE-L F1: longest common subsequence of words"""
+    predicted, expected = _rouge_tokens(prediction), _rouge_tokens(reference)
+    previous = [0] * (len(expected) + 1)
+    for token in predicted:
+        current = [0]
+        for j, expected_token in enumerate(expected):
+            current.append(previous[j] + 1 if token == expected_token else max(previous[j + 1], current[j]))
+        previous = current
+    return _f_measure(previous[-1], len(predicted), len(expected))
+
+
+# --- One tier/backend (runs in a subprocess) ---
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+
+def evaluate(tier, backend, corpus_path):
+    """Run the corpus through process_input() with one tier's models"""
+    # Import the app with stub models so it does not load its default tier,
+    # then put the models under evaluation in its place
+    os.environ['MODEL_BACKEND'] = 'stub'
+    sys.path.insert(0, ROOT)
+    import working_flask_app as flask_app
+    from deadline import CallEstimates, Deadline
+    from model_tiers import load_pipelines
+
+    start = time.perf_counter()
+    # process_input() takes its models from the app's tier table, not the module globals
+    flask_app.use_models(tier if backend != 'stub' else 'stub', *load_pipelines(tier, backend))
+    load_time = time.perf_counter() - start
+
+    scores = {"rouge1": [], "rouge2": [], "rougeL": [], "exact_match": [], "f1": []}
+    summary_latencies, qa_latencies = [], []
+    errors = []
+    run_start = time.perf_counter()
+    for document in load_corpus(corpus_path):
+        is_pdf = 'pdf' in document
+        start = time.perf_counter()
+        # No latency budget: a slow tier is scored on its model output, not on the fallbacks
+        result = flask_app.process_input(document['pdf'] if is_pdf else document['text'], is_pdf=is_pdf,
+                                         deadline=Deadline(estimates=CallEstimates()))
+        summary_latencies.append(time.perf_counter() - start)
+        if 'error' in result:
+            errors.append(f"{document.get('id')}: {result['error']}")
+            continue
+        summary = result['Summary']
+        scores["rouge1"].append(rouge_n(summary, document['summary'], 1))
+        scores["rouge2"].append(rouge_n(summary, document['summary'], 2))
+        scores["rougeL"].append(rouge_l(summary, document['summary']))
+
+        raw_text = flask_app.extract_text_from_pdf(document['pdf']) if is_pdf else document['text']
+        text = flask_app.clean_resume_text(raw_text)
+        # The same context process_input() gives the Q&A model
+        context = f"Document Summary: {summary}\n\nDetailed Context: {text[:3000]}"
+        for pair in document.get('qa', []):
+            start = time.perf_counter()
+            answer = flask_app.qa_pipeline(question=pair['question'], context=context)['answer']
+            qa_latencies.append(time.perf_counter() - start)
+            scores["exact_match"].append(exact_match(answer, pair['answers']))
+            scores["f1"].append(token_f1(answer, pair['answers']))
+    run_time = time.perf_counter() - run_start
+
+    return {
+        "tier": tier,
+        "backend": backend,
+        "models": MODEL_TIERS[tier] if backend != 'stub' else "stub",
+        "documents": len(summary_latencies),
+        "questions": len(qa_latencies),
+        "errors": errors,
+        "quality": {name: statistics.mean(values) if values else None for name, values in scores.items()},
+        "summary_latency_s": latency_summary(summary_latencies),
+        "qa_latency_s": latency_summary(qa_latencies),
+        "documents_per_s": len(summary_latencies) / run_time if run_time else None,
+        "load_time_s": load_time,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_isolated(tier, backend, corpus_path):
+    """evaluate() in a fresh interpreter; returns its result or an error entry"""
+    command = [sys.executable, os.path.abspath(__file__), '--worker', tier, backend, '--corpus', corpus_path]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode == 0 and lines:
+        return json.loads(lines[-1])
+    error = (completed.stderr.strip().splitlines() or ["no output"])[-1]
+    return {"tier": tier, "backend": backend, "error": error}
+
+
+def print_table(results):
+    print(f"\n{'Tier':<8} {'Backend':<8} {'R-1':>6} {'R-2':>6} {'R-L':>6} {'EM':>6} {'F1':>6} "
+          f"{'Sum p50':>9} {'QA p50':>8} {'Docs/s':>7} {'RSS MB':>8} {'Load s':>7}")
+    for result in results:
+        if 'error' in result:
+            print(f"{result['tier']:<8} {result['backend']:<8} ❌ {result['error']}")
+            continue
+        quality = result["quality"]
+        cells = [quality[name] for name in ("rouge1", "rouge2", "rougeL", "exact_match", "f1")]
+        quality_cells = ' '.join(f"{value:>6.3f}" if value is not None else f"{'-':>6}" for value in cells)
+        qa_p50 = result["qa_latency_s"].get("p50")
+        print(f"{result['tier']:<8} {result['backend']:<8} {quality_cells} "
+              f"{result['summary_latency_s'].get('p50', 0):>8.3f}s "
+              f"{qa_p50 if qa_p50 is not None else 0:>7.3f}s {result['documents_per_s']:>7.2f} "
+              f"{result['peak_rss_mb']:>8.0f} {result['load_time_s']:>7.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default=os.path.join(ROOT, 'eval_corpus'),
+                        help="corpus .jsonl file or directory")
+    parser.add_argument('--tiers', nargs='+', default=list(MODEL_TIERS), choices=list(MODEL_TIERS))
+    parser.add_argument('--backends', nargs='+', default=['fp32'], choices=BACKENDS)
+    parser.add_argument('--output', default=os.path.join(
+        'bench_results', f"eval_{time.strftime('%Y%m%d-%H%M%S')}.json"))
+    parser.add_argument('--worker', nargs=2, metavar=('TIER', 'BACKEND'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        result = evaluate(*args.worker, os.path.abspath(args.corpus))
+        print(json.dumps(result))
+        return
+
+    results = []
+    for backend in args.backends:
+        # The stub backend has no tiers
+        for tier in args.tiers[:1] if backend == 'stub' else args.tiers:
+            print(f"🔬 Evaluating {tier} / {backend}...")
+            results.append(run_isolated(tier, backend, os.path.abspath(args.corpus)))
+    print_table(results)
+
+    report = {
+        "kind": "model-eval",
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "corpus": args.corpus,
+        "results": results,
+    }
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
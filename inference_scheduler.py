@@ -0,0 +1,143 @@
+"""Weighted fair queuing in front of model inference
+
+Every summarizer or Q&A call takes one of ``slots`` inference slots for as
+long as it runs. When all slots are busy, callers wait, and freed slots go
+to waiting calls by weighted fair queuing across priority classes:
+
+    qa       interactive questions (weight 8)
+    summary  interactive summaries (weight 3)
+    batch    offline bulk work (weight 1)
+
+Each call gets a virtual finish tag, ``max(virtual time, the class's last
+tag) + cost / weight``, and the smallest tag runs next. Under contention a
+class therefore gets slot time in proportion to its weight, and no class
+starves. A long multi-chunk summary takes a slot per chunk, so it yields to
+waiting questions between chunks.
+
+A call made for a request with a Deadline (see deadline.py) stops waiting
+when the request has no time left (SlotTimeout, so the caller can use its
+extractive fallback) or is cancelled (Cancelled).
+
+Wrap a pipeline with ScheduledPipeline to route its calls through a
+scheduler. Per-class counts, wait times and call latencies are available
+from snapshot().
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from perf_metrics import latency_summary
+
+PRIORITY_WEIGHTS = {"qa": 8.0, "summary": 3.0, "batch": 1.0}
+
+
+class SlotTimeout(Exception):
+    pass
+
+
+class InferenceScheduler:
+    def __init__(self, slots=1, weights=None, window=500):
+        self.slots = slots
+        self.weights = dict(weights or PRIORITY_WEIGHTS)
+        self.busy = 0
+        self.virtual_time = 0.0
+        self._last_tag = {name: 0.0 for name in self.weights}
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._waits = {name: deque(maxlen=window) for name in self.weights}
+        self._latencies = {name: deque(maxlen=window) for name in self.weights}
+        self._calls = {name: 0 for name in self.weights}
+        self._gave_up = {name: 0 for name in self.weights}
+
+    @contextmanager
+    def slot(self, priority_class, cost=1.0, deadline=None, poll_s=0.25):
+        """Hold an inference slot for the block; ``cost`` is the call's size (e.g. batch length)
+
+        Yields the seconds spent waiting for the slot. With a ``deadline``,
+        waiting ends with SlotTimeout once its time is up and with Cancelled
+        once its request is cancelled.
+        """
+        queued = time.perf_counter()
+        with self._condition:
+            tag = max(self.virtual_time, self._last_tag[priority_class]) + cost / self.weights[priority_class]
+            self._last_tag[priority_class] = tag
+            ticket = (tag, next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while self.busy >= self.slots or self._waiting[0] != ticket:
+                    if deadline is None:
+                        self._condition.wait()
+                        continue
+                    deadline.check_cancelled()
+                    timeout = deadline.timeout()
+                    if timeout is not None and timeout <= 0:
+                        raise SlotTimeout(f"No {priority_class} inference slot within the latency budget")
+                    self._condition.wait(poll_s if timeout is None else min(poll_s, timeout))
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._gave_up[priority_class] += 1
+                # The next waiter may now be at the head of the queue
+                self._condition.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            self.busy += 1
+            self.virtual_time = tag
+            # The next waiter may fit into another free slot
+            self._condition.notify_all()
+        started = time.perf_counter()
+        try:
+            yield started - queued
+        finally:
+            finished = time.perf_counter()
+            with self._condition:
+                self.busy -= 1
+                self._calls[priority_class] += 1
+                self._waits[priority_class].append(started - queued)
+                self._latencies[priority_class].append(finished - queued)
+                self._condition.notify_all()
+
+    def snapshot(self):
+        """Per-class call counts, slot wait and call latency (wait + run) summaries"""
+        with self._condition:
+            return {
+                "slots": self.slots,
+                "busy": self.busy,
+                "waiting": len(self._waiting),
+                "classes": {name: {"calls": self._calls[name],
+                                   "gave_up": self._gave_up[name],
+                                   "weight": self.weights[name],
+                                   "wait_s": latency_summary(list(self._waits[name])),
+                                   "latency_s": latency_summary(list(self._latencies[name]))}
+                            for name in self.weights},
+            }
+
+
+class ScheduledPipeline:
+    """A pipeline whose calls go through ``scheduler`` in ``priority_class``
+
+    Calls wait for a slot no longer than ``deadline`` allows, and the wait
+    is reported to it, so its timings only count the model call. Other
+    attributes (tokenizer, model, ...) come from the wrapped pipeline.
+    """
+
+    def __init__(self, pipeline, scheduler, priority_class, deadline=None):
+        self.pipeline = pipeline
+        self.scheduler = scheduler
+        self.priority_class = priority_class
+        self.deadline = deadline
+
+    def __call__(self, *args, **kwargs):
+        inputs = args[0] if args else None
+        cost = len(inputs) if isinstance(inputs, list) and inputs else 1.0
+        with self.scheduler.slot(self.priority_class, cost, self.deadline) as waited:
+            if self.deadline is not None:
+                self.deadline.add_queued(waited)
+            return self.pipeline(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.pipeline, name)
@@ -0,0 +1,339 @@
+"""HTTP load generator and latency report for the Flask /process endpoint
+
+Sends a seeded mix of PDF uploads and pasted text, optionally with
+questions, either from a fixed number of concurrent clients (closed loop) or
+at a fixed arrival rate (open loop). It reports p50/p90/p99 latency,
+throughput, error rate and the per-stage timings the server returns in
+"Processing Stats", and saves the report as JSON and HTML.
+
+Usage:
+    # Start working_flask_app in-process with stub models and test it
+    python load_test.py --serve --concurrency 8 --requests 200
+
+    # Test a running server at 5 requests/s for a minute
+    python load_test.py --url http://localhost:5000 --rate 5 --duration 60
+
+    # Mostly short pasted text with questions
+    python load_test.py --serve --mix text=3,pdf=1 --questions 0.8 --pages 1 2
+"""
+import argparse
+import html
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from model_tiers import BACKENDS
+from perf_metrics import latency_summary
+from synthetic_docs import make_pdf, make_text
+
+QUESTIONS = [
+    "What are the main findings?",
+    "What machine learning projects did the team build?",
+    "What skills does the candidate have?",
+    "Which results were reported in 2021?",
+    "How was latency of the web service improved?",
+]
+
+
+class Workload:
+    """Seeded stream of /process requests drawn from the configured mix"""
+
+    def __init__(self, mix, page_counts, question_ratio, seed=0):
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.page_counts = page_counts
+        self.question_ratio = question_ratio
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self._documents = {}
+
+    def _document(self, kind, pages, variant):
+        key = (kind, pages, variant)
+        if key not in self._documents:
+            make = make_pdf if kind == 'pdf' else make_text
+            self._documents[key] = make(pages, seed=variant, resume=variant % 2 == 0)
+        return self._documents[key]
+
+    def next(self):
+        with self.lock:
+            kind = self.rng.choices(self.kinds, self.weights)[0]
+            pages = self.rng.choice(self.page_counts)
+            variant = self.rng.randrange(4)
+            question = self.rng.choice(QUESTIONS) if self.rng.random() < self.question_ratio else None
+            document = self._document(kind, pages, variant)
+        return {"kind": kind, "pages": pages, "question": question, "document": document}
+
+
+def encode_multipart(fields, files):
+    """Body and content type of a multipart/form-data request"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                     .encode('utf-8') + value.encode('utf-8') + b'\r\n')
+    for name, (filename, data, content_type) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                     f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'
+                     .encode('utf-8') + data + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode('utf-8'))
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def send_request(url, spec, timeout):
+    """POST one workload item and return its record (latency, status, stage timings)"""
+    fields = {'question': spec['question'] or ''}
+    files = {}
+    if spec['kind'] == 'pdf':
+        files['file'] = ('document.pdf', spec['document'], 'application/pdf')
+    else:
+        fields['text_input'] = spec['document']
+    body, content_type = encode_multipart(fields, files)
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': content_type})
+
+    record = {"kind": spec['kind'], "pages": spec['pages'], "question": spec['question'] is not None,
+              "bytes": len(body), "status": None, "error": None, "stages": {}}
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            record["status"] = response.status
+            payload = json.loads(response.read().decode('utf-8'))
+        result = payload.get('result') or {}
+        if 'error' in payload or 'error' in result:
+            record["error"] = payload.get('error') or result.get('error')
+        stats = result.get('Processing Stats', {})
+        record["stages"] = stats.get('Stage Timings', {})
+        record["server_time"] = stats.get('Processing Time')
+    except urllib.error.HTTPError as e:
+        record["status"] = e.code
+        record["error"] = f"HTTP {e.code}"
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["latency"] = time.perf_counter() - start
+    return record
+
+
+def run_closed_loop(url, workload, concurrency, requests, duration, timeout):
+    """``concurrency`` clients that each send their next request when the last one returns"""
+    records = []
+    lock = threading.Lock()
+    sent = [0]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def client():
+        while True:
+            with lock:
+                if (requests and sent[0] >= requests) or (deadline and time.perf_counter() >= deadline):
+                    return
+                sent[0] += 1
+            record = send_request(url, workload.next(), timeout)
+            with lock:
+                records.append(record)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records
+
+
+def run_open_loop(url, workload, rate, requests, duration, timeout, max_in_flight, seed=0):
+    """Poisson arrivals at ``rate`` requests/s, independent of how fast the server answers
+
+    Latency is measured from each request's scheduled arrival time, so time
+    spent waiting for a free client slot counts against the server.
+    """
+    rng = random.Random(seed)
+    records = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def fire(scheduled):
+        queued = time.perf_counter() - scheduled
+        record = send_request(url, workload.next(), timeout)
+        record["latency"] += queued
+        record["client_queue"] = queued
+        with lock:
+            records.append(record)
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        arrival = start
+        count = 0
+        while True:
+            arrival += rng.expovariate(rate)
+            if (requests and count >= requests) or (duration and arrival - start >= duration):
+                break
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, arrival)
+            count += 1
+    return records
+
+
+def summarize(records, wall_time):
+    ok = [r for r in records if not r["error"]]
+    # Stages in pipeline order, as the server reports them
+    stages = list(dict.fromkeys(stage for r in ok for stage in r["stages"]))
+    summary = {
+        "requests": len(records),
+        "errors": len(records) - len(ok),
+        "error_rate": (len(records) - len(ok)) / len(records) if records else 0.0,
+        "wall_time_s": wall_time,
+        "throughput_rps": len(ok) / wall_time if wall_time else 0.0,
+        "latency_s": latency_summary([r["latency"] for r in ok]),
+        "by_kind": {},
+        "stages_s": {stage: latency_summary([r["stages"][stage] for r in ok if stage in r["stages"]])
+                     for stage in stages},
+    }
+    for kind in sorted({r["kind"] for r in records}):
+        group = [r for r in records if r["kind"] == kind]
+        group_ok = [r for r in group if not r["error"]]
+        summary["by_kind"][kind] = {
+            "requests": len(group),
+            "error_rate": (len(group) - len(group_ok)) / len(group),
+            "latency_s": latency_summary([r["latency"] for r in group_ok]),
+        }
+    return summary
+
+
+def _latency_row(label, stats):
+    cells = [stats.get(key) for key in ("p50", "p90", "p99", "mean", "max")]
+    values = ''.join(f"<td>{value * 1000:.1f}</td>" if value is not None else "<td>-</td>"
+                     for value in cells)
+    return f"<tr><th>{html.escape(label)}</th><td>{stats.get('count', 0)}</td>{values}</tr>"
+
+
+def render_html(report):
+    summary = report["summary"]
+    header = "<tr><th></th><th>n</th><th>p50 ms</th><th>p90 ms</th><th>p99 ms</th><th>mean ms</th><th>max ms</th></tr>"
+    rows = [_latency_row("all requests", summary["latency_s"])]
+    rows += [_latency_row(kind, group["latency_s"]) for kind, group in summary["by_kind"].items()]
+    stage_rows = [_latency_row(stage, stats) for stage, stats in summary["stages_s"].items()]
+    config = ''.join(f"<tr><th>{html.escape(str(key))}</th><td>{html.escape(str(value))}</td></tr>"
+                     for key, value in report["config"].items())
+    errors = sorted({r["error"] for r in report["requests"] if r["error"]})
+    error_items = ''.join(f"<li>{html.escape(str(error))}</li>" for error in errors[:20])
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Load test report</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 1.5em; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 10px; text-align: right; }}
+th:first-child {{ text-align: left; }}
+</style></head><body>
+<h1>Load test report</h1>
+<p>{html.escape(report["created"])} &middot; {summary["requests"]} requests in {summary["wall_time_s"]:.1f} s &middot;
+throughput {summary["throughput_rps"]:.2f} req/s &middot; error rate {summary["error_rate"] * 100:.1f}%</p>
+<h2>Latency</h2><table>{header}{''.join(rows)}</table>
+<h2>Server stages</h2><table>{header}{''.join(stage_rows)}</table>
+<h2>Configuration</h2><table>{config}</table>
+{f"<h2>Errors</h2><ul>{error_items}</ul>" if errors else ""}
+</body></html>
+"""
+
+
+def start_local_server(backend):
+    """Serve working_flask_app on a free local port from a background thread"""
+    os.environ['MODEL_BACKEND'] = backend
+    from werkzeug.serving import make_server
+    import working_flask_app
+
+    server = make_server('127.0.0.1', 0, working_flask_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        kind, _, weight = item.partition('=')
+        if kind not in ('pdf', 'text'):
+            raise argparse.ArgumentTypeError(f"unknown request kind: {kind}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', default='http://localhost:5000', help="server to test")
+    target.add_argument('--serve', action='store_true',
+                        help="start working_flask_app in-process and test it")
+    parser.add_argument('--backend', default='stub', choices=BACKENDS,
+                        help="model backend for --serve")
+    parser.add_argument('--endpoint', default='/process')
+    parser.add_argument('--concurrency', type=int, default=4, help="closed-loop clients")
+    parser.add_argument('--rate', type=float, help="open-loop arrival rate in requests/s")
+    parser.add_argument('--max-in-flight', type=int, default=64, help="open-loop client slots")
+    parser.add_argument('--requests', type=int, default=100, help="number of requests (0: no limit)")
+    parser.add_argument('--duration', type=float, help="stop sending after this many seconds")
+    parser.add_argument('--mix', type=parse_mix, default={'pdf': 1, 'text': 1},
+                        help="request kind weights, e.g. pdf=1,text=3")
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--questions', type=float, default=0.5, help="fraction of requests with a question")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--output', default=os.path.join(
+        'bench_results', f"load_{time.strftime('%Y%m%d-%H%M%S')}.json"))
+    args = parser.parse_args(argv)
+    if not args.requests and not args.duration:
+        parser.error("--requests 0 needs a --duration")
+
+    server = None
+    base_url = args.url
+    if args.serve:
+        base_url, server = start_local_server(args.backend)
+    url = base_url.rstrip('/') + args.endpoint
+
+    workload = Workload(args.mix, args.pages, args.questions, args.seed)
+    mode = f"open loop at {args.rate} req/s" if args.rate else f"closed loop with {args.concurrency} clients"
+    print(f"🚀 Load testing {url} ({mode})...")
+    start = time.perf_counter()
+    if args.rate:
+        records = run_open_loop(url, workload, args.rate, args.requests, args.duration,
+                                args.timeout, args.max_in_flight, args.seed)
+    else:
+        records = run_closed_loop(url, workload, args.concurrency, args.requests, args.duration, args.timeout)
+    wall_time = time.perf_counter() - start
+    if server:
+        server.shutdown()
+
+    config = {key: value for key, value in vars(args).items() if key != 'output'}
+    config["url"] = url
+    report = {
+        "kind": "load-test",
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "config": config,
+        "summary": summarize(records, wall_time),
+        "requests": records,
+    }
+
+    summary = report["summary"]
+    latency = summary["latency_s"]
+    print(f"\n📊 {summary['requests']} requests, {summary['errors']} errors "
+          f"({summary['error_rate'] * 100:.1f}%), {summary['throughput_rps']:.2f} req/s")
+    if latency["count"]:
+        print(f"⏱️ Latency p50 {latency['p50']:.3f}s  p90 {latency['p90']:.3f}s  p99 {latency['p99']:.3f}s")
+    for stage, stats in summary["stages_s"].items():
+        print(f"   {stage:<10} p50 {stats['p50']:.4f}s  p90 {stats['p90']:.4f}s  p99 {stats['p99']:.4f}s")
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    html_path = os.path.splitext(args.output)[0] + '.html'
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(render_html(report))
+    print(f"\n💾 Report saved to {args.output} and {html_path}")
+
+
+if __name__ == '__main__':
+    main()
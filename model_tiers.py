@@ -0,0 +1,70 @@
+"""Model tiers and inference backends for the summarization and Q&A pipelines
+
+A tier names one summarization model and one Q&A model. A backend says how
+they run on CPU:
+
+    fp32   plain transformers pipeline (what the app has always used)
+    int8   the same models with dynamic int8 quantization of Linear layers
+    onnx   exported to ONNX Runtime through optimum (pip install optimum[onnxruntime])
+    stub   the fake models from stub_models.py, for tests without downloads
+"""
+
+MODEL_TIERS = {
+    # Default tier of working_flask_app.py and flask_app.py
+    "large": {
+        "summarization": "facebook/bart-large-cnn",
+        "question-answering": "deepset/roberta-large-squad2",
+    },
+    # Fallback tier of working_flask_app.py and app_deploy.py
+    "distil": {
+        "summarization": "sshleifer/distilbart-cnn-12-6",
+        "question-answering": "distilbert-base-cased-distilled-squad",
+    },
+    # Lightweight summarizer flask_app.py falls back to
+    "t5": {
+        "summarization": "t5-base",
+        "question-answering": "distilbert-base-cased-distilled-squad",
+    },
+}
+
+BACKENDS = ('fp32', 'int8', 'onnx', 'stub')
+
+
+def _onnx_pipeline(task, model_name):
+    from optimum.onnxruntime import ORTModelForQuestionAnswering, ORTModelForSeq2SeqLM
+    from transformers import AutoTokenizer, pipeline
+
+    model_class = ORTModelForSeq2SeqLM if task == "summarization" else ORTModelForQuestionAnswering
+    model = model_class.from_pretrained(model_name, export=True)
+    return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(model_name))
+
+
+def load_pipeline(task, tier="large", backend="fp32"):
+    """Build the ``task`` pipeline ("summarization" or "question-answering") of a tier"""
+    if backend == 'transformers':
+        backend = 'fp32'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend: {backend}")
+
+    if backend == 'stub':
+        from stub_models import load_stub_models
+        summarizer, qa_pipeline = load_stub_models(tier)
+        return summarizer if task == "summarization" else qa_pipeline
+
+    model_name = MODEL_TIERS[tier][task]
+    if backend == 'onnx':
+        return _onnx_pipeline(task, model_name)
+
+    from transformers import pipeline
+    model_pipeline = pipeline(task, model=model_name, device=-1)
+    if backend == 'int8':
+        import torch
+        model_pipeline.model = torch.quantization.quantize_dynamic(
+            model_pipeline.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model_pipeline
+
+
+def load_pipelines(tier="large", backend="fp32"):
+    """(summarizer, qa_pipeline) of a tier"""
+    return (load_pipeline("summarization", tier, backend),
+            load_pipeline("question-answering", tier, backend))
@@ -0,0 +1,64 @@
+import fitz
+
+
+def iter_pdf_pages(pdf_path, stats=None):
+    """Yield the text of each page of a PDF as it is extracted
+
+    Reads the structured ("dict") text of each page and falls back to plain
+    text for pages without text blocks. Errors reading the PDF propagate.
+    If a ``stats`` dict is given, the page count is stored in stats["pages"].
+    """
+    doc = None
+    try:
+        doc = fitz.open(pdf_path)
+        if stats is not None:
+            stats["pages"] = len(doc)
+        
+        for page_num in range(len(doc)):
+            page = doc.load_page(page_num)
+            
+            # Try structured text extraction first
+            text_dict = page.get_text("dict")
+            page_text = ""
+            
+            for block in text_dict["blocks"]:
+                if "lines" in block:
+                    for line in block["lines"]:
+                        line_text = ""
+                        for span in line["spans"]:
+                            line_text += span["text"]
+                        if line_text.strip():
+                            page_text += line_text + "\n"
+                    page_text += "\n"
+            
+            # Fallback to simple text extraction
+            if not page_text.strip():
+                page_text = page.get_text()
+            
+            yield page_text
+        
+    finally:
+        if doc:
+            doc.close()
+
+
+def extract_pdf_text(pdf_path, stats=None):
+    """Extract text from PDF with enhanced methods
+
+    The pages of iter_pdf_pages() joined into one string; "" if the PDF
+    can't be read.
+    """
+    try:
+        return "".join(iter_pdf_pages(pdf_path, stats))
+    except Exception as e:
+        print(f"PDF extraction error: {e}")
+        return ""
+
+
+def pdf_page_count(data):
+    """Page count of a PDF given as bytes, without extracting it (None if unreadable)"""
+    try:
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            return doc.page_count
+    except Exception:
+        return None
@@ -0,0 +1,72 @@
+"""One JSON line per processed request, for offline performance analysis
+
+Lines are appended to PERF_LOG (default: logs/performance.jsonl; set it to
+an empty string to turn logging off). Each line holds:
+
+    ts            ISO timestamp of when the request finished
+    doc_hash      first 16 hex digits of the SHA-256 of the extracted text
+    input         "pdf", "text" or "upload" (a document warmed up by /upload)
+    pages         PDF page count (null for pasted text)
+    chars         characters after cleanup
+    chunks        number of chunks sent to the summarizer
+    document_type "resume" or "general", as detected by process_input()
+    model_tier    tier of the loaded models (see model_tiers.py)
+    decoding_profile
+                  summarizer decoding profile (see decoding.py)
+    question      whether a question was asked
+    questions     number of questions answered together (/ask)
+    cache_hits    per-cache hit flags, e.g. {"warmup": true, "summary": false}
+    time_to_first_answer_s
+                  seconds from the upload (or the request) to the document's
+                  first answer, for requests with questions
+    stages        seconds per pipeline stage
+    degraded      stages that fell back to extractive versions to stay within
+                  the request's latency budget (see deadline.py)
+    total_s       seconds in process_input()
+    status        "ok", "error" or "cancelled" (with "error" holding the message)
+    reclaimed_s   for cancelled requests, the expected seconds of the model
+                  calls that were skipped or stopped (see cancellation.py)
+
+perf_report.py aggregates these files.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+PERF_LOG = os.environ.get('PERF_LOG', os.path.join('logs', 'performance.jsonl'))
+
+_write_lock = threading.Lock()
+
+
+def document_hash(text):
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()[:16]
+
+
+def log_request(record, path=None):
+    """Append ``record`` as one JSON line; never raises"""
+    path = PERF_LOG if path is None else path
+    if not path:
+        return
+    record = dict(record, ts=time.strftime('%Y-%m-%dT%H:%M:%S%z'))
+    line = json.dumps(record, separators=(',', ':')) + '\n'
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _write_lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+    except OSError as e:
+        print(f"Performance log error: {e}")
+
+
+def read_log(paths):
+    """Records from one or more JSONL performance logs, skipping unreadable lines"""
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
@@ -0,0 +1,105 @@
+"""Small timing and memory helpers shared by the apps, benchmarks and load tests"""
+import math
+import os
+import time
+import tracemalloc
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None if it can't be read"""
+    if psutil:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StageTimer:
+    """Wall-clock time (and optionally memory) per pipeline stage of one request
+
+    Call ``mark(stage)`` when a stage finishes: the time since the previous
+    mark (or since the timer was created) is added to that stage.
+
+    With ``memory=True`` each mark also records the stage's peak traced
+    memory above what was allocated when it started (needs tracemalloc to
+    be running) and the change in RSS. tracemalloc is process-wide, so
+    per-request numbers are only exact when requests don't overlap.
+    """
+
+    def __init__(self, memory=False):
+        self.timings = {}
+        self.memory = {} if memory else None
+        if memory:
+            self._tracing = tracemalloc.is_tracing()
+            self._rss = current_rss()
+            if self._tracing:
+                tracemalloc.reset_peak()
+                self._traced = tracemalloc.get_traced_memory()[0]
+        self.started = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - self._last
+        if self.memory is not None:
+            self._mark_memory(stage)
+        self._last = time.perf_counter()
+
+    def _mark_memory(self, stage):
+        usage = self.memory.setdefault(stage, {"peak_mb": 0.0, "rss_delta_mb": 0.0})
+        if self._tracing:
+            traced, peak = tracemalloc.get_traced_memory()
+            usage["peak_mb"] = round(max(usage["peak_mb"], (peak - self._traced) / 1e6), 3)
+            tracemalloc.reset_peak()
+            self._traced = traced
+        rss = current_rss()
+        if rss is not None and self._rss is not None:
+            usage["rss_delta_mb"] = round(usage["rss_delta_mb"] + (rss - self._rss) / 1e6, 3)
+        self._rss = rss
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self, digits=4):
+        return {stage: round(seconds, digits) for stage, seconds in self.timings.items()}
+
+
+def top_allocations(before, limit=10):
+    """Allocation sites that grew most since the tracemalloc snapshot ``before``"""
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+    stats = snapshot.compare_to(before.filter_traces(ignore), 'lineno')
+    return [{"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+             "size_kb": round(stat.size_diff / 1e3, 1),
+             "count": stat.count_diff}
+            for stat in sorted(stats, key=lambda stat: stat.size_diff, reverse=True)[:limit]
+            if stat.size_diff > 0]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values`` (``pct`` in 0-100); None if empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(values):
+    """count, mean, p50/p90/p99 and max of a list of durations in seconds"""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": max(values),
+    }
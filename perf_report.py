@@ -0,0 +1,117 @@
+"""Aggregate per-request performance logs (see perf_log.py)
+
+Prints latency percentiles overall, by document size bucket, by pipeline
+stage and by model tier, time to first answer by input kind ("upload" for
+documents warmed up at upload time), and lists the slowest document classes, where a class is
+(input kind, document type, size bucket).
+
+Usage:
+    python perf_report.py logs/performance.jsonl
+    python perf_report.py logs/*.jsonl --top 10 --json report.json
+"""
+import argparse
+import json
+from collections import defaultdict
+
+from perf_log import PERF_LOG, read_log
+from perf_metrics import latency_summary
+
+# Upper bounds (in characters of cleaned text) of the size buckets; roughly
+# 1 page, 10 pages, 100 pages and more
+SIZE_BUCKETS = [(3_000, "<3k chars"), (30_000, "3k-30k chars"), (300_000, "30k-300k chars"),
+                (float('inf'), ">300k chars")]
+
+
+def size_bucket(record):
+    chars = record.get("chars") or 0
+    for limit, label in SIZE_BUCKETS:
+        if chars < limit:
+            return label
+
+
+def document_class(record):
+    return f"{record.get('input', '?')}/{record.get('document_type') or '?'}/{size_bucket(record)}"
+
+
+def analyze(records, top=5, min_count=3):
+    records = list(records)
+    ok = [r for r in records if r.get("status") == "ok"]
+
+    by_bucket = defaultdict(list)
+    by_class = defaultdict(list)
+    by_stage = defaultdict(list)
+    by_tier = defaultdict(list)
+    first_answer = defaultdict(list)
+    for record in ok:
+        by_bucket[size_bucket(record)].append(record["total_s"])
+        by_class[document_class(record)].append(record["total_s"])
+        by_tier[record.get("model_tier") or "?"].append(record["total_s"])
+        if record.get("time_to_first_answer_s") is not None:
+            first_answer[record.get("input", "?")].append(record["time_to_first_answer_s"])
+        for stage, seconds in record.get("stages", {}).items():
+            by_stage[stage].append(seconds)
+
+    bucket_order = [label for _, label in SIZE_BUCKETS]
+    classes = [(name, latency_summary(values)) for name, values in by_class.items() if len(values) >= min_count]
+    slowest = sorted(classes, key=lambda item: item[1]["p90"], reverse=True)[:top]
+
+    return {
+        "requests": len(records),
+        "errors": len(records) - len(ok),
+        "total_s": latency_summary([r["total_s"] for r in ok]),
+        "by_size": {label: latency_summary(by_bucket[label]) for label in bucket_order if label in by_bucket},
+        "by_stage": {stage: latency_summary(values) for stage, values in by_stage.items()},
+        "by_tier": {tier: latency_summary(values) for tier, values in by_tier.items()},
+        "time_to_first_answer": {kind: latency_summary(values) for kind, values in first_answer.items()},
+        "slowest_classes": [dict(stats, document_class=name) for name, stats in slowest],
+        "cache_hit_rates": _cache_hit_rates(ok),
+    }
+
+
+def _cache_hit_rates(records):
+    hits = defaultdict(lambda: [0, 0])
+    for record in records:
+        for cache, hit in (record.get("cache_hits") or {}).items():
+            hits[cache][0] += bool(hit)
+            hits[cache][1] += 1
+    return {cache: hit / total for cache, (hit, total) in hits.items()}
+
+
+def _print_table(title, rows):
+    print(f"\n{title}")
+    print(f"  {'':<28} {'n':>6} {'p50 s':>8} {'p90 s':>8} {'p99 s':>8} {'max s':>8}")
+    for label, stats in rows:
+        print(f"  {label:<28} {stats['count']:>6} {stats['p50']:>8.3f} {stats['p90']:>8.3f} "
+              f"{stats['p99']:>8.3f} {stats['max']:>8.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('logs', nargs='*', default=[PERF_LOG], help="performance log files")
+    parser.add_argument('--top', type=int, default=5, help="how many slow document classes to list")
+    parser.add_argument('--min-count', type=int, default=3,
+                        help="ignore document classes with fewer requests")
+    parser.add_argument('--json', help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = analyze(read_log(args.logs), args.top, args.min_count)
+    print(f"📊 {report['requests']} requests, {report['errors']} errors")
+    if report["total_s"]["count"]:
+        _print_table("Total latency", [("all", report["total_s"])])
+        _print_table("By document size", report["by_size"].items())
+        _print_table("By stage", report["by_stage"].items())
+        _print_table("By model tier", report["by_tier"].items())
+        if report["time_to_first_answer"]:
+            _print_table("Time to first answer (by input)", report["time_to_first_answer"].items())
+        _print_table("🐢 Slowest document classes (by p90)",
+                     [(row["document_class"], row) for row in report["slowest_classes"]])
+    for cache, rate in report["cache_hit_rates"].items():
+        print(f"  cache {cache}: {rate * 100:.1f}% hits")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Canned "Quick Questions" per document type
+
+Their answers are computed in the background right after a document is
+processed, so the Quick Question buttons can show them without another
+pass over the document.
+
+The defaults below can be replaced with a JSON file named by the
+QUICK_QUESTIONS_FILE environment variable, shaped like QUICK_QUESTIONS:
+
+    {"resume": [["📚 Main skills?", "What are the main skills mentioned?"], ...],
+     "general": [...]}
+"""
+import json
+import os
+
+# Document type -> [(button label, question)]
+QUICK_QUESTIONS = {
+    "resume": [
+        ("📚 What are the main skills?", "What are the main skills mentioned?"),
+        ("💼 Work experience?", "What work experience is mentioned?"),
+        ("🎓 Educational background?", "What is the educational background?"),
+        ("🔧 Technical projects?", "What technical projects are described?"),
+    ],
+    "general": [
+        ("📝 Main topic?", "What is the main topic of the document?"),
+        ("🔍 Key findings?", "What are the key findings or conclusions?"),
+        ("📊 Important figures?", "What numbers, dates or metrics are mentioned?"),
+        ("✅ Recommendations?", "What recommendations or next steps are given?"),
+    ],
+}
+
+
+def load_quick_questions(path=None):
+    """The configured questions: QUICK_QUESTIONS, or the JSON file at ``path``/QUICK_QUESTIONS_FILE"""
+    path = path or os.environ.get('QUICK_QUESTIONS_FILE')
+    if not path:
+        return QUICK_QUESTIONS
+    with open(path, encoding='utf-8') as f:
+        configured = json.load(f)
+    return {doc_type: [tuple(entry) for entry in entries] for doc_type, entries in configured.items()}
+
+
+def quick_questions_for(is_resume, questions=None):
+    """[(label, question)] for a resume or a general document"""
+    questions = questions or load_quick_questions()
+    return questions.get("resume" if is_resume else "general", [])
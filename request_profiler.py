@@ -0,0 +1,203 @@
+"""Opt-in profiling of single requests, saved as flame graphs
+
+Profiling is off unless the PROFILE_TOKEN environment variable is set. A
+request is then profiled when it carries the token in an ``X-Profile``
+header or a ``profile`` query parameter; everything else pays only for one
+dictionary lookup.
+
+Options (header or query parameter):
+    X-Profile-Mode / profile_mode          sampling (default) or deterministic
+    X-Profile-Interval / profile_interval  sampling interval in ms (default 5)
+
+Two modes:
+    sampling       a background thread records the request thread's stack
+                   every interval; low overhead, statistically accurate
+    deterministic  sys.setprofile() on the request thread; exact call
+                   times, including C functions, at a much higher overhead
+
+Each profile is written to PROFILE_DIR (default: profiles/) both as
+speedscope JSON (open at https://www.speedscope.app) and as collapsed
+stacks for flamegraph.pl. Frames inside the model libraries
+(transformers, torch, ONNX Runtime, the stub models) are prefixed with
+"[model]", and the summary reports the share of time spent in them.
+"""
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+
+MODES = ('sampling', 'deterministic')
+MIN_INTERVAL_MS, MAX_INTERVAL_MS = 0.5, 100.0
+
+MODEL_MODULES = ('transformers', 'torch', 'onnxruntime', 'optimum', 'tokenizers', 'stub_models')
+
+
+def _is_model_file(filename):
+    parts = filename.replace('\\', '/').split('/')
+    return any(part == module or part == f"{module}.py" for part in parts for module in MODEL_MODULES)
+
+
+def profiling_options(headers, args):
+    """Profiler settings requested by a request, or None if it didn't ask (or can't)
+
+    Raises PermissionError when a profile was requested with the wrong token.
+    """
+    token = headers.get('X-Profile') or args.get('profile')
+    if not token or not PROFILE_TOKEN:
+        return None
+    if not hmac.compare_digest(token, PROFILE_TOKEN):
+        raise PermissionError("Invalid profiling token")
+
+    mode = headers.get('X-Profile-Mode') or args.get('profile_mode') or 'sampling'
+    if mode not in MODES:
+        mode = 'sampling'
+    try:
+        interval_ms = float(headers.get('X-Profile-Interval') or args.get('profile_interval') or 5)
+    except ValueError:
+        interval_ms = 5.0
+    interval_ms = min(max(interval_ms, MIN_INTERVAL_MS), MAX_INTERVAL_MS)
+    return {"mode": mode, "interval": interval_ms / 1000}
+
+
+class RequestProfiler:
+    """Collects weighted call stacks of the thread that enters the ``with`` block"""
+
+    def __init__(self, mode='sampling', interval=0.005):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.mode = mode
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._frame_names = {}
+
+    def _frame_name(self, code):
+        name = self._frame_names.get(code)
+        if name is None:
+            label = f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            name = f"[model] {label}" if _is_model_file(code.co_filename) else label
+            self._frame_names[code] = name
+        return name
+
+    # --- sampling mode ---
+
+    def _sample(self, thread_id, stop):
+        last = time.perf_counter()
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += now - last
+                self.samples += 1
+            last = now
+
+    # --- deterministic mode ---
+
+    def _profile(self, frame, event, arg):
+        now = time.perf_counter()
+        if self._stack:
+            self.stacks[tuple(self._stack)] += now - self._last
+        if event == 'call':
+            self._stack.append(self._frame_name(frame.f_code))
+        elif event == 'c_call':
+            self._stack.append(f"{getattr(arg, '__qualname__', repr(arg))} (builtin)")
+        elif self._stack:
+            # return, c_return and c_exception; events from frames that were
+            # already running when profiling started find an empty stack
+            self._stack.pop()
+        self.samples += 1
+        self._last = time.perf_counter()
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        if self.mode == 'sampling':
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._sample, args=(threading.get_ident(), self._stop),
+                                            daemon=True)
+            self._thread.start()
+        else:
+            self._stack = []
+            self._last = time.perf_counter()
+            sys.setprofile(self._profile)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.mode == 'sampling':
+            self._stop.set()
+            self._thread.join()
+        else:
+            sys.setprofile(None)
+        self.duration = time.perf_counter() - self._started
+        return False
+
+    # --- output ---
+
+    def collapsed(self):
+        """Collapsed stacks ("a;b;c weight"), weights in microseconds, for flamegraph.pl"""
+        return ''.join(f"{';'.join(stack)} {round(seconds * 1e6)}\n"
+                       for stack, seconds in self.stacks.most_common() if round(seconds * 1e6))
+
+    def speedscope(self, name="process_input"):
+        """Profile in speedscope's file format (one sampled profile, weights in seconds)"""
+        frame_ids = {}
+        samples, weights = [], []
+        for stack, seconds in self.stacks.items():
+            samples.append([frame_ids.setdefault(frame, len(frame_ids)) for frame in stack])
+            weights.append(seconds)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "request_profiler.py",
+            "shared": {"frames": [{"name": frame} for frame in frame_ids]},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{name} ({self.mode})",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+    def summary(self, top=10):
+        total = sum(self.stacks.values())
+        model_time = sum(seconds for stack, seconds in self.stacks.items()
+                         if any(frame.startswith('[model] ') for frame in stack))
+        self_time = Counter()
+        for stack, seconds in self.stacks.items():
+            self_time[stack[-1]] += seconds
+        return {
+            "mode": self.mode,
+            "interval_ms": self.interval * 1000 if self.mode == 'sampling' else None,
+            "samples": self.samples,
+            "duration_s": round(self.duration, 4),
+            "model_time_s": round(model_time, 4),
+            "model_fraction": round(model_time / total, 3) if total else None,
+            "top_self_time": [{"frame": frame, "seconds": round(seconds, 4)}
+                              for frame, seconds in self_time.most_common(top)],
+        }
+
+
+def save_profile(profiler, name="process_input"):
+    """Write the speedscope and collapsed-stack files; returns the summary with their names"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident()}"
+    with open(os.path.join(PROFILE_DIR, f"{stem}.speedscope.json"), 'w', encoding='utf-8') as f:
+        json.dump(profiler.speedscope(name), f)
+    with open(os.path.join(PROFILE_DIR, f"{stem}.collapsed.txt"), 'w', encoding='utf-8') as f:
+        f.write(profiler.collapsed())
+    summary = profiler.summary()
+    summary["files"] = [f"{stem}.speedscope.json", f"{stem}.collapsed.txt"]
+    return summary
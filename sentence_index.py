@@ -0,0 +1,133 @@
+from array import array
+
+
+class SentenceIndex:
+    """Per-document sentence index built once and queried per question.
+
+    Sentences are the '.'-separated segments of the text, stored as stripped
+    (start, end) offsets and lengths in compact arrays. Each sentence keeps its
+    lowercased tokens as an array of vocabulary ids, every vocabulary token has
+    a posting list of the sentences it appears in, and a trigram index over
+    the vocabulary answers "which tokens contain this word" without scanning
+    every sentence.
+
+    Build it once per document and hand it to every stage that would
+    otherwise split the text on '.' again.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.starts = array('l')
+        self.ends = array('l')
+        self.lengths = array('l')
+        self.tokens = []
+        self.vocab = {}
+        self.words = []
+        self.postings = []
+        self.trigrams = {}
+        self._ids_by_length = {}
+
+        pos = 0
+        for piece in text.split('.'):
+            stripped = piece.strip()
+            start = pos + len(piece) - len(piece.lstrip()) if stripped else pos
+            self.starts.append(start)
+            self.ends.append(start + len(stripped))
+            self.lengths.append(len(stripped))
+            self.tokens.append(self._add_tokens(stripped.lower().split(), len(self.starts) - 1))
+            pos += len(piece) + 1
+
+    def _add_tokens(self, words, sentence_id):
+        ids = array('l')
+        for word in words:
+            token_id = self.vocab.get(word)
+            if token_id is None:
+                token_id = len(self.postings)
+                self.vocab[word] = token_id
+                self.words.append(word)
+                self.postings.append(array('l'))
+                for i in range(len(word) - 2):
+                    self.trigrams.setdefault(word[i:i + 3], set()).add(token_id)
+            postings = self.postings[token_id]
+            if not postings or postings[-1] != sentence_id:
+                postings.append(sentence_id)
+            ids.append(token_id)
+        return ids
+
+    def __len__(self):
+        return len(self.starts)
+
+    def sentence(self, i):
+        """Return the stripped text of sentence ``i``."""
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def length(self, i):
+        return self.lengths[i]
+
+    def sentence_ids(self, min_length=0):
+        """Ids of the sentences longer than ``min_length``, in document order
+
+        Same sentences as ``[s.strip() for s in text.split('.') if len(s.strip()) > min_length]``.
+        """
+        ids = self._ids_by_length.get(min_length)
+        if ids is None:
+            ids = array('l', (i for i, length in enumerate(self.lengths) if length > min_length))
+            self._ids_by_length[min_length] = ids
+        return ids
+
+    def sentences(self, min_length=0, limit=None):
+        """Text of the sentences longer than ``min_length`` (the first ``limit`` of them)"""
+        ids = self.sentence_ids(min_length)
+        if limit is not None:
+            ids = ids[:limit]
+        return [self.sentence(i) for i in ids]
+
+    def tokens_containing(self, word):
+        """Return ids of vocabulary tokens that contain ``word`` as a substring."""
+        if len(word) < 3:
+            return [tid for token, tid in self.vocab.items() if word in token]
+
+        candidates = None
+        for i in range(len(word) - 2):
+            ids = self.trigrams.get(word[i:i + 3])
+            if not ids:
+                return []
+            if candidates is None:
+                candidates = set(ids)
+            else:
+                candidates &= ids
+            if not candidates:
+                return []
+
+        return [tid for tid in candidates if word in self.words[tid]]
+
+    def sentences_containing(self, word):
+        """Return the set of sentence ids with a token that contains ``word``."""
+        matches = set()
+        for tid in self.tokens_containing(word):
+            matches.update(self.postings[tid])
+        return matches
+
+    def first_sentence_containing(self, words, min_length=0):
+        """Id of the first sentence longer than ``min_length`` containing any of ``words``"""
+        return min((sid for word in words for sid in self.sentences_containing(word)
+                    if self.lengths[sid] > min_length), default=None)
+
+    def score_sentences(self, words, min_length=0, weight=1):
+        """Score sentences by how many of ``words`` they contain.
+
+        Every occurrence in ``words`` counts, so repeated question words weigh
+        more, exactly like summing over the question word list. Only sentences
+        longer than ``min_length`` are scored. Returns ``(sentence_id, score)``
+        pairs ordered by descending score, then document order.
+        """
+        scores = {}
+        seen = {}
+        for word in words:
+            if word not in seen:
+                seen[word] = self.sentences_containing(word)
+            for sid in seen[word]:
+                if self.lengths[sid] > min_length:
+                    scores[sid] = scores.get(sid, 0) + weight
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
@@ -0,0 +1,152 @@
+"""Memory soak test: run process_input() thousands of times and look for growth
+
+Calls working_flask_app.process_input() in-process on a seeded mix of
+synthetic PDFs and pasted text (stub models by default, with no simulated
+latency), and samples RSS and traced memory after a gc.collect() every
+``--interval`` requests. After the warm-up, it fits a line through the
+samples and flags a leak when memory keeps climbing: the slope is above
+``--max-growth-kb`` per request and most intervals grew. With
+``--tracemalloc`` it also lists the allocation sites that grew the most.
+
+Exits with status 1 when growth is flagged.
+
+Usage:
+    python soak_test.py --requests 5000
+    python soak_test.py --requests 2000 --tracemalloc --pages 1 20 100
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from perf_metrics import current_rss, top_allocations
+from synthetic_docs import make_pdf, make_text
+
+QUESTIONS = [None, "What are the main findings?", "What skills does the candidate have?"]
+
+
+def linear_slope(xs, ys):
+    """Least-squares slope of ys over xs"""
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread if spread else 0.0
+
+
+def growth_verdict(samples, key, max_growth_kb):
+    """Slope (KB/request) and share of growing intervals of one memory series"""
+    points = [(sample["requests"], sample[key]) for sample in samples if sample[key] is not None]
+    if len(points) < 3:
+        return {"slope_kb_per_request": None, "growing_intervals": None, "leak": False}
+    xs, ys = zip(*points)
+    slope = linear_slope(xs, ys) / 1e3
+    growing = sum(1 for a, b in zip(ys, ys[1:]) if b > a) / (len(ys) - 1)
+    return {
+        "slope_kb_per_request": round(slope, 3),
+        "growth_mb": round((ys[-1] - ys[0]) / 1e6, 3),
+        "growing_intervals": round(growing, 3),
+        "leak": slope > max_growth_kb and growing >= 0.6,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=100, help="requests before the first sample")
+    parser.add_argument('--interval', type=int, default=50, help="requests between memory samples")
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--backend', default='stub', help="MODEL_BACKEND for the app")
+    parser.add_argument('--max-growth-kb', type=float, default=1.0,
+                        help="allowed memory growth per request, in KB")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="also trace Python allocations and report growing sites (slower)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(
+        'bench_results', f"soak_{time.strftime('%Y%m%d-%H%M%S')}.json"))
+    args = parser.parse_args(argv)
+
+    os.environ['MODEL_BACKEND'] = args.backend
+    import working_flask_app as flask_app
+    for model in (flask_app.summarizer, flask_app.qa_pipeline):
+        if hasattr(model, 'latency'):
+            model.latency.scale = 0
+
+    # A fixed pool of documents, so growth can't come from new inputs
+    rng = random.Random(args.seed)
+    pdf_paths = []
+    documents = []
+    for pages in args.pages:
+        for variant in range(2):
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+                tmp_file.write(make_pdf(pages, seed=variant, resume=variant == 0))
+            pdf_paths.append(tmp_file.name)
+            documents.append((tmp_file.name, True))
+            documents.append((make_text(pages, seed=variant, resume=variant == 0), False))
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    samples = []
+    baseline_snapshot = None
+    start = time.perf_counter()
+    print(f"🔁 Soak testing process_input() with {args.requests} requests...")
+    try:
+        for count in range(1, args.requests + 1):
+            document, is_pdf = rng.choice(documents)
+            result = flask_app.process_input(document, is_pdf=is_pdf, question=rng.choice(QUESTIONS))
+            if 'error' in result:
+                print(f"⚠️ Request {count} failed: {result['error']}")
+            if count >= args.warmup and (count - args.warmup) % args.interval == 0:
+                gc.collect()
+                if args.tracemalloc and baseline_snapshot is None:
+                    baseline_snapshot = tracemalloc.take_snapshot()
+                sample = {
+                    "requests": count,
+                    "rss": current_rss(),
+                    "traced": tracemalloc.get_traced_memory()[0] if args.tracemalloc else None,
+                }
+                samples.append(sample)
+                rss_mb = f"{sample['rss'] / 1e6:.1f} MB" if sample['rss'] else "n/a"
+                print(f"   {count:>6} requests  RSS {rss_mb}")
+        top_sites = top_allocations(baseline_snapshot, limit=15) if baseline_snapshot else []
+    finally:
+        for path in pdf_paths:
+            os.unlink(path)
+
+    verdicts = {
+        "rss": growth_verdict(samples, "rss", args.max_growth_kb),
+        "traced": growth_verdict(samples, "traced", args.max_growth_kb),
+    }
+    leak = any(verdict["leak"] for verdict in verdicts.values())
+    report = {
+        "kind": "soak-test",
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "config": {key: value for key, value in vars(args).items() if key != 'output'},
+        "duration_s": time.perf_counter() - start,
+        "samples": samples,
+        "verdicts": verdicts,
+        "top_growing_sites": top_sites,
+        "leak": leak,
+    }
+
+    for name, verdict in verdicts.items():
+        if verdict["slope_kb_per_request"] is not None:
+            print(f"📈 {name}: {verdict['slope_kb_per_request']:+.3f} KB/request, "
+                  f"{verdict['growing_intervals'] * 100:.0f}% of intervals grew")
+    for site in top_sites[:5]:
+        print(f"   {site['site']}: +{site['size_kb']} KB ({site['count']:+d} blocks)")
+    print("❌ Memory keeps growing" if leak else "✅ No sustained memory growth")
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report saved to {args.output}")
+    return 1 if leak else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
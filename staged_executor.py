@@ -0,0 +1,195 @@
+"""Pipelined executor: stages connected by bounded queues
+
+Each stage has its own worker threads and a bounded input queue. When a
+stage falls behind, its queue fills up and the stage before it blocks on
+``put`` (backpressure), so at most ``queue_size`` items wait between any
+two stages and memory stays bounded however long the input is. While one
+stage works on document N, the stage before it can already work on
+document N+1.
+
+A stage can:
+  - run its function in worker threads (good for code that releases the
+    GIL, like model inference)
+  - hand each item to a process pool (``pool=``) for pure-Python CPU work
+    such as PDF parsing
+  - take items in batches (``batch_size``), e.g. for batched inference
+
+Every stage records busy time, time blocked waiting for input (starved)
+and time blocked on a full output queue (backpressure). utilization() turns
+those into the numbers needed to size each stage's worker count.
+"""
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+class StageError:
+    """Stands in for an item whose stage raised; later stages pass it through untouched"""
+
+    def __init__(self, stage, item, error):
+        self.stage = stage
+        self.item = item
+        self.error = error
+
+    def __repr__(self):
+        return f"StageError({self.stage!r}, {self.error!r})"
+
+
+class Stage:
+    """One step of the pipeline
+
+    ``func`` takes one item and returns its result. With ``batch_size`` set,
+    it instead takes a list of up to that many items (whatever arrived
+    within ``batch_timeout`` seconds of the first) and returns a list of
+    results of the same length.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=4, batch_size=None, batch_timeout=0.05, pool=None):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.pool = pool
+        self.stats = {"items": 0, "batches": 0, "errors": 0, "busy_s": 0.0, "starved_s": 0.0, "blocked_s": 0.0}
+        self._lock = threading.Lock()
+
+    def _add(self, **amounts):
+        with self._lock:
+            for key, amount in amounts.items():
+                self.stats[key] += amount
+
+    def _call(self, items):
+        argument = items if self.batch_size else items[0]
+        if self.pool is not None:
+            result = self.pool.submit(self.func, argument).result()
+        else:
+            result = self.func(argument)
+        return result if self.batch_size else [result]
+
+
+class StagedExecutor:
+    def __init__(self, stages):
+        self.stages = stages
+        self.wall_time = 0.0
+
+    def run(self, items, sink):
+        """Push ``items`` through every stage and call ``sink(result)`` for each output
+
+        ``sink`` runs in the calling thread, in completion order. Results of
+        items that failed in some stage arrive as StageError.
+        """
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        queues.append(queue.Queue(maxsize=max(1, self.stages[-1].queue_size)))
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+        started = time.perf_counter()
+
+        def worker(index):
+            stage, inbox, outbox = self.stages[index], queues[index], queues[index + 1]
+            finished = False
+            while not finished:
+                batch, finished = self._take(stage, inbox)
+                if batch:
+                    self._process(stage, batch, outbox)
+            with remaining_lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if last:
+                # Wake every worker of the next stage (or the sink) for shutdown
+                receivers = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+                for _ in range(receivers):
+                    outbox.put(_DONE)
+
+        def feed():
+            # Blocks once the first stage's queue is full, so ``items`` can be a lazy iterator
+            for item in items:
+                queues[0].put(item)
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads += [threading.Thread(target=worker, args=(index,), daemon=True, name=f"{stage.name}-{n}")
+                        for n in range(stage.workers)]
+        for thread in threads:
+            thread.start()
+
+        while True:
+            result = queues[-1].get()
+            if result is _DONE:
+                break
+            sink(result)
+        for thread in threads:
+            thread.join()
+        self.wall_time = time.perf_counter() - started
+        return self.utilization()
+
+    def _take(self, stage, inbox):
+        """Next batch from ``inbox``: (items, whether the input is exhausted)"""
+        start = time.perf_counter()
+        item = inbox.get()
+        stage._add(starved_s=time.perf_counter() - start)
+        if item is _DONE:
+            return [], True
+        batch = [item]
+        deadline = time.perf_counter() + stage.batch_timeout
+        while len(batch) < (stage.batch_size or 1):
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = inbox.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _process(self, stage, batch, outbox):
+        failed = [item for item in batch if isinstance(item, StageError)]
+        work = [item for item in batch if not isinstance(item, StageError)]
+        results = []
+        start = time.perf_counter()
+        if work:
+            try:
+                results = stage._call(work)
+            except Exception as e:
+                results = [StageError(stage.name, item, e) for item in work]
+                stage._add(errors=len(work))
+        stage._add(items=len(work), batches=1 if work else 0, busy_s=time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for result in list(results) + failed:
+            outbox.put(result)
+        stage._add(blocked_s=time.perf_counter() - start)
+
+    def utilization(self):
+        """Per-stage counts and busy/starved/blocked shares of the stage's worker time"""
+        report = {}
+        for stage in self.stages:
+            capacity = stage.workers * self.wall_time
+            stats = dict(stage.stats)
+            stats.update(
+                workers=stage.workers,
+                utilization=stats["busy_s"] / capacity if capacity else 0.0,
+                starved=stats["starved_s"] / capacity if capacity else 0.0,
+                blocked=stats["blocked_s"] / capacity if capacity else 0.0,
+            )
+            report[stage.name] = stats
+        return report
+
+
+def print_utilization(report, wall_time):
+    print(f"\n⚙️ Stage utilization over {wall_time:.1f}s")
+    print(f"  {'Stage':<10} {'Workers':>7} {'Items':>6} {'Busy':>6} {'Starved':>8} {'Blocked':>8}")
+    for name, stats in report.items():
+        print(f"  {name:<10} {stats['workers']:>7} {stats['items']:>6} {stats['utilization'] * 100:>5.0f}% "
+              f"{stats['starved'] * 100:>7.0f}% {stats['blocked'] * 100:>7.0f}%")
+    if report:
+        bottleneck = max(report, key=lambda name: report[name]["utilization"])
+        print(f"  Bottleneck: {bottleneck} (add workers there; stages that are mostly starved have too many)")
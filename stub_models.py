@@ -0,0 +1,237 @@
+"""Deterministic stand-ins for the transformers summarization and Q&A pipelines
+
+Used for load testing and benchmarking without downloading models or
+needing a network. The stubs accept the same call signatures and return the
+same output shapes as the real pipelines:
+
+    summarizer(text, max_length=..., min_length=..., do_sample=False, stopping_criteria=None)
+        -> [{'summary_text': ...}]
+    qa_pipeline(question=..., context=...)
+        -> {'score': ..., 'start': ..., 'end': ..., 'answer': ...}
+
+Outputs are extractive and depend only on the input. Each call sleeps for a
+simulated latency of ``base + per-token cost`` scaled by a random factor
+from the configured distribution. The factor is seeded from the input, so a
+run is reproducible regardless of request order or concurrency. Like
+generate(), the summarizer checks ``stopping_criteria`` while it "decodes"
+and returns early with a truncated summary once one of them is true.
+Beam search is simulated by charging the per-output-token cost once per
+beam (``num_beams``).
+
+Configuration (environment variables, read by load_stub_models()):
+    STUB_LATENCY         fixed | uniform | normal | lognormal (default: lognormal)
+    STUB_JITTER          spread of the distribution (default: 0.25)
+    STUB_SEED            seed mixed into every latency draw (default: 0)
+    STUB_SUMMARY_BASE_MS, STUB_SUMMARY_INPUT_MS, STUB_SUMMARY_OUTPUT_MS
+                         summarizer cost: fixed, per input token, per output token
+                         (defaults: 50, 0.5, 8)
+    STUB_QA_BASE_MS, STUB_QA_INPUT_MS
+                         Q&A cost: fixed, per input token (defaults: 20, 0.2)
+    STUB_MAX_INPUT_TOKENS  inputs are truncated like the real models (default: 1024)
+    STUB_SMALL_TIER_SCALE  latency multiplier for tiers other than "large" (default: 0.5)
+"""
+import os
+import random
+import re
+import threading
+import time
+import zlib
+
+from decoding import TOKEN_PATTERN, count_tokens
+
+DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal')
+
+
+class LatencyModel:
+    """Simulated model latency: ``base + input/output token cost``, with jitter
+
+    The jitter factor has mean ~1 and is drawn from ``distribution`` with a
+    spread of ``jitter``; ``key`` seeds the draw so equal inputs get equal
+    latencies. ``scale=0`` disables sleeping entirely.
+    """
+
+    def __init__(self, base_ms, per_input_token_ms=0.0, per_output_token_ms=0.0,
+                 distribution='lognormal', jitter=0.25, seed=0, scale=1.0):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.base_ms = base_ms
+        self.per_input_token_ms = per_input_token_ms
+        self.per_output_token_ms = per_output_token_ms
+        self.distribution = distribution
+        self.jitter = jitter
+        self.seed = seed
+        self.scale = scale
+
+    def _factor(self, rng):
+        if self.distribution == 'uniform':
+            return rng.uniform(1 - self.jitter, 1 + self.jitter)
+        if self.distribution == 'normal':
+            return max(0.0, rng.gauss(1, self.jitter))
+        if self.distribution == 'lognormal':
+            # Long right tail with a mean of 1, like real inference latency
+            return rng.lognormvariate(-self.jitter ** 2 / 2, self.jitter)
+        return 1.0
+
+    def seconds(self, input_tokens, output_tokens=0, key=''):
+        rng = random.Random(zlib.crc32(key.encode('utf-8')) ^ self.seed)
+        cost_ms = (self.base_ms
+                   + self.per_input_token_ms * input_tokens
+                   + self.per_output_token_ms * output_tokens)
+        return cost_ms * self._factor(rng) * self.scale / 1000
+
+
+class _StubPipeline:
+    """Call counting and simulated latency shared by the stub pipelines"""
+
+    task = None
+
+    def __init__(self, latency, max_input_tokens=1024):
+        self.latency = latency
+        self.max_input_tokens = max_input_tokens
+        self.model = f"stub-{self.task}"
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"calls": 0, "input_tokens": 0, "output_tokens": 0, "busy_s": 0.0}
+
+    def _simulate(self, input_tokens, output_tokens, key, stopping_criteria=None, beams=1, step_s=0.02):
+        """Sleep for the call's latency; returns the fraction done (< 1 if a stopping criterion fired)"""
+        # Every decoding step runs the decoder once per beam
+        seconds = self.latency.seconds(input_tokens, output_tokens * beams, key)
+        done = 1.0
+        if seconds > 0 and stopping_criteria:
+            slept = 0.0
+            while slept < seconds:
+                if any(criterion(None, None) for criterion in stopping_criteria):
+                    done, seconds = slept / seconds, slept
+                    break
+                time.sleep(min(step_s, seconds - slept))
+                slept += step_s
+        elif seconds > 0:
+            time.sleep(seconds)
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["input_tokens"] += input_tokens
+            self.stats["output_tokens"] += output_tokens
+            self.stats["busy_s"] += seconds
+        return done
+
+    def _truncate(self, text):
+        """Keep the first ``max_input_tokens`` tokens, as the real tokenizers do"""
+        tokens = TOKEN_PATTERN.finditer(text)
+        for count, match in enumerate(tokens, 1):
+            if count == self.max_input_tokens:
+                return text[:match.end()], count
+        return text, count_tokens(text)
+
+
+class StubSummarizer(_StubPipeline):
+    """Extractive stand-in for pipeline("summarization", ...)
+
+    Returns the leading sentences of the input, between ``min_length`` and
+    ``max_length`` words long.
+    """
+
+    task = "summarization"
+
+    def summarize(self, text, max_length=142, min_length=56, stopping_criteria=None, num_beams=1):
+        text, input_tokens = self._truncate(text)
+        words = text.split()
+        sentences = [s.strip() for s in text.split('.') if s.strip()]
+        summary_words = []
+        for sentence in sentences:
+            sentence_words = sentence.split()
+            if summary_words and len(summary_words) + len(sentence_words) > max_length:
+                break
+            summary_words += sentence_words
+            summary_words[-1] += '.'
+            if len(summary_words) >= min_length:
+                break
+        if len(summary_words) < min(min_length, len(words)):
+            summary_words = words[:min_length]
+        summary = ' '.join(summary_words[:max_length])
+
+        done = self._simulate(input_tokens, count_tokens(summary), f"{self.task}:{text}:{max_length}",
+                              stopping_criteria, num_beams)
+        if done < 1:
+            summary_words = summary.split()
+            summary = ' '.join(summary_words[:int(len(summary_words) * done)])
+        return {"summary_text": summary}
+
+    def __call__(self, inputs, max_length=142, min_length=56, do_sample=False, stopping_criteria=None, num_beams=1,
+                 **kwargs):
+        if isinstance(inputs, str):
+            return [self.summarize(inputs, max_length, min_length, stopping_criteria, num_beams)]
+        return [self.summarize(text, max_length, min_length, stopping_criteria, num_beams) for text in inputs]
+
+
+class StubQuestionAnswering(_StubPipeline):
+    """Extractive stand-in for pipeline("question-answering", ...)
+
+    Answers with the context sentence that shares the most words with the
+    question; the score is the fraction of question words it contains.
+    """
+
+    task = "question-answering"
+
+    def answer(self, question, context):
+        context, input_tokens = self._truncate(context)
+        question_words = {word.lower() for word in re.findall(r'\w{3,}', question)}
+
+        best_start, best_end, best_hits = 0, 0, -1
+        start = 0
+        for sentence in context.split('.'):
+            end = start + len(sentence)
+            hits = len(question_words & {word.lower() for word in re.findall(r'\w+', sentence)})
+            if hits > best_hits and sentence.strip():
+                best_start, best_end, best_hits = start, end, hits
+            start = end + 1
+
+        # Trim to the stripped sentence, like a span predicted by the model
+        while best_start < best_end and context[best_start].isspace():
+            best_start += 1
+        answer = context[best_start:best_end].rstrip()
+        score = max(best_hits, 0) / len(question_words) if question_words else 0.0
+
+        self._simulate(input_tokens + count_tokens(question), 0, f"{self.task}:{question}:{context}")
+        return {"score": round(min(score, 1.0), 4), "start": best_start,
+                "end": best_start + len(answer), "answer": answer}
+
+    def __call__(self, *args, question=None, context=None, **kwargs):
+        if args:
+            inputs = args[0]
+            if isinstance(inputs, dict):
+                return self.answer(inputs['question'], inputs['context'])
+            return [self.answer(item['question'], item['context']) for item in inputs]
+        if isinstance(question, list):
+            contexts = context if isinstance(context, list) else [context] * len(question)
+            return [self.answer(q, c) for q, c in zip(question, contexts)]
+        return self.answer(question, context)
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, '') else default
+
+
+def load_stub_models(tier="large"):
+    """Build the stub summarizer and Q&A pipeline from STUB_* environment variables"""
+    # Smaller tiers are simulated as proportionally faster
+    scale = 1.0 if tier == "large" else _env_float('STUB_SMALL_TIER_SCALE', 0.5)
+    distribution = os.environ.get('STUB_LATENCY', 'lognormal')
+    jitter = _env_float('STUB_JITTER', 0.25)
+    seed = int(_env_float('STUB_SEED', 0))
+    max_input_tokens = int(_env_float('STUB_MAX_INPUT_TOKENS', 1024))
+
+    summarizer = StubSummarizer(LatencyModel(
+        _env_float('STUB_SUMMARY_BASE_MS', 50),
+        _env_float('STUB_SUMMARY_INPUT_MS', 0.5),
+        _env_float('STUB_SUMMARY_OUTPUT_MS', 8),
+        distribution, jitter, seed, scale), max_input_tokens)
+    qa_pipeline = StubQuestionAnswering(LatencyModel(
+        _env_float('STUB_QA_BASE_MS', 20),
+        _env_float('STUB_QA_INPUT_MS', 0.2),
+        0.0, distribution, jitter, seed, scale), max_input_tokens)
+    return summarizer, qa_pipeline
@@ -0,0 +1,101 @@
+"""Deterministic synthetic documents (plain text and PDF) for benchmarks and load tests
+
+Everything is generated from a seeded RNG and the PDF is written by hand
+(Helvetica text, no timestamps or random IDs), so the same arguments always
+produce byte-identical output on any machine.
+"""
+import random
+
+LINES_PER_PAGE = 48
+
+RESUME_SECTIONS = ['EDUCATION', 'EXPERIENCE', 'SKILLS', 'PROJECTS', 'CONTACT']
+
+SUBJECTS = ['The team', 'Our analysis', 'The proposed system', 'This project', 'The model',
+            'The candidate', 'The company', 'The study', 'The framework', 'The pipeline']
+VERBS = ['developed', 'improved', 'implemented', 'evaluated', 'designed', 'managed',
+         'reduced', 'increased', 'built', 'analyzed']
+OBJECTS = ['a data processing approach', 'the machine learning model', 'customer retention by 12.5%',
+           'latency of the web service', 'a Python and SQL reporting tool', 'the React front end',
+           'results across three experiments', 'the university research programme',
+           'software used by 4000 students', 'Node.js services for the platform']
+DETAILS = ['in 2019', 'during 2021', 'with strong results', 'for the finance department',
+           'using JavaScript and HTML', 'as part of the degree', 'over six months',
+           'with a team of five engineers', 'based on Data Science methods', 'at scale']
+
+
+def _sentence(rng):
+    return f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(DETAILS)}."
+
+
+def make_pages(pages, seed=0, resume=False):
+    """Return ``pages`` lists of text lines, as they would be laid out on the page"""
+    rng = random.Random(seed)
+    result = []
+    for page_num in range(pages):
+        lines = []
+        if resume and page_num == 0:
+            lines += ['John Smith', 'john.smith@example.com | +91-9876543210', '']
+        while len(lines) < LINES_PER_PAGE:
+            if resume and rng.random() < 0.05:
+                lines += [rng.choice(RESUME_SECTIONS), '']
+                continue
+            paragraph = ' '.join(_sentence(rng) for _ in range(rng.randint(2, 5)))
+            # Wrap at ~90 characters like a rendered page would
+            words = paragraph.split()
+            line = ''
+            for word in words:
+                if len(line) + len(word) + 1 > 90:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = f"{line} {word}" if line else word
+            lines += [line, '']
+        lines = lines[:LINES_PER_PAGE - 1] + [str(page_num + 1)]
+        result.append(lines)
+    return result
+
+
+def make_text(pages, seed=0, resume=False):
+    """Plain text of a synthetic document, shaped like extract_text_from_pdf() output"""
+    return ''.join('\n'.join(lines) + '\n\n' for lines in make_pages(pages, seed, resume))
+
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(pages, seed=0, resume=False):
+    """Bytes of a PDF with the same lines as make_text(pages, seed, resume)"""
+    page_lines = make_pages(pages, seed, resume)
+    font_id = 3
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        font_id: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    next_id = 4
+    for lines in page_lines:
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+        kids.append(f"{page_id} 0 R")
+        stream = ["BT", "/F1 9 Tf", "11 TL", "50 800 Td"]
+        stream += [f"({_pdf_escape(line)}) Tj T*" for line in lines]
+        stream.append("ET")
+        data = '\n'.join(stream).encode('latin-1')
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream"
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                            f"/Resources << /Font << /F1 {font_id} 0 R >> >> "
+                            f"/Contents {content_id} 0 R >>").encode('latin-1')
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode('latin-1')
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for obj_id in sorted(objects):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
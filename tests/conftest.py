@@ -0,0 +1,12 @@
+import importlib
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def flask_app():
+    """working_flask_app on the stub models, without simulated latency or a performance log"""
+    os.environ.update(MODEL_BACKEND="stub", PERF_LOG="", STUB_SUMMARY_BASE_MS="0", STUB_SUMMARY_INPUT_MS="0",
+                      STUB_SUMMARY_OUTPUT_MS="0", STUB_QA_BASE_MS="0", STUB_QA_INPUT_MS="0")
+    return importlib.import_module("working_flask_app")
@@ -0,0 +1,37 @@
+"""Admission cost grows with a document's size the way its memory does: linearly"""
+import tracemalloc
+
+import pytest
+
+from admission import AdmissionController, Rejected, estimate_cost
+from perf_metrics import StageTimer
+from synthetic_docs import make_pdf
+
+
+def test_cost_is_linear_in_pages():
+    assert estimate_cost(pages=1) == 3.0
+    for pages in (2, 8, 64):
+        assert estimate_cost(pages=pages) == pages * estimate_cost(pages=1)
+    assert estimate_cost(pages=8, tier="distil") == estimate_cost(pages=8) / 2
+
+
+def test_cost_tracks_preparation_memory(flask_app, tmp_path):
+    per_unit = []
+    for pages in (8, 32, 64):
+        path = tmp_path / f"doc{pages}.pdf"
+        path.write_bytes(make_pdf(pages, seed=pages))
+        tracemalloc.start()
+        raw_text, _ = flask_app.read_document(str(path), True, {"pages": None}, StageTimer())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        per_unit.append(peak / estimate_cost(pages, len(raw_text)))
+    assert max(per_unit) < 2 * min(per_unit)
+
+
+def test_big_request_waits_for_an_idle_lane():
+    admission = AdmissionController(capacity=10.0, fast_lane_capacity=2.0, small_cost=1.0)
+    big = admission.admit(estimate_cost(pages=8))
+    with pytest.raises(Rejected):
+        admission.admit(estimate_cost(pages=8))
+    admission.release(big)
+    admission.release(admission.admit(estimate_cost(pages=8)))
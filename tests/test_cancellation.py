@@ -0,0 +1,36 @@
+"""Request ids for /cancel are issued by the server and cover one request each"""
+import cancellation
+from cancellation import CancelToken
+
+
+def test_only_issued_ids_register_once():
+    first, second = CancelToken(), CancelToken()
+    assert not cancellation.register("job-42", first)
+
+    request_id = cancellation.issue()
+    assert cancellation.register(request_id, first)
+    # A second request with the same id neither registers nor replaces the first
+    assert not cancellation.register(request_id, second)
+    cancellation.unregister(request_id, second)
+    assert cancellation.cancel(request_id)
+    assert first.cancelled() and not second.cancelled()
+
+    cancellation.unregister(request_id, first)
+    assert not cancellation.cancel(request_id)
+
+
+def test_issued_ids_expire(monkeypatch):
+    monkeypatch.setattr(cancellation, "ISSUED_TTL_S", 0.0)
+    assert not cancellation.register(cancellation.issue(), CancelToken())
+
+
+def test_app_refuses_unissued_and_reused_ids(flask_app):
+    client = flask_app.app.test_client()
+    data = {'text_input': 'Revenue grew in 2023.', 'question': 'How did revenue change?'}
+    response = client.post('/process', data=data, headers={'X-Request-ID': 'job-42'})
+    assert response.status_code == 409
+
+    request_id = client.post('/request-id').get_json()['request_id']
+    assert client.post('/process', data=data, headers={'X-Request-ID': request_id}).get_json()['success']
+    assert client.post('/process', data=data, headers={'X-Request-ID': request_id}).status_code == 409
+    assert client.post(f'/cancel/{request_id}').status_code == 404
@@ -0,0 +1,89 @@
+"""build_chunks() against the string-building loop intelligent_chunking() used to run
+
+app.py and working_flask_app.py preprocess the text and then chunk it; the
+old loop copied every paragraph into growing strings, build_chunks() keeps
+offsets into the buffer. Both must give the same chunk texts.
+"""
+import random
+
+import pytest
+
+from chunker import build_chunks
+from synthetic_docs import make_text
+
+GOLDEN_INPUTS = [
+    "",
+    "short",
+    "\n\n\n\n",
+    "A paragraph that is long enough to count.",
+    "Too short.\n\nA paragraph that is long enough to count.\n\nAlso short",
+    "  Padded paragraph with spaces around it.  \n\n\tAnother padded paragraph, tab first. \n",
+    "No dots in this one at all\n\nnor in this one either it goes on\n\nand on and on without a stop",
+    "One. Two. Three. Four sentences in this paragraph.\n\n" * 40,
+    "Dots at the end only...\n\n...and dots at the start\n\n. . . . . . . . . . . . . . .",
+]
+
+
+def original_chunking(text, max_size=1500):
+    paragraphs = [p.strip() for p in text.split('\n\n') if len(p.strip()) > 20]
+
+    chunks = []
+    current_chunk = ""
+
+    for paragraph in paragraphs:
+        if len(current_chunk) + len(paragraph) > max_size and current_chunk:
+            chunks.append(current_chunk.strip())
+
+            # Add overlap for context
+            sentences = current_chunk.split('.')
+            if len(sentences) > 2:
+                overlap = '. '.join(sentences[-2:]) + '. '
+                current_chunk = overlap + paragraph
+            else:
+                current_chunk = paragraph
+        else:
+            if current_chunk:
+                current_chunk += "\n\n" + paragraph
+            else:
+                current_chunk = paragraph
+
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+
+    return chunks if chunks else [text]
+
+
+def chunk_texts(text, max_size=1500):
+    return [chunk.text() for chunk in build_chunks(text, max_size)]
+
+
+@pytest.mark.parametrize("max_size", [1, 60, 200, 1500])
+@pytest.mark.parametrize("text", GOLDEN_INPUTS)
+def test_golden_chunks_unchanged(text, max_size):
+    assert chunk_texts(text, max_size) == original_chunking(text, max_size)
+
+
+def test_document_chunks_unchanged():
+    for seed in range(30):
+        rng = random.Random(seed)
+        text = make_text(rng.randint(1, 6), seed, resume=seed % 3 == 0)
+        for max_size in (300, 800, 1500):
+            assert chunk_texts(text, max_size) == original_chunking(text, max_size), (seed, max_size)
+
+
+def test_random_buffers_unchanged():
+    rng = random.Random(0)
+    alphabet = list("abcde ABC..,\t") + ["\n", "\n\n", "\n\n\n", " \n\n ", "sentence ends here. ", "x" * 30]
+    for _ in range(3000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 120)))
+        max_size = rng.choice([1, 20, 50, 100, 400])
+        assert chunk_texts(text, max_size) == original_chunking(text, max_size), (text, max_size)
+
+
+def test_text_limit_is_a_prefix():
+    rng = random.Random(1)
+    text = make_text(4, seed=2)
+    for chunk in build_chunks(text, 500):
+        full = chunk.text()
+        for limit in [0, 1, len(full) - 1, len(full), len(full) + 5] + [rng.randrange(len(full)) for _ in range(5)]:
+            assert chunk.text(limit) == full[:limit]
@@ -0,0 +1,87 @@
+"""Latency budget estimates must recover from a slow outlier"""
+import threading
+import time
+
+from deadline import CallEstimates, Deadline
+from inference_scheduler import InferenceScheduler, ScheduledPipeline
+
+
+def test_probe_replaces_an_outlier_estimate():
+    estimates = CallEstimates(probe_interval_s=60.0)
+    estimates.observe("summarize", 30.0)
+
+    deadline = Deadline(5.0, reserve_s=0.5, estimates=estimates)
+    assert deadline.allows("summarize")  # the probe
+    with deadline.timed("summarize"):
+        time.sleep(0.01)
+    assert estimates.estimate("summarize") < 1.0
+
+    # Back within budget: allowed without using up a probe
+    assert Deadline(5.0, estimates=estimates).allows("summarize")
+
+
+def test_only_one_probe_per_interval():
+    estimates = CallEstimates(probe_interval_s=60.0)
+    estimates.observe("summarize", 30.0)
+    assert Deadline(5.0, estimates=estimates).allows("summarize")
+    assert not Deadline(5.0, estimates=estimates).allows("summarize")
+    # No probe once the budget itself is used up
+    estimates = CallEstimates(probe_interval_s=60.0)
+    estimates.observe("summarize", 30.0)
+    assert not Deadline(0.5, reserve_s=0.5, estimates=estimates).allows("summarize")
+
+
+def test_estimates_expire():
+    estimates = CallEstimates(max_age_s=0.05)
+    estimates.observe("summarize", 30.0)
+    assert estimates.estimate("summarize") == 30.0
+    time.sleep(0.1)
+    assert estimates.estimate("summarize") == 0.0
+
+
+def test_estimate_scales_with_input_tokens():
+    estimates = CallEstimates()
+    estimates.observe("summarize", 4.0, tokens=800)
+    assert estimates.estimate("summarize", tokens=100) == 0.5
+    assert estimates.estimate("summarize", tokens=1600) == 8.0
+    assert estimates.estimate("summarize") == 4.0
+
+    deadline = Deadline(2.0, reserve_s=0.5, estimates=estimates)
+    assert deadline.allows("summarize", tokens=100)
+
+
+def test_slot_wait_is_not_model_time():
+    scheduler = InferenceScheduler(1)
+    estimates = CallEstimates()
+    deadline = Deadline(estimates=estimates)
+    pipeline = ScheduledPipeline(lambda text: time.sleep(0.02), scheduler, "summary", deadline)
+
+    waiter = threading.Thread(target=_timed_call, args=(deadline, pipeline))
+    with scheduler.slot("qa"):
+        # Hold the only slot while the pipeline call queues behind it
+        waiter.start()
+        time.sleep(0.3)
+    waiter.join()
+
+    assert deadline.queued_s >= 0.25
+    assert estimates.estimate("summarize") < 0.2
+    assert deadline.model_s < 0.2
+
+
+def _timed_call(deadline, pipeline):
+    with deadline.timed("summarize"):
+        pipeline("text")
+
+
+def test_app_recovers_after_a_slow_call(flask_app):
+    from synthetic_docs import make_text
+    estimates = CallEstimates(probe_interval_s=60.0)
+    operation = f"summarize:{flask_app.model_tier}:{flask_app.DECODING_PROFILE}"
+    estimates.observe(operation, 30.0)
+    text = make_text(1, seed=3)
+
+    first = flask_app.process_input(text, deadline=Deadline(5.0, estimates=estimates))
+    assert first["Processing Stats"]["Latency Budget"]["Degraded Stages"] == []
+    assert estimates.estimate(operation) < 1.0
+    second = flask_app.process_input(text, deadline=Deadline(5.0, estimates=estimates))
+    assert second["Processing Stats"]["Latency Budget"]["Degraded Stages"] == []
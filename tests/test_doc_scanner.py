@@ -0,0 +1,100 @@
+"""scan_document() against the per-keyword text scans app.py used to run
+
+process_document() typed the document with ``keyword in text.upper()`` and
+create_comprehensive_summary() re-lowered the text for every keyword, split
+it to count words and ran two regexes. The shared scan must give the same
+document type, counts, years, percentages, technologies and resume signals.
+"""
+import random
+import re
+
+import pytest
+
+from doc_scanner import count_words, find_percentages, find_years, scan_document
+from synthetic_docs import make_text
+
+DOC_TYPE_KEYWORDS = ['EDUCATION', 'EXPERIENCE', 'SKILLS', 'PROJECTS', 'RESUME', 'CV']
+TECH_KEYWORDS = ['Python', 'Java', 'JavaScript', 'React', 'Node.js', 'SQL', 'Machine Learning', 'AI', 'Data Science', 'HTML', 'CSS']
+RESUME_SIGNALS = [
+    ['experience', 'work', 'job', 'company'],
+    ['education', 'degree', 'university', 'college'],
+    ['skill', 'technology', 'programming', 'software'],
+    ['project', 'developed', 'built', 'created'],
+]
+
+GOLDEN_INPUTS = [
+    "",
+    "   \n\t ",
+    "John Smith, Python developer. EXPERIENCE: 2019-2023 at ACME, react and node.js. john@example.com",
+    "Revenue grew 12.5% in 2021 and 7% in 2022; margin 3.% and .5% and 40%x and 1999s and x2000",
+    "ßKILLS and Straße: 'ß'.upper() is 'SS', so SSKILLS counts as SKILLS",
+    "İstanbul Üniversitesi EDUCATİON, e mail\xa0word\x1cword\x85end ٣٤% ٢٠٢٠ 2020",
+    "machine\nlearning is not Machine Learning, but machine learning is; data science and html/css",
+    "cv cv CV curriculum vitae, emails: none, at-sign: @",
+]
+
+ALPHABET = (
+    list("abcdxyzABCDXYZ0123456789_ .,;:%@-") + ["\n", "\t", "\xa0", " ", "\x1c", "\x85"]
+    + ["19", "20", "2023", "12.5%", "%", ".5", "ß", "İ", "ﬁ", "٣", "²", "é"]
+    + DOC_TYPE_KEYWORDS + TECH_KEYWORDS + [word for words in RESUME_SIGNALS for word in words]
+    + ["email", "Email", "skills", "cv", "node.js", "SQLite"]
+)
+
+
+def original_analysis(text):
+    is_resume = any(keyword in text.upper() for keyword in DOC_TYPE_KEYWORDS)
+    word_count = len(text.split())
+    char_count = len(text)
+    years = re.findall(r'\b(19|20)\d{2}\b', text)
+    percentages = re.findall(r'\b\d+\.?\d*%\b', text)
+    found_tech = [tech for tech in TECH_KEYWORDS if tech.lower() in text.lower()]
+    signals = ['email' in text.lower() or '@' in text]
+    signals += [any(word in text.lower() for word in words) for words in RESUME_SIGNALS]
+    return is_resume, word_count, char_count, years, percentages, found_tech, signals
+
+
+def scanned_analysis(text):
+    scan = scan_document(text)
+    is_resume = scan.contains_any_upper(DOC_TYPE_KEYWORDS)
+    years = [year[:2] for year in scan.years]
+    found_tech = [tech for tech in TECH_KEYWORDS if scan.contains(tech)]
+    signals = [scan.contains('email') or scan.has_at_sign]
+    signals += [scan.contains_any(words) for words in RESUME_SIGNALS]
+    return is_resume, scan.word_count, scan.char_count, years, scan.percentages, found_tech, signals
+
+
+def random_texts(count=3000, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40)))
+
+
+@pytest.mark.parametrize("text", GOLDEN_INPUTS)
+def test_golden_analysis_unchanged(text):
+    assert scanned_analysis(text) == original_analysis(text)
+
+
+def test_documents_analysis_unchanged():
+    for seed in range(20):
+        text = make_text(1 + seed % 4, seed, resume=seed % 2 == 0)
+        assert scanned_analysis(text) == original_analysis(text), seed
+
+
+def test_random_texts_analysis_unchanged():
+    for text in random_texts():
+        assert scanned_analysis(text) == original_analysis(text), repr(text)
+
+
+def test_helpers_match_their_regexes():
+    for text in list(random_texts(2000, seed=1)) + GOLDEN_INPUTS:
+        assert count_words(text) == len(text.split()), repr(text)
+        assert find_years(text) == re.findall(r'\b(?:19|20)\d{2}\b', text), repr(text)
+        assert find_percentages(text) == re.findall(r'\b\d+\.?\d*%\b', text), repr(text)
+
+
+def test_contains_upper_matches_uppercased_text():
+    keywords = DOC_TYPE_KEYWORDS + ["Skills", "cv", "SS", "ß", "İ", "FI", "É"]
+    for text in list(random_texts(2000, seed=2)) + GOLDEN_INPUTS:
+        scan = scan_document(text)
+        for keyword in keywords:
+            assert scan.contains_upper(keyword) == (keyword in text.upper()), (keyword, text)
@@ -0,0 +1,78 @@
+"""Background uploads stay bounded: queued builds, evictions and admission"""
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController
+from document_store import DocumentStore, StoreFull
+
+
+def blocked_store(release, max_documents=32, max_pending=8):
+    """A one-worker store whose first build holds the worker until ``release`` is set"""
+    store = DocumentStore(max_documents, workers=1, max_pending=max_pending)
+    first = store.submit(release.wait)
+    return store, first
+
+
+def test_pending_builds_are_bounded():
+    release = threading.Event()
+    store, first = blocked_store(release, max_pending=3)
+    store.submit(len, "a")
+    store.submit(len, "b")
+    with pytest.raises(StoreFull):
+        store.submit(len, "c")
+
+    release.set()
+    store.get(first).wait(5)
+    store._executor.shutdown(wait=True)
+    assert store.pending == 0
+
+
+def test_eviction_cancels_queued_builds():
+    release = threading.Event()
+    store, first = blocked_store(release, max_documents=2)
+    queued = store.submit(len, "a")
+    queued_future = store.get(queued).future
+    store.submit(len, "b")
+    store.submit(len, "c")
+
+    # Both evicted; only the one still waiting for the worker is cancelled
+    assert store.get(first) is None and store.get(queued) is None
+    assert queued_future.cancelled()
+    assert store.pending == 3
+    release.set()
+    store._executor.shutdown(wait=True)
+    assert store.pending == 0
+
+
+def test_upload_goes_through_admission(flask_app, monkeypatch):
+    admission = AdmissionController(capacity=1.0, fast_lane_capacity=0.0, small_cost=0.0)
+    monkeypatch.setattr(flask_app, "ADMISSION", admission)
+    release = threading.Event()
+    monkeypatch.setattr(flask_app, "warm_document", lambda text: release.wait(5))
+    client = flask_app.app.test_client()
+
+    first = client.post('/upload', data={'text_input': 'short text'})
+    assert first.get_json()['success']
+    # The warm-up holds its cost until it finishes
+    rejected = client.post('/upload', data={'text_input': 'short text'})
+    assert rejected.status_code == flask_app.ADMISSION_STATUS
+    assert rejected.headers['Retry-After']
+
+    release.set()
+    flask_app.DOCUMENTS.get(first.get_json()['document_id']).wait(5)
+    # (done callbacks run just after wait() returns)
+    give_up = time.perf_counter() + 5
+    while admission.snapshot()["main"]["in_flight"] and time.perf_counter() < give_up:
+        time.sleep(0.01)
+    assert admission.snapshot()["main"]["in_flight"] == 0
+    assert client.post('/upload', data={'text_input': 'short text'}).get_json()['success']
+
+
+def test_full_warmup_queue_is_retried_later(flask_app, monkeypatch):
+    monkeypatch.setattr(flask_app, "ADMISSION", None)
+    monkeypatch.setattr(flask_app, "DOCUMENTS", DocumentStore(max_pending=0))
+    response = flask_app.app.test_client().post('/upload', data={'text_input': 'short text'})
+    assert response.status_code == flask_app.ADMISSION_STATUS
+    assert response.headers['Retry-After'] == '1'
@@ -0,0 +1,37 @@
+"""Page-by-page PDF preparation (STREAM_PDF_PAGES) against whole-document preparation"""
+from pdf_text import iter_pdf_pages
+from perf_metrics import StageTimer
+from synthetic_docs import make_pdf
+from text_normalize import normalize_pages
+
+
+def read(flask_app, monkeypatch, path, stream):
+    monkeypatch.setattr(flask_app, "STREAM_PDF_PAGES", stream)
+    stats = {"pages": None}
+    raw_text, prepared = flask_app.read_document(path, True, stats, StageTimer())
+    return raw_text, prepared, stats
+
+
+def test_streamed_pdf_matches_per_page_cleanup(flask_app, monkeypatch, tmp_path):
+    for seed, resume in ((0, False), (1, True)):
+        path = tmp_path / f"doc{seed}.pdf"
+        path.write_bytes(make_pdf(6, seed=seed, resume=resume))
+        whole_raw, whole, whole_stats = read(flask_app, monkeypatch, str(path), False)
+        streamed_raw, streamed, streamed_stats = read(flask_app, monkeypatch, str(path), True)
+
+        assert streamed_stats == whole_stats == {"pages": 6}
+        assert streamed_raw == streamed["text"]
+        assert streamed["is_resume"] == whole["is_resume"] == resume
+        pages = list(normalize_pages(iter_pdf_pages(str(path))))
+        assert streamed["text"] == ' '.join(cleaned for cleaned, _ in pages)
+        assert streamed["chunks"][0].buffer == ' '.join(normalized for _, normalized in pages)
+        # Only page seams differ: the same words, give or take page numbers
+        assert abs(len(streamed["text"].split()) - len(whole["text"].split())) <= 6
+
+
+def test_unreadable_pdf(flask_app, monkeypatch, tmp_path):
+    path = tmp_path / "bad.pdf"
+    path.write_bytes(b"not a pdf")
+    for stream in (False, True):
+        _, prepared, _ = read(flask_app, monkeypatch, str(path), stream)
+        assert prepared["chunks"] == []
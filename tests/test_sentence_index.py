@@ -0,0 +1,81 @@
+"""SentenceIndex rankings against the scoring loop smart_text_qa() used to run
+
+app.py (which needs streamlit) ranks sentences with
+``index.score_sentences(question_words, min_length=10, weight=3)``; the old
+loop scored 2 for a question word anywhere in the sentence plus 1 for one
+inside a token. Both must give the same sentences, scores and order.
+"""
+import json
+import os
+import random
+
+import pytest
+
+from sentence_index import SentenceIndex
+from synthetic_docs import make_text
+
+CORPUS = os.path.join(os.path.dirname(__file__), os.pardir, 'eval_corpus', 'sample.jsonl')
+
+
+def original_ranking(question, text):
+    question_words = [word.lower() for word in question.split() if len(word) > 2]
+    sentences = [s.strip() for s in text.split('.') if len(s.strip()) > 10]
+    scored_sentences = []
+    for sentence in sentences:
+        sentence_lower = sentence.lower()
+        exact_matches = sum(2 for word in question_words if word in sentence_lower)
+        partial_matches = sum(1 for word in question_words if any(word in w for w in sentence_lower.split()))
+        total_score = exact_matches + partial_matches
+        if total_score > 0:
+            scored_sentences.append((sentence, total_score))
+    scored_sentences.sort(key=lambda x: x[1], reverse=True)
+    return scored_sentences
+
+
+def indexed_ranking(question, index):
+    question_words = [word.lower() for word in question.split() if len(word) > 2]
+    return [(index.sentence(sid), score)
+            for sid, score in index.score_sentences(question_words, min_length=10, weight=3)]
+
+
+def corpus_cases():
+    with open(CORPUS, encoding='utf-8') as f:
+        for line in f:
+            item = json.loads(line)
+            questions = [pair["question"] for pair in item["qa"]]
+            yield item["id"], item["text"], questions
+
+
+@pytest.mark.parametrize("doc_id,text,questions", list(corpus_cases()))
+def test_eval_corpus_rankings_unchanged(doc_id, text, questions):
+    index = SentenceIndex(text)
+    questions = questions + ["What is the main topic?", "Summarize the key findings",
+                             "experience skills education", "the the and and"]
+    for question in questions:
+        assert indexed_ranking(question, index) == original_ranking(question, text), question
+
+
+def test_synthetic_rankings_unchanged():
+    rng = random.Random(0)
+    for seed in range(40):
+        text = make_text(rng.randint(1, 4), seed, resume=seed % 3 == 0)
+        index = SentenceIndex(text)
+        words = text.split()
+        for _ in range(10):
+            # Whole words, word fragments and words not in the text, with repeats
+            picked = [rng.choice(words) for _ in range(rng.randint(1, 6))]
+            picked += [word[1:-1] for word in picked if len(word) > 4][:2]
+            picked += rng.sample(["zzz", "data", "Data", "ing", "the", "x", "Q4", "results"], 2)
+            question = ' '.join(picked + picked[:rng.randint(0, 2)])
+            assert indexed_ranking(question, index) == original_ranking(question, text), question
+
+
+def test_random_texts_rankings_unchanged():
+    rng = random.Random(1)
+    alphabet = list("abcdeABCDE  ...\n\t,;") + ["data", "report", "Éclair", "İstanbul", "ß", "e.g"]
+    for _ in range(500):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 200)))
+        index = SentenceIndex(text)
+        question = ' '.join(''.join(rng.choice("abcdeABCDE") for _ in range(rng.randint(1, 5)))
+                            for _ in range(rng.randint(1, 5)))
+        assert indexed_ranking(question, index) == original_ranking(question, text), (question, text)
@@ -0,0 +1,65 @@
+"""summarize_document() must never make more summarizer calls than before the decoding changes
+
+Before them, a multi-chunk document always had every chunk summarized and
+got a final combine pass only when the section summaries came to more than
+300 words. The skip gates may only remove calls from that.
+"""
+import random
+
+import pytest
+
+from chunker import build_chunks
+from sentence_index import SentenceIndex
+from synthetic_docs import make_text
+
+
+class CountingSummarizer:
+    def __init__(self, summarizer):
+        self.summarizer = summarizer
+        self.inputs = []
+
+    def __call__(self, inputs, **kwargs):
+        self.inputs.append(inputs)
+        return self.summarizer(inputs, **kwargs)
+
+
+def multi_chunk_document(paragraphs, seed):
+    rng = random.Random(seed)
+    words = make_text(1, seed).split()
+    text = '\n\n'.join(' '.join(rng.choice(words) for _ in range(rng.randint(20, 260))) + '.'
+                       for _ in range(paragraphs))
+    return {"text": text, "is_resume": False, "chunks": build_chunks(text), "index": SentenceIndex(text)}
+
+
+@pytest.mark.parametrize("profile", ["model", "fast", "balanced", "quality"])
+def test_combine_calls_do_not_increase(flask_app, profile):
+    baseline_combines = []
+    for seed in range(40):
+        prepared = multi_chunk_document(2 + seed % 12, seed)
+        chunks = len(prepared["chunks"])
+        if chunks < 2:
+            continue
+        summarizer = CountingSummarizer(flask_app.summarizer)
+        models = {"tier": "stub", "summarizer": summarizer, "qa": flask_app.qa_pipeline}
+        summary = flask_app.summarize_document(prepared, models=models, decoding_profile=profile)
+
+        assert summarizer.inputs[:chunks] == flask_app.summary_inputs(prepared["chunks"])
+        combines = len(summarizer.inputs) - chunks
+        # The section summaries: the combine pass's input, else the summary itself
+        combined = summarizer.inputs[-1] if combines else summary
+        baseline = int(len(combined.split()) > 300)
+        assert combines <= baseline
+        baseline_combines.append(baseline)
+    # Both sides of the 300-word gate were exercised
+    assert 0 in baseline_combines and 1 in baseline_combines
+
+
+def test_sentence_index_is_built_only_when_needed(flask_app):
+    prepared = flask_app.prepare_document(make_text(2, seed=5))
+    flask_app.summarize_document(prepared)
+    assert prepared["index"] is None
+
+    flask_app.retrieve_context("What were the results?", prepared)
+    index = prepared["index"]
+    assert index is not None and index.text == prepared["chunks"][0].buffer
+    assert flask_app.document_index(prepared) is index
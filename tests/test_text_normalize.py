@@ -0,0 +1,120 @@
+"""text_normalize against the re.sub() chains it replaced in the apps
+
+app.py runs both helpers without the extra fixes; working_flask_app.py and
+flask_app.py run them with ocr_fixes/resume_fixes. Each flag set must give
+byte-identical output to the original chain. normalize_pages() is the same
+per page, and only differs from whole-document cleanup at page seams.
+"""
+import random
+import re
+
+import pytest
+
+from text_normalize import clean_text, normalize_pages, normalize_text
+
+
+def original_preprocessing(text, ocr_fixes):
+    text = re.sub(r'\s+', ' ', text.strip())
+    text = re.sub(r'[^\w\s\.\,\!\?\;\:\-\(\)]', ' ', text)
+    text = re.sub(r'(\w+)([A-Z])', r'\1. \2', text)
+    text = re.sub(r'\b\d+\s*$', '', text, flags=re.MULTILINE)
+    if ocr_fixes:
+        text = re.sub(r'\bl\b', 'I', text)
+        text = re.sub(r'\b0\b', 'O', text)
+    return text.strip()
+
+
+def original_resume_cleanup(text, resume_fixes):
+    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
+    text = re.sub(r'\s+', ' ', text.strip())
+    text = re.sub(r'(\w+)\s*[Ó•·]\s*(\d)', r'\1 \2', text)
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    text = re.sub(r'(\w)@(\w)', r'\1@\2', text)
+    if resume_fixes:
+        text = re.sub(r'(\d{2})-(\d{10})', r'+91-\2', text)
+        for section in ['EDUCATION', 'EXPERIENCE', 'PROJECTS', 'SKILLS', 'CONTACT', 'SUMMARY']:
+            text = re.sub(rf'{section}[.]*\s*([A-Z])', rf'{section}\n\1', text)
+        text = re.sub(r'(\w+)\s+gmail\s*[.\s]*com', r'\1@gmail.com', text)
+        text = re.sub(r'([Ll]inkedin|[Gg]ithub)\s*[:\s]*([a-zA-Z0-9_-]+)', r'\1: \2', text)
+    return text.strip()
+
+
+# app.py passes False; working_flask_app.py and flask_app.py pass True
+FLAGS = [False, True]
+
+GOLDEN_INPUTS = [
+    "",
+    "   \n\t ",
+    "Hello World",
+    "John DoeEXPERIENCE Software engineer at ACME 2019-2023\nPage 12",
+    "l think 0 is the answer, not l0 or 0l.",
+    "EDUCATION. B.Tech EXPERIENCEDUCATION SKILLS:Python",
+    "Contact: john.doe gmail . com | linkedin : jdoe | Github  jd-01",
+    "Call 91-9876543210 or 12-1234567890 today",
+    "Résumé • 98765 · naïve café — “quotes” ٣٤ 42",
+    "camelCaseWordsJoinedTogether and ABCDef GHI",
+    "Total revenue: $1,200 (up 12%) & costs @ 5/unit #tag\r\n\x0b\x1c3",
+    "Summary of results 2023\n\n17   ",
+    "user@example.com mail me at a@b",
+]
+
+ALPHABET = (
+    list("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789l0l0AZ_")
+    + list(" \n\t\r\x0b\x0c\x1c\x85\xa0.,!?;:-()@#$%&*/'\"")
+    + ["é", "•", "·", "Ó", "—", "٣", "²", "ß", "İ"]
+    + ["EDUCATION", "EXPERIENCE", "SKILLS", "SUMMARY", "gmail", " gmail . com",
+       "linkedin", "Github", "91-", "1234567890", "Page 3\n"]
+)
+
+
+def random_texts(count=3000, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 60)))
+
+
+@pytest.mark.parametrize("flag", FLAGS)
+@pytest.mark.parametrize("text", GOLDEN_INPUTS)
+def test_golden_matches_original(flag, text):
+    assert normalize_text(text, ocr_fixes=flag) == original_preprocessing(text, flag)
+    assert clean_text(text, resume_fixes=flag) == original_resume_cleanup(text, flag)
+
+
+@pytest.mark.parametrize("flag", FLAGS)
+def test_random_texts_match_original(flag):
+    for text in random_texts():
+        assert normalize_text(text, ocr_fixes=flag) == original_preprocessing(text, flag), repr(text)
+        assert clean_text(text, resume_fixes=flag) == original_resume_cleanup(text, flag), repr(text)
+
+
+@pytest.mark.parametrize("flag", FLAGS)
+def test_full_pipeline_matches_original(flag):
+    # The apps clean first, then preprocess the cleaned text for chunking
+    for text in list(random_texts(1000, seed=1)) + GOLDEN_INPUTS:
+        expected = original_preprocessing(original_resume_cleanup(text, flag), flag)
+        assert normalize_text(clean_text(text, flag), flag) == expected, repr(text)
+
+
+@pytest.mark.parametrize("flag", FLAGS)
+def test_pages_match_original_per_page(flag):
+    pages = list(random_texts(500, seed=2))
+    expected = []
+    for page in pages:
+        cleaned = original_resume_cleanup(page, flag)
+        if cleaned:
+            expected.append((cleaned, original_preprocessing(cleaned, flag)))
+    assert list(normalize_pages(pages, flag, flag)) == expected
+
+
+def test_pages_seams():
+    pages = ["revenue grew in 2023.\n\n1\n", "", "   ", "SKILLS\n", "Python and sql.\n\n2"]
+    result = list(normalize_pages(pages))
+    # Empty pages are skipped, and every page's number goes
+    assert [cleaned for cleaned, _ in result] == ["revenue grew in 2023. 1", "SKILLS", "Python and sql. 2"]
+    # ('SKILL. S' is the original missing-period rule at work)
+    assert [normalized for _, normalized in result] == ["revenue grew in 2023.", "SKILL. S", "Python and sql."]
+    # Whole-document cleanup keeps the inner page number and moves the
+    # header's next word (here on the next page) onto its own line
+    whole = clean_text(''.join(pages))
+    assert whole == "revenue grew in 2023. 1 SKILLS\nPython and sql. 2"
+    assert normalize_text(whole) == "revenue grew in 2023. 1 SKILL. S Python and sql."
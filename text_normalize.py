@@ -0,0 +1,126 @@
+import re
+
+# Every pattern is compiled once at import. The helpers below produce exactly
+# the same text as the original chains of re.sub() calls in the apps, with
+# fewer full-size passes over the document:
+#
+# * whitespace is collapsed with split()/join(), which uses the same notion of
+#   whitespace as \s and is several times faster than re.sub(r'\s+', ...)
+# * special characters in ASCII text are blanked with one bytes.translate()
+# * the trailing page number is only looked for at the end of the text
+# * the two OCR fixes ('l' -> 'I', '0' -> 'O') run as a single pass
+# * patterns that can only fire on a literal ('gmail', 'inkedin', section
+#   headers) are skipped when the literal is absent
+
+NON_ASCII_PATTERN = re.compile(r'[^\x00-\x7F]+')
+SPECIAL_CHAR_PATTERN = re.compile(r'[^\w\s\.\,\!\?\;\:\-\(\)]')
+# The last capital of a word that has word characters before it, which is
+# where r'(\w+)([A-Z])' inserts its '. ' (without its quadratic backtracking)
+MISSING_PERIOD_PATTERN = re.compile(r'[A-Z](?<=\w[A-Z])(?=[^\WA-Z]*(?!\w))')
+OCR_TOKEN_PATTERN = re.compile(r'[l0]\b(?<!\w\w)')
+JOINED_WORDS_PATTERN = re.compile(r'[A-Z](?<=[a-z][A-Z])')
+PHONE_PATTERN = re.compile(r'(\d{2})-(\d{10})')
+GMAIL_PATTERN = re.compile(r'(\w+)\s+gmail\s*[.\s]*com')
+SOCIAL_PATTERN = re.compile(r'([Ll]inkedin|[Gg]ithub)\s*[:\s]*([a-zA-Z0-9_-]+)')
+
+RESUME_SECTIONS = ['EDUCATION', 'EXPERIENCE', 'PROJECTS', 'SKILLS', 'CONTACT', 'SUMMARY']
+# Applied one after another, in this order: fusing them into one alternation
+# changes the result when headers run into each other ("EXPERIENCEDUCATION")
+SECTION_PATTERNS = [(section, re.compile(rf'{section}[.]*\s*([A-Z])'), rf'{section}\n\1')
+                    for section in RESUME_SECTIONS]
+
+_KEEP_CHARS = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.,!?;:-()')
+_SPECIAL_CHAR_TABLE = bytes(i if chr(i) in _KEEP_CHARS or chr(i).isspace() else 32 for i in range(256))
+_OCR_FIXES = {'l': 'I', '0': 'O'}
+
+
+def collapse_whitespace(text):
+    """Same as re.sub(r'\\s+', ' ', text.strip())"""
+    return ' '.join(text.split())
+
+
+def replace_special_chars(text):
+    """Same as re.sub(r'[^\\w\\s\\.\\,\\!\\?\\;\\:\\-\\(\\)]', ' ', text)"""
+    if text.isascii():
+        return text.encode('ascii').translate(_SPECIAL_CHAR_TABLE).decode('ascii')
+    return SPECIAL_CHAR_PATTERN.sub(' ', text)
+
+
+def strip_trailing_number(text):
+    """Same as re.sub(r'\\b\\d+\\s*$', '', text, flags=re.MULTILINE) on single-line text"""
+    end = len(text.rstrip())
+    start = end
+    while start > 0 and text[start - 1].isdecimal():
+        start -= 1
+    if start == end:
+        return text
+    if start > 0 and (text[start - 1].isalnum() or text[start - 1] == '_'):
+        return text
+    return text[:start]
+
+
+def normalize_text(text, ocr_fixes=True):
+    """Whitespace/special-character cleanup behind advanced_text_preprocessing()
+
+    ``ocr_fixes`` adds the standalone 'l' -> 'I' and '0' -> 'O' replacements
+    done by the Flask apps.
+    """
+    text = replace_special_chars(collapse_whitespace(text))
+    text = MISSING_PERIOD_PATTERN.sub(r'. \g<0>', text)
+    # Whitespace is collapsed, so the text is one line and the MULTILINE '$'
+    # of the page-number regex can only match at the very end
+    text = strip_trailing_number(text)
+    if ocr_fixes:
+        text = OCR_TOKEN_PATTERN.sub(lambda match: _OCR_FIXES[match.group()], text)
+    return text.strip()
+
+
+def clean_text(text, resume_fixes=True):
+    """Artifact cleanup behind clean_resume_text()
+
+    The bullet-before-digit and '@' substitutions of the original functions
+    are left out: non-ASCII bullets are already gone when they run, and
+    r'\\1@\\2' rewrites every '(\\w)@(\\w)' match to itself.
+
+    ``resume_fixes`` adds the phone, section header, gmail and LinkedIn/GitHub
+    fixes done by the Flask apps.
+    """
+    if not text.isascii():
+        text = NON_ASCII_PATTERN.sub(' ', text)
+    text = collapse_whitespace(text)
+    text = JOINED_WORDS_PATTERN.sub(r' \g<0>', text)
+
+    if resume_fixes:
+        if '-' in text:
+            text = PHONE_PATTERN.sub(r'+91-\2', text)
+        for section, pattern, replacement in SECTION_PATTERNS:
+            if section in text:
+                text = pattern.sub(replacement, text)
+        if 'gmail' in text:
+            text = GMAIL_PATTERN.sub(r'\1@gmail.com', text)
+        if 'inkedin' in text or 'ithub' in text:
+            text = SOCIAL_PATTERN.sub(r'\1: \2', text)
+
+    return text.strip()
+
+
+
+def normalize_pages(pages, resume_fixes=True, ocr_fixes=True):
+    """Streaming mode: clean and normalize a document one page at a time
+
+    Yields ``(cleaned, normalized)`` for each page with text left after
+    cleanup: ``clean_text(page)`` and ``normalize_text()`` of that. A large
+    PDF therefore never has to be held (or copied by every pass) as one
+    string. Pages are processed independently, so joining them with ' ' is
+    not byte-identical to processing the whole text:
+
+    * a pattern that straddles a page break (a section header followed by
+      the next page's first word, a name and 'gmail' on the next page) is
+      left alone
+    * a number at the end of every page (usually its page number) is
+      dropped, rather than only one at the end of the document
+    """
+    for page in pages:
+        cleaned = clean_text(page, resume_fixes)
+        if cleaned:
+            yield cleaned, normalize_text(cleaned, ocr_fixes)
@@ -0,0 +1,79 @@
+"""Load-adaptive choice between a primary and a fast model tier
+
+Every request asks the router for a tier when it starts (acquire) and
+reports its latency when it ends (release). The router serves the primary
+tier until the number of requests in flight or the p95 latency of recent
+requests passes its "high" threshold. It then serves the fast tier until
+both are back below their "low" thresholds and at least ``min_dwell_s``
+has passed since the last switch. The gap between the thresholds and the
+dwell time are the hysteresis that keeps it from flapping at the boundary.
+"""
+import threading
+import time
+from collections import deque
+
+from perf_metrics import percentile
+
+
+class TierRouter:
+    def __init__(self, primary, fast, high_in_flight=4, low_in_flight=1, high_p95_s=20.0, low_p95_s=8.0,
+                 window=50, min_dwell_s=10.0):
+        self.primary = primary
+        self.fast = fast
+        self.high_in_flight = high_in_flight
+        self.low_in_flight = low_in_flight
+        self.high_p95_s = high_p95_s
+        self.low_p95_s = low_p95_s
+        self.min_dwell_s = min_dwell_s
+        self.tier = primary
+        self.in_flight = 0
+        self.switches = 0
+        self.latencies = deque(maxlen=window)
+        self.served = {primary: 0, fast: 0}
+        self._switched_at = time.perf_counter() - min_dwell_s
+        self._lock = threading.Lock()
+
+    def _p95(self):
+        return percentile(list(self.latencies), 95) if self.latencies else 0.0
+
+    def _update(self):
+        now = time.perf_counter()
+        if now - self._switched_at < self.min_dwell_s:
+            return
+        p95 = self._p95()
+        if self.tier == self.primary:
+            overloaded = self.in_flight >= self.high_in_flight or p95 >= self.high_p95_s
+            if overloaded:
+                self.tier, self._switched_at = self.fast, now
+                self.switches += 1
+                # Latencies of the other tier say nothing about this one
+                self.latencies.clear()
+        elif self.in_flight <= self.low_in_flight and p95 <= self.low_p95_s:
+            self.tier, self._switched_at = self.primary, now
+            self.switches += 1
+            self.latencies.clear()
+
+    def acquire(self):
+        """Tier for a request that is starting now"""
+        with self._lock:
+            self.in_flight += 1
+            self._update()
+            self.served[self.tier] += 1
+            return self.tier
+
+    def release(self, seconds):
+        """A request finished after ``seconds``"""
+        with self._lock:
+            self.in_flight -= 1
+            self.latencies.append(seconds)
+            self._update()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "Current Tier": self.tier,
+                "In Flight": self.in_flight,
+                "Recent p95 s": round(self._p95(), 4),
+                "Switches": self.switches,
+                "Served": dict(self.served),
+            }
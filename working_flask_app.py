@@ -1,33 +1,187 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, send_from_directory
 import os
-import fitz
-from transformers import pipeline
 from werkzeug.utils import secure_filename
 import tempfile
 import time
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeoutError
 import re
+import tracemalloc
 import numpy as np
 
+import cancellation
+from admission import AdmissionController, Rejected, estimate_cost
+from cancellation import CancelToken, Cancelled, peer_closed
+from chunker import build_chunks
+from deadline import Deadline
+from decoding import (DECODING_PROFILES, MAX_CHARS_PER_TOKEN, MODEL_MAX_TOKENS, SKIPPED_CALLS, count_tokens,
+                      fits_summary, generation_kwargs, record_skipped)
+from document_store import DocumentStore, StoreFull
+from inference_scheduler import InferenceScheduler, ScheduledPipeline, SlotTimeout
+from model_tiers import load_pipeline, load_pipelines
+from pdf_text import extract_pdf_text, iter_pdf_pages, pdf_page_count
+from perf_log import document_hash, log_request
+from perf_metrics import StageTimer, top_allocations
+from request_profiler import PROFILE_DIR, RequestProfiler, profiling_options, save_profile
+from sentence_index import SentenceIndex
+from text_normalize import clean_text, normalize_pages, normalize_text
+from tier_router import TierRouter
+
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-this'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# MEMORY_PROFILE=1 adds per-stage peak traced memory, RSS deltas and the top
+# allocation sites to every response (slow; meant for one request at a time)
+MEMORY_PROFILE = os.environ.get('MEMORY_PROFILE') == '1'
+if MEMORY_PROFILE:
+    tracemalloc.start(int(os.environ.get('MEMORY_PROFILE_FRAMES', 1)))
+
+# STREAM_PDF_PAGES=1 cleans and normalizes PDFs page by page as they are
+# read, so a large PDF's raw text is never held as one string. Not
+# byte-identical to whole-document cleanup: patterns across a page break are
+# left alone and a trailing number is dropped on every page (see
+# text_normalize.normalize_pages()).
+STREAM_PDF_PAGES = os.environ.get('STREAM_PDF_PAGES') == '1'
+
+# (question, context) pairs per qa_pipeline forward pass in answer_questions()
+QA_BATCH_SIZE = int(os.environ.get('QA_BATCH_SIZE', 8))
+
+# Question words that say nothing about where the answer is
+QUESTION_STOPWORDS = frozenset([
+    'what', 'which', 'who', 'whom', 'whose', 'when', 'where', 'why', 'how', 'the', 'are', 'was', 'were',
+    'does', 'did', 'has', 'have', 'had', 'can', 'could', 'this', 'that', 'these', 'those', 'and', 'for',
+    'with', 'from', 'about', 'any', 'his', 'her', 'their', 'its', 'you', 'your', 'tell', 'list', 'describe',
+])
+
+# Model calls that may run at once (0: no scheduler). Waiting calls are
+# served by weighted fair queuing: questions before summaries before batch
+# work (see inference_scheduler.py)
+INFERENCE_SLOTS = int(os.environ.get('INFERENCE_SLOTS', 1))
+SCHEDULER = InferenceScheduler(INFERENCE_SLOTS) if INFERENCE_SLOTS else None
+
+# How the summarizer decodes: model (its own search settings), or the
+# cheaper fast/balanced and the 4-beam quality profiles (see decoding.py).
+# Summary lengths follow each input's token count. /process and /ask
+# requests may pick another profile with a decoding_profile field.
+DECODING_PROFILE = os.environ.get('DECODING_PROFILE', 'model')
+if DECODING_PROFILE not in DECODING_PROFILES:
+    raise ValueError(f"Unknown DECODING_PROFILE: {DECODING_PROFILE}")
+
+# Latency budget of a request in seconds (0 for none); requests may ask for
+# less with an X-Request-Budget header. Model calls that would not fit are
+# replaced by the extractive fallbacks (see deadline.py).
+REQUEST_BUDGET_S = float(os.environ.get('REQUEST_BUDGET_S', 25)) or None
+
+# Admission control for /process, /ask and /upload: capacity of the main lane and of
+# the fast lane for requests up to ADMISSION_SMALL_COST, in the cost units
+# of admission.py (about one per page or chunk); ADMISSION_CAPACITY=0 turns
+# it off. Rejected requests get ADMISSION_STATUS (429 or 503) and Retry-After.
+ADMISSION_CAPACITY = float(os.environ.get('ADMISSION_CAPACITY', 60))
+ADMISSION = AdmissionController(ADMISSION_CAPACITY,
+                                float(os.environ.get('ADMISSION_FAST_LANE', 12)),
+                                float(os.environ.get('ADMISSION_SMALL_COST', 3))) if ADMISSION_CAPACITY else None
+ADMISSION_STATUS = int(os.environ.get('ADMISSION_STATUS', 503))
+
+# Uploads prepared in the background (see /upload); the most recent
+# MAX_WARM_DOCUMENTS are kept, and at most MAX_PENDING_WARMUPS may be queued
+# or running (later uploads get ADMISSION_STATUS until some finish)
+DOCUMENTS = DocumentStore(int(os.environ.get('MAX_WARM_DOCUMENTS', 32)),
+                          int(os.environ.get('WARMUP_WORKERS', 2)),
+                          int(os.environ.get('MAX_PENDING_WARMUPS', 8)))
+
+# ADAPTIVE_TIERING=1 keeps the distil tier loaded next to the primary one
+# and sends requests to it while the server is overloaded (see tier_router.py)
+ADAPTIVE_TIERING = os.environ.get('ADAPTIVE_TIERING') == '1'
+FAST_TIER = "distil"
+
 # Global variables for models
 summarizer = None
 qa_pipeline = None
+model_tier = None
+# Loaded tiers: tier -> {"tier", "summarizer", "qa"}
+MODELS = {}
+TIER_ROUTER = None
 
 def load_models():
     """Load AI models with fallback options"""
-    global summarizer, qa_pipeline
+    if not load_primary_models():
+        return False
+    MODELS[model_tier] = active_models()
+    if ADAPTIVE_TIERING:
+        load_fast_tier()
+    return True
+
+def load_fast_tier():
+    """Load FAST_TIER next to the primary models and start routing between them"""
+    global TIER_ROUTER
+    backend = os.environ.get('MODEL_BACKEND', 'fp32')
+    primary = "large" if model_tier == "stub" else model_tier
+    if primary == FAST_TIER:
+        print("⚠️ Adaptive tiering off: the fast tier is already the primary one")
+        return
+    try:
+        print(f"- Loading the {FAST_TIER} tier for overload periods...")
+        fast_summarizer, fast_qa = load_pipelines(FAST_TIER, backend)
+    except Exception as e:
+        print(f"⚠️ Adaptive tiering off: {e}")
+        return
+    MODELS[FAST_TIER] = {"tier": FAST_TIER, "summarizer": fast_summarizer, "qa": fast_qa}
+    TIER_ROUTER = TierRouter(
+        model_tier, FAST_TIER,
+        high_in_flight=int(os.environ.get('TIER_HIGH_IN_FLIGHT', 4)),
+        low_in_flight=int(os.environ.get('TIER_LOW_IN_FLIGHT', 1)),
+        high_p95_s=float(os.environ.get('TIER_HIGH_P95_S', 20)),
+        low_p95_s=float(os.environ.get('TIER_LOW_P95_S', 8)),
+        min_dwell_s=float(os.environ.get('TIER_MIN_DWELL_S', 10)))
+    print(f"✅ Adaptive tiering: {model_tier} normally, {FAST_TIER} under load")
+
+def active_models():
+    """The primary tier's models, for callers that don't route by load"""
+    return {"tier": model_tier, "summarizer": summarizer, "qa": qa_pipeline}
+
+def use_models(tier, summarizer_pipeline, qa):
+    """Serve requests with these pipelines as the primary tier (e.g. the models eval_models.py compares)"""
+    global summarizer, qa_pipeline, model_tier
+    MODELS.pop(model_tier, None)
+    summarizer, qa_pipeline, model_tier = summarizer_pipeline, qa, tier
+    MODELS[tier] = active_models()
+
+def scheduled_models(models, batch=False, deadline=None):
+    """``models`` with their calls going through SCHEDULER in their priority class
     
-    print("🚀 Loading HIGH-ACCURACY AI models...")
+    With a ``deadline``, calls give up waiting for a slot (SlotTimeout) when
+    its time runs out or its request is cancelled.
+    """
+    if SCHEDULER is None:
+        return models
+    return dict(models,
+                summarizer=ScheduledPipeline(models["summarizer"], SCHEDULER, "batch" if batch else "summary",
+                                             deadline),
+                qa=ScheduledPipeline(models["qa"], SCHEDULER, "batch" if batch else "qa", deadline))
+
+def load_primary_models():
+    """Load the primary models: the large tier, or the distil tier if that fails"""
+    global summarizer, qa_pipeline, model_tier
+    
+    # MODEL_BACKEND picks how the models run: fp32 (default), int8, onnx, or
+    # stub for deterministic fake models (see model_tiers.py)
+    backend = os.environ.get('MODEL_BACKEND', 'fp32')
+    if backend == 'stub':
+        print("🧪 Loading STUB models (no inference, simulated latency)...")
+        summarizer, qa_pipeline = load_pipelines(backend='stub')
+        model_tier = "stub"
+        print("✅ SUCCESS: Stub models loaded!")
+        return True
+    
+    print(f"🚀 Loading HIGH-ACCURACY AI models ({backend})...")
     
     try:
         print("- Loading advanced BART-Large for summarization...")
-        summarizer = pipeline("summarization", model="facebook/bart-large-cnn", device=-1)
+        summarizer = load_pipeline("summarization", "large", backend)
         
         print("- Loading RoBERTa-Large for Q&A (much more accurate)...")
-        qa_pipeline = pipeline("question-answering", model="deepset/roberta-large-squad2", device=-1)
+        qa_pipeline = load_pipeline("question-answering", "large", backend)
+        model_tier = "large"
         
         print("✅ SUCCESS: High-accuracy models loaded!")
         return True
@@ -36,10 +190,11 @@ def load_models():
         print(f"⚠️ Loading fallback models due to: {e}")
         try:
             print("- Loading DistilBART for summarization...")
-            summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6", device=-1)
+            summarizer = load_pipeline("summarization", "distil", backend)
             
             print("- Loading DistilBERT for Q&A...")
-            qa_pipeline = pipeline("question-answering", model="distilbert-base-cased-distilled-squad", device=-1)
+            qa_pipeline = load_pipeline("question-answering", "distil", backend)
+            model_tier = "distil"
             
             print("✅ SUCCESS: Fallback models loaded!")
             return True
@@ -75,111 +230,19 @@ def safe_delete_file(file_path, max_retries=3, delay=0.1):
 
 def advanced_text_preprocessing(text):
     """Enhanced text preprocessing"""
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text.strip())
-    
-    # Remove special characters but keep punctuation
-    text = re.sub(r'[^\w\s\.\,\!\?\;\:\-\(\)]', ' ', text)
-    
-    # Fix common OCR errors
-    text = re.sub(r'(\w+)([A-Z])', r'\1. \2', text)
-    text = re.sub(r'\b\d+\s*$', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\bl\b', 'I', text)
-    text = re.sub(r'\b0\b', 'O', text)
-    
-    return text.strip()
+    return normalize_text(text, ocr_fixes=True)
 
 def intelligent_chunking(text, max_size=1500):
     """Smart text chunking with context preservation"""
-    text = advanced_text_preprocessing(text)
-    paragraphs = [p.strip() for p in text.split('\n\n') if len(p.strip()) > 20]
-    
-    chunks = []
-    current_chunk = ""
-    
-    for paragraph in paragraphs:
-        if len(current_chunk) + len(paragraph) > max_size and current_chunk:
-            chunks.append(current_chunk.strip())
-            
-            # Add overlap for context
-            sentences = current_chunk.split('.')
-            if len(sentences) > 2:
-                overlap = '. '.join(sentences[-2:]) + '. '
-                current_chunk = overlap + paragraph
-            else:
-                current_chunk = paragraph
-        else:
-            if current_chunk:
-                current_chunk += "\n\n" + paragraph
-            else:
-                current_chunk = paragraph
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks if chunks else [text]
+    return build_chunks(advanced_text_preprocessing(text), max_size)
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from PDF with enhanced methods"""
-    doc = None
-    try:
-        doc = fitz.open(pdf_path)
-        full_text = ""
-        
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            
-            # Try structured text extraction first
-            text_dict = page.get_text("dict")
-            page_text = ""
-            
-            for block in text_dict["blocks"]:
-                if "lines" in block:
-                    for line in block["lines"]:
-                        line_text = ""
-                        for span in line["spans"]:
-                            line_text += span["text"]
-                        if line_text.strip():
-                            page_text += line_text + "\n"
-                    page_text += "\n"
-            
-            # Fallback to simple text extraction
-            if not page_text.strip():
-                page_text = page.get_text()
-            
-            full_text += page_text
-        
-        return full_text
-        
-    except Exception as e:
-        print(f"PDF extraction error: {e}")
-        return ""
-    finally:
-        if doc:
-            doc.close()
+def extract_text_from_pdf(pdf_path, stats=None):
+    """Extract text from PDF with enhanced methods (see pdf_text.py)"""
+    return extract_pdf_text(pdf_path, stats)
 
 def clean_resume_text(text):
     """Clean resume-specific text artifacts"""
-    # Remove non-ASCII characters
-    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
-    text = re.sub(r'\s+', ' ', text.strip())
-    
-    # Fix common resume formatting issues
-    text = re.sub(r'(\w+)\s*[Ó•·]\s*(\d)', r'\1 \2', text)
-    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
-    text = re.sub(r'(\w)@(\w)', r'\1@\2', text)
-    text = re.sub(r'(\d{2})-(\d{10})', r'+91-\2', text)
-    
-    # Fix section headers
-    sections = ['EDUCATION', 'EXPERIENCE', 'PROJECTS', 'SKILLS', 'CONTACT', 'SUMMARY']
-    for section in sections:
-        text = re.sub(rf'{section}[.]*\s*([A-Z])', rf'{section}\n\1', text)
-    
-    # Fix email formats
-    text = re.sub(r'(\w+)\s+gmail\s*[.\s]*com', r'\1@gmail.com', text)
-    text = re.sub(r'([Ll]inkedin|[Gg]ithub)\s*[:\s]*([a-zA-Z0-9_-]+)', r'\1: \2', text)
-    
-    return text.strip()
+    return clean_text(text, resume_fixes=True)
 
 def format_resume_summary(text, summary):
     """Format resume summary with structured information"""
@@ -259,12 +322,14 @@ def extract_key_points(text):
     
     return key_points[:5]  # Return top 5 key points
 
-def create_comprehensive_fallback_summary(text, is_resume):
+def create_comprehensive_fallback_summary(text, is_resume, index=None):
     """Create comprehensive summary when AI summarizer fails"""
-    sentences = [s.strip() for s in text.split('.') if len(s.strip()) > 15]
+    if index is None or index.text != text:
+        index = SentenceIndex(text)
+    sentences = index.sentence_ids(min_length=15)
     
     # Take first few sentences as introduction
-    intro_sentences = sentences[:3]
+    intro_sentences = [index.sentence(i) for i in sentences[:3]]
     intro = '. '.join(intro_sentences) + '.'
     
     # Extract key information
@@ -272,24 +337,24 @@ def create_comprehensive_fallback_summary(text, is_resume):
     
     if is_resume:
         # Look for education
-        education_sentences = [s for s in sentences if any(word in s.lower() for word in ['university', 'college', 'degree', 'education'])]
-        if education_sentences:
-            key_info.append(f"Education: {education_sentences[0]}")
+        education_sentence = index.first_sentence_containing(['university', 'college', 'degree', 'education'], min_length=15)
+        if education_sentence is not None:
+            key_info.append(f"Education: {index.sentence(education_sentence)}")
         
         # Look for experience
-        experience_sentences = [s for s in sentences if any(word in s.lower() for word in ['experience', 'worked', 'company', 'role'])]
-        if experience_sentences:
-            key_info.append(f"Experience: {experience_sentences[0]}")
+        experience_sentence = index.first_sentence_containing(['experience', 'worked', 'company', 'role'], min_length=15)
+        if experience_sentence is not None:
+            key_info.append(f"Experience: {index.sentence(experience_sentence)}")
         
         # Look for skills
-        skills_sentences = [s for s in sentences if any(word in s.lower() for word in ['skills', 'technologies', 'programming', 'software'])]
-        if skills_sentences:
-            key_info.append(f"Skills: {skills_sentences[0]}")
+        skills_sentence = index.first_sentence_containing(['skills', 'technologies', 'programming', 'software'], min_length=15)
+        if skills_sentence is not None:
+            key_info.append(f"Skills: {index.sentence(skills_sentence)}")
     else:
         # For general documents, extract key themes
         middle_sentences = sentences[len(sentences)//4:len(sentences)*3//4]
         if middle_sentences:
-            key_info.extend(middle_sentences[:3])
+            key_info.extend(index.sentence(i) for i in middle_sentences[:3])
     
     # Combine into comprehensive summary
     comprehensive_summary = intro
@@ -298,112 +363,528 @@ def create_comprehensive_fallback_summary(text, is_resume):
     
     # Add conclusion if available
     if len(sentences) > 5:
-        conclusion_sentences = sentences[-2:]
+        conclusion_sentences = [index.sentence(i) for i in sentences[-2:]]
         conclusion = '. '.join(conclusion_sentences) + '.'
         comprehensive_summary += f"\n\nConclusion: {conclusion}"
     
     return comprehensive_summary
 
-def process_input(input_data, is_pdf=False, question=None):
-    """Process input data for summarization and Q&A"""
-    global summarizer, qa_pipeline
+def summary_kwargs(text, stage, is_resume, profile=None, input_tokens=None):
+    """Summarizer arguments for ``text`` at ``stage`` ("single", "chunk" or "combine")
     
-    if not models_loaded or not summarizer or not qa_pipeline:
-        return {"error": "AI models not loaded. Please restart the application."}
+    Length limits are proportional to the text's token count (pass
+    ``input_tokens`` when it is already known); ``profile`` defaults to
+    DECODING_PROFILE.
+    """
+    if input_tokens is None:
+        input_tokens = count_input_tokens(text)
+    return generation_kwargs(input_tokens, stage, is_resume, profile or DECODING_PROFILE)
+
+def prepare_document(raw_text, timer=None):
+    """Cleanup, resume detection and chunking of an extracted document
+    
+    Returns a dict with the cleaned "text", "is_resume" and the "chunks". If
+    no text is left after cleanup, "chunks" is empty. The sentence "index" is
+    None until document_index() builds it.
+    """
+    timer = timer or StageTimer()
+    text = clean_resume_text(raw_text)
+    timer.mark("clean")
+    return prepare_cleaned(text, timer)
+
+def prepare_pages(pages, timer=None):
+    """prepare_document() for a document read page by page (STREAM_PDF_PAGES)
     
+    Each page is cleaned and normalized as soon as it is extracted, so the
+    "extract_clean" stage covers both. Can differ from prepare_document()
+    at page seams (see text_normalize.normalize_pages()).
+    """
+    timer = timer or StageTimer()
+    cleaned, normalized = [], []
+    for page_text, page_normalized in normalize_pages(pages, resume_fixes=True, ocr_fixes=True):
+        cleaned.append(page_text)
+        normalized.append(page_normalized)
+    timer.mark("extract_clean")
+    return prepare_cleaned(' '.join(cleaned), timer, ' '.join(normalized))
+
+def prepare_cleaned(text, timer, normalized=None):
+    """Rest of prepare_document() after cleanup; ``normalized`` is the text already preprocessed for chunking"""
+    prepared = {"text": text, "is_resume": False, "chunks": [], "index": None}
+    if not text.strip():
+        return prepared
+
+    # Detect if it's a resume
+    is_resume = any(keyword in text.upper() for keyword in 
+                   ['EDUCATION', 'EXPERIENCE', 'SKILLS', 'PROJECTS', 'RESUME', 'CV', 'CONTACT'])
+
+    # Process text in chunks
+    max_size = 2000 if is_resume else 1500
+    if normalized is None:
+        text_chunks = intelligent_chunking(text, max_size)
+    else:
+        text_chunks = build_chunks(normalized, max_size)
+    timer.mark("chunk")
+    
+    prepared.update(is_resume=is_resume, chunks=text_chunks)
+    return prepared
+
+def document_index(prepared):
+    """Sentence index over the normalized text the chunks point into, built on first use
+    
+    Only the extractive fallbacks and Q&A need it, so a request that gets
+    its summary from the model never builds one.
+    """
+    if prepared["index"] is None and prepared["chunks"]:
+        prepared["index"] = SentenceIndex(prepared["chunks"][0].buffer)
+    return prepared["index"]
+
+def count_model_tokens(text):
+    """Token count of ``text`` with the summarizer's tokenizer (word-piece estimate for the stub models)"""
+    tokenizer = getattr(summarizer, 'tokenizer', None)
+    if tokenizer is None:
+        return count_tokens(text)
+    return len(tokenizer(text, truncation=False)["input_ids"])
+
+def count_input_tokens(text):
+    """Model tokens of ``text`` as summarizer input, up to about what the model reads (MODEL_MAX_TOKENS)"""
+    return count_model_tokens(text[:MODEL_MAX_TOKENS * MAX_CHARS_PER_TOKEN])
+
+def summary_inputs(chunks):
+    """Text the summarizer is given per chunk: all of a single chunk, else each chunk's first 2000 characters"""
+    if len(chunks) == 1:
+        return [chunks[0].text()]
+    return [chunk.text(2000) for chunk in chunks]
+
+# Section summaries are only condensed by a final summarizer pass when they
+# are longer than this many words together
+COMBINE_MIN_WORDS = 300
+
+def read_document(input_data, is_pdf, stats, timer):
+    """Extract (PDFs) and prepare a document; returns ``(raw_text, prepared)``
+    
+    With STREAM_PDF_PAGES a PDF goes through prepare_pages() and the raw
+    text is never assembled; ``raw_text`` is then the cleaned text.
+    """
+    if is_pdf and STREAM_PDF_PAGES:
+        try:
+            prepared = prepare_pages(iter_pdf_pages(input_data, stats), timer)
+        except Exception as e:
+            print(f"PDF extraction error: {e}")
+            prepared = prepare_document("", timer)
+        return prepared["text"], prepared
+    if is_pdf:
+        raw_text = extract_text_from_pdf(input_data, stats=stats)
+        timer.mark("extract")
+    else:
+        raw_text = input_data
+    return raw_text, prepare_document(raw_text, timer)
+
+def warm_document(input_data, is_pdf=False):
+    """Upload-time preparation run by DOCUMENTS: extraction, prepare_document(), the sentence index and chunk token counts
+    
+    Deletes the uploaded PDF when done. The prepared dict also carries
+    "raw_text", "pages" and the build's "warmup_timings".
+    """
+    timer = StageTimer()
+    stats = {"pages": None}
     try:
-        # Extract text
+        raw_text, prepared = read_document(input_data, is_pdf, stats, timer)
+    finally:
         if is_pdf:
-            raw_text = extract_text_from_pdf(input_data)
-            text = clean_resume_text(raw_text)
-        else:
-            text = input_data
-            text = clean_resume_text(text)
+            safe_delete_file(input_data)
+    # Built ahead of the questions that usually follow an upload
+    document_index(prepared)
+    timer.mark("index")
+    prepared["token_counts"] = [count_input_tokens(text) for text in summary_inputs(prepared["chunks"])]
+    timer.mark("tokenize")
+    prepared.update(raw_text=raw_text, pages=stats["pages"], warmup_timings=timer.as_dict())
+    return prepared
 
-        if not text.strip():
-            return {"error": "No text could be extracted from the document."}
+def extractive_chunk_summary(chunk):
+    """Fallback summary of one chunk: its first sentences"""
+    sentences = chunk.text().split('.')[:10]  # More sentences for completeness
+    return '. '.join([s.strip() for s in sentences if len(s.strip()) > 10]) + '.'
 
-        # Detect if it's a resume
-        is_resume = any(keyword in text.upper() for keyword in 
-                       ['EDUCATION', 'EXPERIENCE', 'SKILLS', 'PROJECTS', 'RESUME', 'CV', 'CONTACT'])
+def fallback_summary(prepared):
+    """Extractive summary of a prepared document, without model calls"""
+    text, is_resume, chunks = prepared["text"], prepared["is_resume"], prepared["chunks"]
+    source = chunks[0].text() if len(chunks) == 1 else text
+    summary = create_comprehensive_fallback_summary(source, is_resume, document_index(prepared))
+    return format_resume_summary(text, summary) if is_resume else summary
 
-        # Process text in chunks
-        text_chunks = intelligent_chunking(text, max_size=2000 if is_resume else 1500)
+def summarize_document(prepared, model_summary=None, deadline=None, models=None, decoding_profile=None):
+    """Comprehensive summary of a prepared document
+    
+    ``model_summary`` is the summarizer output for a single-chunk document
+    when it was already generated elsewhere (e.g. as part of a batch).
+    Summarizer calls that ``deadline`` has no time left for are replaced by
+    the extractive fallbacks, and the stage is marked degraded. ``models``
+    picks the tier (default: the primary one), ``decoding_profile`` the
+    decoding settings (default: DECODING_PROFILE). Text that is already as
+    short as its summary would be is used as is, without a model call.
+    """
+    text, is_resume = prepared["text"], prepared["is_resume"]
+    text_chunks = prepared["chunks"]
+    deadline = deadline or Deadline()
+    models = models or active_models()
+    profile = decoding_profile or DECODING_PROFILE
+    summarizer, model = models["summarizer"], f"{models['tier']}:{profile}"
+    # Lets a running summarizer call stop when the request is cancelled
+    cancel_kwargs = deadline.generation_kwargs()
+    
+    # Counted during warm-up for uploaded documents
+    token_counts = prepared.get("token_counts")
+    
+    # Generate comprehensive summary
+    if len(text_chunks) == 1:
+        # Single chunk - generate detailed summary
+        summary_text = text_chunks[0].text()
+        input_tokens = token_counts[0] if token_counts else count_input_tokens(summary_text)
+        if model_summary is None and fits_summary(input_tokens, "single", is_resume, profile):
+            # Nothing to shorten: the cleaned text is the summary
+            record_skipped("summarize")
+            model_summary = summary_text
+        if model_summary is None and not deadline.allows(f"summarize:{model}", tokens=input_tokens):
+            deadline.degrade("summarize")
+            return fallback_summary(prepared)
+        try:
+            # Generate longer, more detailed summary
+            if model_summary is None:
+                with deadline.timed(f"summarize:{model}", tokens=input_tokens):
+                    model_summary = summarizer(summary_text,
+                                               **summary_kwargs(summary_text, "single", is_resume, profile,
+                                                                input_tokens),
+                                               **cancel_kwargs)[0]['summary_text']
+            summary = model_summary
+            
+            # Enhance with key details extraction
+            summary = enhance_summary_with_details(summary, summary_text, is_resume)
+            
+            if is_resume:
+                summary = format_resume_summary(text, summary)
+        except Cancelled:
+            raise
+        except SlotTimeout:
+            # Queued behind other model calls until the budget ran out
+            deadline.degrade("summarize")
+            return fallback_summary(prepared)
+        except Exception as e:
+            print(f"Summarization error: {e}")
+            # Fallback: create comprehensive manual summary
+            summary = create_comprehensive_fallback_summary(summary_text, is_resume, document_index(prepared))
+            if is_resume:
+                summary = format_resume_summary(text, summary)
+    else:
+        # Multi-chunk processing - comprehensive approach
+        chunk_summaries = []
+        key_points = []
+        chunk_inputs = summary_inputs(text_chunks)
+        chunk_tokens = token_counts or [count_input_tokens(chunk_text) for chunk_text in chunk_inputs]
         
-        # Generate comprehensive summary
-        if len(text_chunks) == 1:
-            # Single chunk - generate detailed summary
-            summary_text = text_chunks[0]
+        # Process each chunk with detailed summarization
+        for i, chunk in enumerate(text_chunks):
+            # Also drops the summary of a chunk that was stopped half-way
+            deadline.check_cancelled()
+            if not deadline.allows(f"summarize_chunk:{model}", tokens=chunk_tokens[i]):
+                deadline.degrade("summarize_chunks")
+                chunk_summaries.append(f"Section {i+1}: {extractive_chunk_summary(chunk)}")
+                continue
             try:
-                # Generate longer, more detailed summary
-                summary = summarizer(summary_text, 
-                                   max_length=500 if is_resume else 400, 
-                                   min_length=250 if is_resume else 200, 
-                                   do_sample=False)[0]['summary_text']
+                # Generate detailed summary for each chunk
+                with deadline.timed(f"summarize_chunk:{model}", tokens=chunk_tokens[i]):
+                    chunk_text = chunk_inputs[i]
+                    chunk_summary = summarizer(chunk_text,
+                                               **summary_kwargs(chunk_text, "chunk", is_resume, profile,
+                                                                chunk_tokens[i]),
+                                               **cancel_kwargs)[0]['summary_text']
+                chunk_summaries.append(f"Section {i+1}: {chunk_summary}")
                 
-                # Enhance with key details extraction
-                summary = enhance_summary_with_details(summary, summary_text, is_resume)
+                # Extract key points from each chunk
+                key_points.extend(extract_key_points(chunk.text()))
                 
-                if is_resume:
-                    summary = format_resume_summary(text, summary)
+            except Cancelled:
+                raise
+            except SlotTimeout:
+                deadline.degrade("summarize_chunks")
+                chunk_summaries.append(f"Section {i+1}: {extractive_chunk_summary(chunk)}")
             except Exception as e:
-                print(f"Summarization error: {e}")
-                # Fallback: create comprehensive manual summary
-                summary = create_comprehensive_fallback_summary(summary_text, is_resume)
-                if is_resume:
-                    summary = format_resume_summary(text, summary)
+                print(f"Chunk summarization error: {e}")
+                # Fallback for chunk processing
+                chunk_summaries.append(f"Section {i+1}: {extractive_chunk_summary(chunk)}")
+        
+        # Combine all summaries into comprehensive final summary
+        combined_summary = '\n\n'.join(chunk_summaries)
+        
+        # Add key points section
+        if key_points:
+            key_points_text = '\n\nKey Points:\n• ' + '\n• '.join(key_points[:8])
+            combined_summary += key_points_text
+        
+        # Final comprehensive summary
+        deadline.check_cancelled()
+        long_enough = len(combined_summary.split()) > COMBINE_MIN_WORDS
+        combined_tokens = count_input_tokens(combined_summary) if long_enough else None
+        if not long_enough:
+            # Short enough as it is, without a final pass
+            summary = combined_summary
+        elif fits_summary(combined_tokens, "combine", is_resume, profile):
+            # The section summaries together are already short enough
+            record_skipped("combine")
+            summary = combined_summary
+        elif not deadline.allows(f"combine:{model}", tokens=combined_tokens):
+            deadline.degrade("combine")
+            summary = combined_summary
         else:
-            # Multi-chunk processing - comprehensive approach
-            chunk_summaries = []
-            key_points = []
-            
-            # Process each chunk with detailed summarization
-            for i, chunk in enumerate(text_chunks):
-                try:
-                    # Generate detailed summary for each chunk
-                    chunk_summary = summarizer(chunk[:2000], 
-                                             max_length=300 if is_resume else 250, 
-                                             min_length=150 if is_resume else 100, 
-                                             do_sample=False)[0]['summary_text']
-                    chunk_summaries.append(f"Section {i+1}: {chunk_summary}")
-                    
-                    # Extract key points from each chunk
-                    key_points.extend(extract_key_points(chunk))
-                    
-                except Exception as e:
-                    print(f"Chunk summarization error: {e}")
-                    # Fallback for chunk processing
-                    sentences = chunk.split('.')[:10]  # More sentences for completeness
-                    chunk_summary = '. '.join([s.strip() for s in sentences if len(s.strip()) > 10]) + '.'
-                    chunk_summaries.append(f"Section {i+1}: {chunk_summary}")
-            
-            # Combine all summaries into comprehensive final summary
-            combined_summary = '\n\n'.join(chunk_summaries)
+            try:
+                # Generate final comprehensive summary
+                with deadline.timed(f"combine:{model}", tokens=combined_tokens):
+                    final_summary = summarizer(combined_summary,
+                                               **summary_kwargs(combined_summary, "combine", is_resume, profile,
+                                                                combined_tokens),
+                                               **cancel_kwargs)[0]['summary_text']
+                
+                # Combine with section details
+                summary = f"{final_summary}\n\n{combined_summary}"
+            except Cancelled:
+                raise
+            except SlotTimeout:
+                deadline.degrade("combine")
+                summary = combined_summary
+            except Exception as e:
+                print(f"Final summarization error: {e}")
+                summary = combined_summary
+
+        if is_resume:
+            summary = format_resume_summary(text, summary)
+    # A summarizer call stopped by cancellation returned a partial summary
+    deadline.check_cancelled()
+    return summary
+
+def answer_fields(question, qa_result, enhanced_context, is_resume):
+    """Response fields for one qa_pipeline result, with short answers expanded from the context"""
+    raw_answer = qa_result['answer']
+    confidence_score = qa_result.get('score', 0.0)
+    
+    # Enhance answer quality
+    if len(raw_answer.split()) < 6:
+        sentences = enhanced_context.split('.')
+        question_keywords = question.lower().split()
+        
+        relevant_sentences = []
+        for sentence in sentences:
+            sentence = sentence.strip()
+            if len(sentence) < 10:
+                continue
             
-            # Add key points section
-            if key_points:
-                key_points_text = '\n\nKey Points:\n• ' + '\n• '.join(key_points[:8])
-                combined_summary += key_points_text
+            matches = sum(1 for word in question_keywords if word in sentence.lower())
+            if matches >= 2:
+                relevant_sentences.append(sentence)
+        
+        if relevant_sentences:
+            additional_info = '. '.join(relevant_sentences[:2])
+            raw_answer = f"{raw_answer}. {additional_info}"
+    
+    return {
+        "QnA Answer": raw_answer,
+        "Confidence Score": round(confidence_score, 2),
+        "Answer Quality": {
+            "Length": len(raw_answer.split()),
+            "Is Detailed": len(raw_answer.split()) >= 10,
+            "Context Quality": "Resume-optimized matching" if is_resume else "High-precision semantic matching"
+        }
+    }
+
+def extractive_answer_fields(question, enhanced_context, is_resume):
+    """Answer fields without the Q&A model: the context sentence sharing the most words with the question"""
+    question_words = set(question.lower().split())
+    sentences = [s.strip() for s in enhanced_context.split('.') if len(s.strip()) >= 10]
+    best = max(sentences, key=lambda s: len(question_words & set(s.lower().split())), default="")
+    fields = answer_fields(question, {"answer": best, "score": 0.0}, enhanced_context, is_resume)
+    fields["Answer Quality"]["Context Quality"] = "Extractive fallback (latency budget)"
+    return fields
+
+def answer_question(question, summary, text, is_resume, deadline=None, models=None):
+    """Answer fields ("QnA Answer", "Confidence Score", ...) for one question"""
+    deadline = deadline or Deadline()
+    models = models or active_models()
+    try:
+        # Find best context (simple approach)
+        best_context = text[:3000]  # Use first 3000 chars as context
+        enhanced_context = f"Document Summary: {summary}\n\nDetailed Context: {best_context}"
+        
+        if not deadline.allows(f"qa:{models['tier']}"):
+            deadline.degrade("qa")
+            return extractive_answer_fields(question, enhanced_context, is_resume)
+        with deadline.timed(f"qa:{models['tier']}"):
+            qa_result = models["qa"](question=question, context=enhanced_context)
+        return answer_fields(question, qa_result, enhanced_context, is_resume)
             
-            # Final comprehensive summary
-            if len(combined_summary.split()) > 300:
-                try:
-                    # Generate final comprehensive summary
-                    final_summary = summarizer(combined_summary, 
-                                             max_length=600 if is_resume else 500, 
-                                             min_length=300 if is_resume else 250, 
-                                             do_sample=False)[0]['summary_text']
-                    
-                    # Combine with section details
-                    summary = f"{final_summary}\n\n{combined_summary}"
-                except Exception as e:
-                    print(f"Final summarization error: {e}")
-                    summary = combined_summary
+    except Cancelled:
+        raise
+    except SlotTimeout:
+        deadline.degrade("qa")
+        return extractive_answer_fields(question, enhanced_context, is_resume)
+    except Exception as e:
+        print(f"Q&A error: {e}")
+        return {
+            "QnA Answer": f"Error processing question: {str(e)}",
+            "Confidence Score": 0.0
+        }
+
+def retrieve_context(question, prepared, max_chars=3000):
+    """The document's sentences that best match ``question``, in document order
+    
+    Uses the sentence index built once per document, so any number of
+    questions share it. Falls back to the start of the text when no
+    sentence matches.
+    """
+    index = document_index(prepared)
+    words = [word.strip('?.,;:!()"\'') for word in question.lower().split()]
+    words = [word for word in words if len(word) > 2 and word not in QUESTION_STOPWORDS]
+    
+    selected, size = [], 0
+    for sentence_id, _ in index.score_sentences(words, min_length=10):
+        length = index.length(sentence_id) + 2
+        if size + length <= max_chars:
+            selected.append(sentence_id)
+            size += length
+    if not selected:
+        return prepared["text"][:max_chars]
+    return '. '.join(index.sentence(sentence_id) for sentence_id in sorted(selected))
+
+def answer_questions(questions, summary, prepared, deadline=None, models=None):
+    """Answer fields for every question, from batched qa_pipeline passes
+    
+    Each question gets its own retrieved context from the document's
+    sentence index; all (question, context) pairs then go to the model in
+    batches of QA_BATCH_SIZE.
+    """
+    deadline = deadline or Deadline()
+    models = models or active_models()
+    contexts = [f"Document Summary: {summary}\n\nDetailed Context: {retrieve_context(question, prepared)}"
+                for question in questions]
+    if not deadline.allows(f"qa:{models['tier']}", len(questions)):
+        deadline.degrade("qa")
+        return [dict({"Question": question}, **extractive_answer_fields(question, context, prepared["is_resume"]))
+                for question, context in zip(questions, contexts)]
+    try:
+        with deadline.timed(f"qa:{models['tier']}", len(questions)):
+            qa_results = models["qa"]([{"question": question, "context": context}
+                                       for question, context in zip(questions, contexts)],
+                                      batch_size=QA_BATCH_SIZE)
+        if isinstance(qa_results, dict):  # pipelines unwrap single-item lists
+            qa_results = [qa_results]
+    except Cancelled:
+        raise
+    except SlotTimeout:
+        deadline.degrade("qa")
+        return [dict({"Question": question}, **extractive_answer_fields(question, context, prepared["is_resume"]))
+                for question, context in zip(questions, contexts)]
+    except Exception as e:
+        print(f"Batched Q&A error: {e}")
+        return [{"Question": question, "QnA Answer": f"Error processing question: {str(e)}",
+                 "Confidence Score": 0.0} for question in questions]
+    
+    return [dict({"Question": question}, **answer_fields(question, qa_result, context, prepared["is_resume"]))
+            for question, qa_result, context in zip(questions, qa_results, contexts)]
+
+def planned_operations(prepared, tier, questions=0, decoding_profile=None):
+    """Model calls a request on ``prepared`` is expected to make, as (operation, count) pairs"""
+    chunks = len(prepared["chunks"])
+    model = f"{tier}:{decoding_profile or DECODING_PROFILE}"
+    if chunks == 1:
+        operations = [(f"summarize:{model}", 1)]
+    else:
+        operations = [(f"summarize_chunk:{model}", chunks), (f"combine:{model}", 1)]
+    if questions:
+        operations.append((f"qa:{tier}", questions))
+    return operations
+
+def process_input(input_data, is_pdf=False, question=None, questions=None, document_id=None, deadline=None,
+                  decoding_profile=None):
+    """Process input data for summarization and Q&A
+    
+    ``questions`` (a list) are answered together in batched passes and
+    returned under "Answers"; ``question`` keeps the single-answer fields.
+    With ``document_id`` (from /upload), ``input_data`` is ignored and the
+    document warmed up in the background is used, waiting for its build if
+    it is still running; its summary is computed once and reused.
+    Model calls that ``deadline`` (default: REQUEST_BUDGET_S from now) has
+    no time left for fall back to extractive versions, listed under
+    "Latency Budget" in the stats. ``decoding_profile`` overrides
+    DECODING_PROFILE for the summary. When the deadline's cancel token fires
+    (client gone, or /cancel), the remaining model calls are skipped and
+    their expected time is reported as reclaimed.
+    """
+    global summarizer, qa_pipeline
+    
+    if not models_loaded or not summarizer or not qa_pipeline:
+        return {"error": "AI models not loaded. Please restart the application."}
+    
+    deadline = deadline or Deadline(REQUEST_BUDGET_S)
+    profile = decoding_profile or DECODING_PROFILE
+    # Under load, TIER_ROUTER may send this request to the fast tier
+    tier = TIER_ROUTER.acquire() if TIER_ROUTER else model_tier
+    models = scheduled_models(MODELS.get(tier) or active_models(), deadline=deadline)
+    timer = StageTimer(memory=MEMORY_PROFILE)
+    memory_before = tracemalloc.take_snapshot() if MEMORY_PROFILE else None
+    # One line in the performance log (see perf_log.py)
+    perf_record = {"input": "pdf" if is_pdf else "text", "pages": None, "model_tier": tier,
+                   "decoding_profile": profile,
+                   "question": bool(question and question.strip()), "questions": len(questions or []),
+                   "cache_hits": {}}
+    
+    document = None
+    planned = []
+    try:
+        if document_id:
+            document = DOCUMENTS.get(document_id)
+            if document is None:
+                return {"error": "Unknown or expired document. Please upload it again."}
+            perf_record["cache_hits"]["warmup"] = document.future.done()
+            try:
+                prepared = document.wait(deadline.timeout())
+            except FutureTimeoutError:
+                deadline.degrade("warmup")
+                log_request(dict(perf_record, stages=timer.as_dict(), total_s=round(timer.total(), 4),
+                                 degraded=deadline.degraded, status="error", error="warm-up timeout"))
+                return {"error": "The document is still being prepared. Please try again in a moment."}
+            except CancelledError:
+                log_request(dict(perf_record, stages=timer.as_dict(), total_s=round(timer.total(), 4),
+                                 status="error", error="warm-up cancelled"))
+                return {"error": "The document's preparation was cancelled. Please upload it again."}
+            timer.mark("warmup_wait")
+            raw_text = prepared["raw_text"]
+            perf_record.update(input="upload", pages=prepared["pages"])
+        else:
+            raw_text, prepared = read_document(input_data, is_pdf, perf_record, timer)
+        text, is_resume, text_chunks = prepared["text"], prepared["is_resume"], prepared["chunks"]
+        perf_record.update(doc_hash=document_hash(raw_text), chars=len(text))
+        planned = planned_operations(prepared, tier, int(perf_record["question"]) + len(questions or []), profile)
+        deadline.check_cancelled()
+
+        if not text_chunks:
+            log_request(dict(perf_record, stages=timer.as_dict(), total_s=round(timer.total(), 4),
+                             status="error", error="no text"))
+            return {"error": "No text could be extracted from the document."}
+
+        if document is not None:
+            try:
+                summary, perf_record["cache_hits"]["summary"] = document.shared(
+                    f"summary:{tier}:{profile}",
+                    lambda: summarize_document(prepared, deadline=deadline, models=models, decoding_profile=profile),
+                    timeout=deadline.timeout(), check=deadline.check_cancelled)
+            except FutureTimeoutError:
+                # Another request is still generating it; don't wait past this request's budget
+                deadline.degrade("summarize")
+                summary = fallback_summary(prepared)
             else:
-                summary = combined_summary
-                
-            if is_resume:
-                summary = format_resume_summary(text, summary)
+                if deadline.degraded:
+                    # Let a later request with more time left produce the full summary
+                    document.forget(f"summary:{tier}:{profile}")
+        else:
+            summary = summarize_document(prepared, deadline=deadline, models=models, decoding_profile=profile)
+        timer.mark("summarize")
         
         # Prepare result
         result = {
@@ -413,115 +894,351 @@ def process_input(input_data, is_pdf=False, question=None):
                 "Total Chunks": len(text_chunks),
                 "Text Length": len(text),
                 "Document Type": "Resume/CV" if is_resume else "General Document",
-                "Processing Method": "RESUME-OPTIMIZED AI Pipeline" if is_resume else "HIGH-ACCURACY AI Pipeline"
+                "Processing Method": ("RESUME-OPTIMIZED AI Pipeline" if is_resume else "HIGH-ACCURACY AI Pipeline")
+                                     + f" ({tier} models)",
+                "Decoding Profile": profile
             }
         }
 
         # Handle Q&A if question provided
         if question and question.strip():
-            try:
-                # Find best context (simple approach)
-                best_context = text[:3000]  # Use first 3000 chars as context
-                enhanced_context = f"Document Summary: {summary}\n\nDetailed Context: {best_context}"
-                
-                qa_result = qa_pipeline(question=question, context=enhanced_context)
-                raw_answer = qa_result['answer']
-                confidence_score = qa_result.get('score', 0.0)
-                
-                # Enhance answer quality
-                if len(raw_answer.split()) < 6:
-                    sentences = enhanced_context.split('.')
-                    question_keywords = question.lower().split()
-                    
-                    relevant_sentences = []
-                    for sentence in sentences:
-                        sentence = sentence.strip()
-                        if len(sentence) < 10:
-                            continue
-                        
-                        matches = sum(1 for word in question_keywords if word in sentence.lower())
-                        if matches >= 2:
-                            relevant_sentences.append(sentence)
-                    
-                    if relevant_sentences:
-                        additional_info = '. '.join(relevant_sentences[:2])
-                        raw_answer = f"{raw_answer}. {additional_info}"
-                
-                result.update({
-                    "QnA Answer": raw_answer,
-                    "Confidence Score": round(confidence_score, 2),
-                    "Answer Quality": {
-                        "Length": len(raw_answer.split()),
-                        "Is Detailed": len(raw_answer.split()) >= 10,
-                        "Context Quality": "Resume-optimized matching" if is_resume else "High-precision semantic matching"
-                    }
-                })
-                    
-            except Exception as e:
-                print(f"Q&A error: {e}")
-                result.update({
-                    "QnA Answer": f"Error processing question: {str(e)}",
-                    "Confidence Score": 0.0
-                })
+            result.update(answer_question(question, summary, text, is_resume, deadline, models))
+            timer.mark("qa")
+        if questions:
+            result["Answers"] = answer_questions(questions, summary, prepared, deadline, models)
+            timer.mark("qa_batch")
+        if perf_record["question"] or questions:
+            # From the upload for warmed-up documents, else from the start of this request
+            first_answer_s = document.answered() if document is not None else timer.total()
+            result["Processing Stats"]["Time To First Answer"] = round(first_answer_s, 4)
+            perf_record["time_to_first_answer_s"] = round(first_answer_s, 4)
 
+        result["Processing Stats"]["Stage Timings"] = timer.as_dict()
+        result["Processing Stats"]["Processing Time"] = round(timer.total(), 4)
+        result["Processing Stats"]["Latency Budget"] = deadline.as_dict()
+        if TIER_ROUTER:
+            result["Processing Stats"]["Model Tier"] = dict(TIER_ROUTER.snapshot(), Tier=tier)
+        if MEMORY_PROFILE:
+            # Taken while the request's text, chunks and index are still alive
+            result["Processing Stats"]["Memory"] = {
+                "Stages": timer.memory,
+                "Top Allocations": top_allocations(memory_before),
+            }
+        
+        perf_record.update(chunks=len(text_chunks), document_type="resume" if is_resume else "general",
+                           degraded=deadline.degraded)
+        log_request(dict(perf_record, stages=timer.as_dict(), total_s=result["Processing Stats"]["Processing Time"],
+                         status="ok"))
         return result
         
+    except Cancelled as e:
+        # Model time this request was expected to need but did not use
+        reclaimed_s = round(max(0.0, deadline.planned_s(planned) - deadline.model_s), 4)
+        cancellation.record_cancellation(reclaimed_s)
+        print(f"🛑 Request cancelled ({e}), ~{reclaimed_s}s of model time reclaimed")
+        log_request(dict(perf_record, stages=timer.as_dict(), total_s=round(timer.total(), 4),
+                         status="cancelled", error=str(e), reclaimed_s=reclaimed_s))
+        return {"error": f"Request cancelled: {e}", "cancelled": True, "reclaimed_s": reclaimed_s}
+    
     except Exception as e:
         print(f"Processing error: {e}")
+        log_request(dict(perf_record, stages=timer.as_dict(), total_s=round(timer.total(), 4),
+                         status="error", error=str(e)))
         return {"error": f"Processing error: {str(e)}"}
+    
+    finally:
+        if TIER_ROUTER:
+            TIER_ROUTER.release(timer.total())
+
+def run_process_input(profile_options, *args, **kwargs):
+    """process_input(), under the profiler when the request asked for a profile"""
+    if not profile_options:
+        return process_input(*args, **kwargs)
+    
+    with RequestProfiler(profile_options["mode"], profile_options["interval"]) as profiler:
+        result = process_input(*args, **kwargs)
+    result["Profile"] = save_profile(profiler)
+    return result
 
 @app.route('/')
 def index():
     """Main page"""
     return render_template('index.html')
 
+def request_budget(headers):
+    """REQUEST_BUDGET_S, or the smaller budget the client asked for in X-Request-Budget"""
+    try:
+        asked = float(headers.get('X-Request-Budget', ''))
+    except ValueError:
+        return REQUEST_BUDGET_S
+    if asked <= 0:
+        return REQUEST_BUDGET_S
+    return min(asked, REQUEST_BUDGET_S) if REQUEST_BUDGET_S else asked
+
+def request_cost(text_input, file_content=None, filename="", document_id=None):
+    """Admission cost estimate of a request, before any work is done (see admission.py)"""
+    tier = TIER_ROUTER.tier if TIER_ROUTER else model_tier
+    if document_id:
+        document = DOCUMENTS.get(document_id)
+        if document is not None and document.ready():
+            prepared = document.wait()
+            return estimate_cost(prepared["pages"], len(prepared["text"]), tier)
+        return estimate_cost(pages=1, tier=tier)
+    if file_content is not None:
+        if filename.lower().endswith('.pdf'):
+            return estimate_cost(pdf_page_count(file_content), tier=tier)
+        return estimate_cost(chars=len(file_content), tier=tier)
+    return estimate_cost(chars=len(text_input), tier=tier)
+
+def process_request(profile_options, text_input, file, document_id=None, **kwargs):
+    """Run process_input() on an uploaded file, pasted text or warmed-up document; returns the JSON response
+    
+    Requests that don't fit into ADMISSION's capacity are turned away with
+    ADMISSION_STATUS and a Retry-After header. The request is cancelled when
+    its client disconnects, or through /cancel/<id> with the id the client
+    got from /request-id and sent as X-Request-ID (or a ``request_id`` form
+    field). Ids that were not issued or are already in use are refused.
+    """
+    # Only the development server exposes the connection; elsewhere /cancel is the only way
+    token = CancelToken(peer_closed(request.environ.get('werkzeug.socket')))
+    # The budget starts now, so it also covers saving the upload
+    kwargs["deadline"] = Deadline(request_budget(request.headers), cancel_token=token)
+    request_id = request.headers.get('X-Request-ID') or request.form.get('request_id', '')
+    
+    if not document_id and not text_input and not file:
+        return jsonify({'error': 'Please provide either text or upload a file'})
+    if kwargs.get("decoding_profile") and kwargs["decoding_profile"] not in DECODING_PROFILES:
+        return jsonify({'error': f"Unknown decoding profile, use one of: {', '.join(DECODING_PROFILES)}"})
+    
+    filename, file_content = "", None
+    if not document_id and file and file.filename != '':
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'Please upload a PDF or TXT file'})
+        filename = secure_filename(file.filename)
+        file_content = file.read()
+    
+    if request_id and not cancellation.register(request_id, token):
+        return jsonify({'error': 'Unknown or already used request id, get a new one from /request-id'}), 409
+    
+    ticket = None
+    try:
+        if ADMISSION:
+            try:
+                ticket = ADMISSION.admit(request_cost(text_input, file_content, filename, document_id))
+            except Rejected as e:
+                return (jsonify({'error': str(e), 'retry_after': e.retry_after_s}), ADMISSION_STATUS,
+                        {'Retry-After': str(e.retry_after_s)})
+        return jsonify({'success': True, 'result': run_request(profile_options, text_input, filename, file_content,
+                                                               document_id, **kwargs)})
+    finally:
+        cancellation.unregister(request_id, token)
+        if ticket:
+            ADMISSION.release(ticket)
+
+def run_request(profile_options, text_input, filename, file_content, document_id, **kwargs):
+    """process_input() result for an admitted request"""
+    if document_id:
+        return run_process_input(profile_options, None, document_id=document_id, **kwargs)
+    
+    if file_content is not None:
+        # Create temporary file
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.pdf' if filename.lower().endswith('.pdf') else '.txt', delete=False) as tmp_file:
+            tmp_file.write(file_content)
+            tmp_file_path = tmp_file.name
+        
+        try:
+            time.sleep(0.1)  # Small delay
+            
+            if filename.lower().endswith('.pdf'):
+                result = run_process_input(profile_options, tmp_file_path, is_pdf=True, **kwargs)
+            else:
+                with open(tmp_file_path, 'r', encoding='utf-8') as f:
+                    text_content = f.read()
+                result = run_process_input(profile_options, text_content, is_pdf=False, **kwargs)
+                
+            time.sleep(0.2)  # Another small delay
+            
+        finally:
+            safe_delete_file(tmp_file_path)
+        return result
+    
+    return run_process_input(profile_options, text_input, is_pdf=False, **kwargs)
+
 @app.route('/process', methods=['POST'])
 def process_document():
     """Process document endpoint"""
     try:
         text_input = request.form.get('text_input', '').strip()
         question = request.form.get('question', '').strip()
+        document_id = request.form.get('document_id', '').strip()
         file = request.files.get('file')
         
-        if not text_input and not file:
-            return jsonify({'error': 'Please provide either text or upload a file'})
+        try:
+            profile_options = profiling_options(request.headers, request.args)
+        except PermissionError as e:
+            return jsonify({'error': str(e)}), 403
+        
+        return process_request(profile_options, text_input, file, document_id,
+                               question=question if question else None,
+                               decoding_profile=request.form.get('decoding_profile', '').strip() or None)
+        
+    except Exception as e:
+        print(f"Endpoint error: {e}")
+        return jsonify({'error': f'Error: {str(e)}'})
+
+@app.route('/ask', methods=['POST'])
+def ask_questions():
+    """Summarize one document and answer a list of questions about it in batched passes
+    
+    Takes the same form fields as /process (including ``decoding_profile``),
+    with one ``questions`` field per question, or a JSON body
+    {"text_input": "...", "questions": [...]}
+    (or {"document_id": "...", ...} for a document sent to /upload).
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if data:
+            text_input = str(data.get('text_input', '')).strip()
+            document_id = str(data.get('document_id', '')).strip()
+            questions = data.get('questions') or []
+            if isinstance(questions, str):
+                questions = [questions]
+            elif not isinstance(questions, list):
+                return jsonify({'error': '"questions" must be a list of strings'}), 400
+            decoding_profile = str(data.get('decoding_profile', '')).strip()
+        else:
+            text_input = request.form.get('text_input', '').strip()
+            document_id = request.form.get('document_id', '').strip()
+            questions = request.form.getlist('questions')
+            decoding_profile = request.form.get('decoding_profile', '').strip()
+        questions = [str(q).strip() for q in questions if str(q).strip()]
+        file = request.files.get('file')
+        
+        try:
+            profile_options = profiling_options(request.headers, request.args)
+        except PermissionError as e:
+            return jsonify({'error': str(e)}), 403
+        
+        if not questions:
+            return jsonify({'error': 'Please provide at least one question'})
         
+        return process_request(profile_options, text_input, file, document_id, questions=questions,
+                               decoding_profile=decoding_profile or None)
+        
+    except Exception as e:
+        print(f"Endpoint error: {e}")
+        return jsonify({'error': f'Error: {str(e)}'})
+
+@app.route('/upload', methods=['POST'])
+def upload_document():
+    """Start preparing a document in the background; returns its id for /process and /ask
+    
+    Extraction, chunking, the sentence index and tokenization happen while
+    the user types a question. Questions that arrive earlier wait for the
+    build in progress. Uploads go through ADMISSION like /process, and hold
+    their cost until the warm-up finishes.
+    """
+    try:
+        text_input = request.form.get('text_input', '').strip()
+        file = request.files.get('file')
+        
+        filename, file_content = "", None
         if file and file.filename != '':
             if not allowed_file(file.filename):
                 return jsonify({'error': 'Please upload a PDF or TXT file'})
-            
             filename = secure_filename(file.filename)
             file_content = file.read()
-            
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(mode='wb', suffix='.pdf' if filename.lower().endswith('.pdf') else '.txt', delete=False) as tmp_file:
-                tmp_file.write(file_content)
-                tmp_file_path = tmp_file.name
-            
+        elif not text_input:
+            return jsonify({'error': 'Please provide either text or upload a file'})
+        
+        ticket = None
+        if ADMISSION:
             try:
-                time.sleep(0.1)  # Small delay
-                
-                if filename.lower().endswith('.pdf'):
-                    result = process_input(tmp_file_path, is_pdf=True, question=question if question else None)
-                else:
-                    with open(tmp_file_path, 'r', encoding='utf-8') as f:
-                        text_content = f.read()
-                    result = process_input(text_content, is_pdf=False, question=question if question else None)
-                    
-                time.sleep(0.2)  # Another small delay
-                
-            finally:
-                safe_delete_file(tmp_file_path)
+                ticket = ADMISSION.admit(request_cost(text_input, file_content, filename))
+            except Rejected as e:
+                return (jsonify({'error': str(e), 'retry_after': e.retry_after_s}), ADMISSION_STATUS,
+                        {'Retry-After': str(e.retry_after_s)})
         
-        elif text_input:
-            result = process_input(text_input, is_pdf=False, question=question if question else None)
+        pdf_path = None
+        try:
+            if filename.lower().endswith('.pdf'):
+                # warm_document() deletes the file once it is extracted
+                with tempfile.NamedTemporaryFile(mode='wb', suffix='.pdf', delete=False) as tmp_file:
+                    tmp_file.write(file_content)
+                pdf_path = tmp_file.name
+                document_id = DOCUMENTS.submit(warm_document, pdf_path, is_pdf=True)
+            elif file_content is not None:
+                document_id = DOCUMENTS.submit(warm_document, file_content.decode('utf-8'))
+            else:
+                document_id = DOCUMENTS.submit(warm_document, text_input)
+        except Exception as e:
+            if pdf_path:
+                safe_delete_file(pdf_path)
+            if ticket:
+                ADMISSION.release(ticket)
+            if isinstance(e, StoreFull):
+                return jsonify({'error': f'Server busy: {e}', 'retry_after': 1}), ADMISSION_STATUS, {'Retry-After': '1'}
+            raise
+        
+        future = DOCUMENTS.get(document_id).future
+        if pdf_path:
+            # ...which never happens if the warm-up is cancelled (/cancel, eviction) before it starts
+            future.add_done_callback(lambda future, path=pdf_path: future.cancelled() and safe_delete_file(path))
+        if ticket:
+            future.add_done_callback(lambda future: ADMISSION.release(ticket))
         
-        return jsonify({'success': True, 'result': result})
+        return jsonify({'success': True, 'document_id': document_id})
         
     except Exception as e:
-        print(f"Endpoint error: {e}")
+        print(f"Upload error: {e}")
         return jsonify({'error': f'Error: {str(e)}'})
 
+@app.route('/request-id', methods=['POST'])
+def new_request_id():
+    """A request id to send as X-Request-ID, so the request can be cancelled through /cancel"""
+    return jsonify({'request_id': cancellation.issue()})
+
+@app.route('/cancel/<request_id>', methods=['POST'])
+def cancel_request(request_id):
+    """Cancel a running /process or /ask request (by its X-Request-ID) or a pending upload warm-up"""
+    if cancellation.cancel(request_id):
+        return jsonify({'success': True, 'cancelled': 'request'})
+    document = DOCUMENTS.get(request_id)
+    if document is not None and document.future.cancel():
+        return jsonify({'success': True, 'cancelled': 'warmup'})
+    return jsonify({'error': 'Nothing running with this id'}), 404
+
+@app.route('/documents/<document_id>')
+def document_status(document_id):
+    """Warm-up status of an uploaded document"""
+    document = DOCUMENTS.get(document_id)
+    if document is None:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(document.status())
+
+@app.route('/metrics')
+def metrics():
+    """Load-related counters: admission lanes, inference scheduler classes, the model tier router, cancellations
+    and summarizer calls skipped because the input was already short enough"""
+    return jsonify({
+        'cancellations': dict(cancellation.CANCEL_STATS),
+        'skipped_inference': dict(SKIPPED_CALLS),
+        'admission': ADMISSION.snapshot() if ADMISSION else None,
+        'inference': SCHEDULER.snapshot() if SCHEDULER else None,
+        'model_tier': TIER_ROUTER.snapshot() if TIER_ROUTER else {'Current Tier': model_tier},
+    })
+
+@app.route('/profiles/<path:filename>')
+def download_profile(filename):
+    """Download a saved request profile (same token as the profiling hook)"""
+    try:
+        authorized = profiling_options(request.headers, request.args) is not None
+    except PermissionError:
+        authorized = False
+    if not authorized:
+        return jsonify({'error': 'Not found'}), 404
+    return send_from_directory(os.path.abspath(PROFILE_DIR), filename, as_attachment=True)
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("🚀 AI Document Summarizer & Q&A Bot")